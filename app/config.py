@@ -1,5 +1,7 @@
 import os
+import socket
 import ssl
+import uuid
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -9,6 +11,44 @@ load_dotenv()
 TWILIO_ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID")
 TWILIO_AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
 TWILIO_PHONE_NUMBER = os.getenv("TWILIO_PHONE_NUMBER")
+# Public base URL of this service, used in the webhook URLs given to Twilio
+STRATIFY_BASE_URL = os.getenv("STRATIFY_BASE_URL", "https://swarm-backend-new.onrender.com")
+# Size of the pooled keep-alive connection pool to the Twilio REST API and the per-request timeout
+TWILIO_MAX_CONNECTIONS = int(os.getenv("TWILIO_MAX_CONNECTIONS", "20"))
+TWILIO_TIMEOUT_SECONDS = float(os.getenv("TWILIO_TIMEOUT_SECONDS", "10"))
+# Outbound calls per second allowed on the Twilio account (Twilio's default is 1) and how many dials may be in flight
+TWILIO_CALLS_PER_SECOND = float(os.getenv("TWILIO_CALLS_PER_SECOND", "1.0"))
+DIAL_MAX_CONCURRENCY = int(os.getenv("DIAL_MAX_CONCURRENCY", "10"))
+# Retries for dials rejected with 429 or failing to connect, with jittered exponential backoff starting at DIAL_RETRY_BASE_SECONDS
+DIAL_MAX_RETRIES = int(os.getenv("DIAL_MAX_RETRIES", "3"))
+DIAL_RETRY_BASE_SECONDS = float(os.getenv("DIAL_RETRY_BASE_SECONDS", "1.0"))
+# Calls this deployment can host at once (Twilio channels, realtime sessions) and the most calls a single run may place
+MAX_CONCURRENT_CALLS = int(os.getenv("MAX_CONCURRENT_CALLS", "10"))
+MAX_CALLS_PER_RUN = int(os.getenv("MAX_CALLS_PER_RUN", "1000"))
+# How long batch orchestration waits for a call to end, and how often calls whose status callback may have been missed are checked in the database
+CALL_COMPLETION_TIMEOUT_SECONDS = float(os.getenv("CALL_COMPLETION_TIMEOUT_SECONDS", "900"))
+CALL_COMPLETION_SWEEP_SECONDS = float(os.getenv("CALL_COMPLETION_SWEEP_SECONDS", "30"))
+# Name this process holds leases under; unique per process unless set
+INSTANCE_ID = os.getenv("INSTANCE_ID") or f"{socket.gethostname()}-{uuid.uuid4().hex[:8]}"
+# How long a simulation stays leased to its process without a heartbeat before another process may resume it
+SIMULATION_LEASE_SECONDS = float(os.getenv("SIMULATION_LEASE_SECONDS", "60"))
+# Conversation analyses run at once in the background worker pool
+ANALYSIS_CONCURRENCY = int(os.getenv("ANALYSIS_CONCURRENCY", "2"))
+# Conversations analyzed together in one GPT-4 request, up to a combined transcript length in characters
+ANALYSIS_BATCH_SIZE = int(os.getenv("ANALYSIS_BATCH_SIZE", "5"))
+ANALYSIS_BATCH_MAX_CHARS = int(os.getenv("ANALYSIS_BATCH_MAX_CHARS", "12000"))
+# Retries for analyses rejected with 429, 5xx or a connection error, with jittered exponential backoff starting at ANALYSIS_RETRY_BASE_SECONDS
+ANALYSIS_MAX_RETRIES = int(os.getenv("ANALYSIS_MAX_RETRIES", "5"))
+ANALYSIS_RETRY_BASE_SECONDS = float(os.getenv("ANALYSIS_RETRY_BASE_SECONDS", "2.0"))
+# How long a running analysis stays leased to its process before another process may run it again
+ANALYSIS_LEASE_SECONDS = float(os.getenv("ANALYSIS_LEASE_SECONDS", "600"))
+# Analyses of recent transcripts kept in memory; older ones are looked up in the analysis_cache table
+ANALYSIS_CACHE_SIZE = int(os.getenv("ANALYSIS_CACHE_SIZE", "1000"))
+# Version of the analysis prompt cached results belong to; derived from the prompt text when unset
+ANALYSIS_PROMPT_VERSION = os.getenv("ANALYSIS_PROMPT_VERSION")
+# Estimated transcript tokens analyzed in one request; longer calls are split into chunks analyzed ANALYSIS_CHUNK_CONCURRENCY at a time
+ANALYSIS_MAX_TRANSCRIPT_TOKENS = int(os.getenv("ANALYSIS_MAX_TRANSCRIPT_TOKENS", "3000"))
+ANALYSIS_CHUNK_CONCURRENCY = int(os.getenv("ANALYSIS_CHUNK_CONCURRENCY", "4"))
 
 # OpenAI Configuration
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
@@ -16,6 +56,11 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 # Supabase Configuration
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+# Size of the pooled keep-alive connection pool to PostgREST and the per-request timeout
+DB_MAX_CONNECTIONS = int(os.getenv("DB_MAX_CONNECTIONS", "20"))
+DB_TIMEOUT_SECONDS = float(os.getenv("DB_TIMEOUT_SECONDS", "10"))
+# How long test configurations are cached before they are re-read
+TEST_CONFIG_CACHE_TTL_SECONDS = float(os.getenv("TEST_CONFIG_CACHE_TTL_SECONDS", "60"))
 
 # Voice Configuration
 DEFAULT_SYSTEM_MESSAGE = os.getenv("SYSTEM_MESSAGE", 
@@ -27,6 +72,32 @@ DEFAULT_SYSTEM_MESSAGE = os.getenv("SYSTEM_MESSAGE",
     "methods, and portion sizes. If you like what you hear, you'll eventually place an order."
 )
 
+# Media Stream Configuration
+# Forward OpenAI's base64 μ-law audio to Twilio as-is instead of decoding and re-encoding it
+AUDIO_PASSTHROUGH = os.getenv("AUDIO_PASSTHROUGH", "true").lower() == "true"
+# Milliseconds of caller audio batched into each input_audio_buffer.append (0 disables coalescing)
+INBOUND_AUDIO_COALESCE_MS = int(os.getenv("INBOUND_AUDIO_COALESCE_MS", "100"))
+# Maximum time caller audio may wait in the coalescing buffer before it is flushed
+INBOUND_AUDIO_MAX_DELAY_MS = int(os.getenv("INBOUND_AUDIO_MAX_DELAY_MS", "150"))
+# Bounded per-leg send queues; policies are drop_oldest, drop_newest or coalesce (see app/services/leg_queue.py)
+OPENAI_SEND_QUEUE_SIZE = int(os.getenv("OPENAI_SEND_QUEUE_SIZE", "50"))
+OPENAI_SEND_QUEUE_POLICY = os.getenv("OPENAI_SEND_QUEUE_POLICY", "drop_oldest")
+TWILIO_SEND_QUEUE_SIZE = int(os.getenv("TWILIO_SEND_QUEUE_SIZE", "500"))
+TWILIO_SEND_QUEUE_POLICY = os.getenv("TWILIO_SEND_QUEUE_POLICY", "coalesce")
+# Interval at which pending call record updates and transcript turns are written to the database
+CALL_PERSIST_INTERVAL_SECONDS = float(os.getenv("CALL_PERSIST_INTERVAL_SECONDS", "1.0"))
+
+# OpenAI Realtime Configuration
+OPENAI_REALTIME_URL = os.getenv("OPENAI_REALTIME_URL", "wss://api.openai.com/v1/realtime?model=gpt-4o-realtime-preview-2024-10-01")
+# Expected call start rate used to size the pool of pre-connected realtime sessions (0 disables the pool)
+REALTIME_POOL_CALLS_PER_SECOND = float(os.getenv("REALTIME_POOL_CALLS_PER_SECOND", "0.5"))
+REALTIME_POOL_MIN_SIZE = int(os.getenv("REALTIME_POOL_MIN_SIZE", "1"))
+REALTIME_POOL_MAX_SIZE = int(os.getenv("REALTIME_POOL_MAX_SIZE", "20"))
+# Sampling temperature of the realtime sessions; recorded with each call's technical metrics
+REALTIME_TEMPERATURE = float(os.getenv("REALTIME_TEMPERATURE", "0.7"))
+# Pooled sessions older than this are closed and replaced before the server times them out
+REALTIME_POOL_MAX_IDLE_SECONDS = float(os.getenv("REALTIME_POOL_MAX_IDLE_SECONDS", "300"))
+
 # SSL Context for WebSocket connections
 ssl_context = ssl.create_default_context()
 ssl_context.check_hostname = False
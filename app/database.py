@@ -1,34 +1,97 @@
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
 import logging
 from datetime import datetime, UTC
 from uuid import uuid4
-from supabase import create_client, Client
-from app.config import SUPABASE_URL, SUPABASE_KEY
+from app.config import SUPABASE_URL, SUPABASE_KEY, DB_MAX_CONNECTIONS, DB_TIMEOUT_SECONDS, TEST_CONFIG_CACHE_TTL_SECONDS
+from app.postgrest import PostgrestClient, PostgrestError
+from app.services.config_cache import ConfigCache
+from app.services.personas import persona_label
+from app.services.call_registry import CallInfo, CallRegistry
 
 logger = logging.getLogger(__name__)
 
-try:
-    # Initialize Supabase client with version 2.0.0
-    supabase_client: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-except Exception as e:
-    logger.error(f"Failed to initialize Supabase client: {str(e)}")
-    raise
+# Async PostgREST client with one pooled keep-alive connection pool shared by all requests
+db_client = PostgrestClient(
+    f"{SUPABASE_URL.rstrip('/')}/rest/v1",
+    SUPABASE_KEY,
+    max_connections=DB_MAX_CONNECTIONS,
+    timeout=DB_TIMEOUT_SECONDS
+)
+
+async def _load_call_info(call_sid: str) -> Optional[CallInfo]:
+    result = await db_client.table("voice_conversations")\
+        .select("id, simulation_id, phone_number, persona, instructions")\
+        .eq("call_sid", call_sid)\
+        .execute()
+    if not result.data:
+        return None
+    record = result.data[0]
+    # A record we didn't create may already have turns from another stream
+    return CallInfo(
+        record["id"],
+        call_sid,
+        record["simulation_id"],
+        record.get("phone_number"),
+        persona=record.get("persona"),
+        instructions=record.get("instructions"),
+        streamed=True
+    )
+
+# Call records by call SID, so webhooks and media streams don't look them up on every event
+call_registry = CallRegistry(_load_call_info)
+
+async def _load_test_configuration(key: Tuple[Optional[str], Optional[str]]) -> Optional[Dict]:
+    phone_number, test_id = key
+    query = db_client.table("test_configurations").select("*")
+    if test_id:
+        query = query.eq("id", test_id)
+    elif phone_number:
+        query = query.eq("phone_number", phone_number)
+    try:
+        result = await query.order("created_at", desc=True).limit(1).execute()
+    except PostgrestError as e:
+        if not phone_number or test_id:
+            raise
+        # Configurations aren't scoped by phone number in this database
+        logger.warning(f"Could not filter test configurations by phone number: {str(e)}")
+        result = None
+    if result and result.data:
+        return result.data[0]
+    if phone_number and not test_id:
+        # No configuration for this number: fall back to the latest one overall
+        return await test_configuration_cache.get((None, None))
+    return None
+
+# Test configurations by (phone_number, test_id); a burst of call starts shares one fetch
+test_configuration_cache = ConfigCache(_load_test_configuration, ttl_seconds=TEST_CONFIG_CACHE_TTL_SECONDS)
 
 async def init_db():
     """Initialize database connection."""
     try:
         # Test the connection
-        supabase_client.table("voice_conversations").select("count", count="exact").execute()
+        await db_client.table("voice_conversations").select("id", count="exact").limit(1).execute()
         logger.info("Database connection initialized successfully")
     except Exception as e:
         logger.error(f"Error initializing database connection: {str(e)}")
         raise
 
-async def create_call_record(simulation_id: str, call_sid: str, phone_number: str, user_id: str, status: str = "initiated") -> str:
-    """Create a new voice conversation record."""
+async def close_db():
+    """Close the pooled database connections."""
+    await db_client.close()
+
+async def create_call_record(
+    simulation_id: str,
+    call_sid: str,
+    phone_number: str,
+    user_id: str,
+    status: str = "initiated",
+    persona: Optional[Dict] = None,
+    instructions: Optional[str] = None
+) -> str:
+    """Create a new voice conversation record, optionally with its persona and pre-rendered instructions."""
     try:
         now = datetime.now(UTC).isoformat()
-        result = supabase_client.table("voice_conversations").insert({
+        record = {
             "id": str(uuid4()),
             "simulation_id": simulation_id,
             "call_sid": call_sid,
@@ -47,32 +110,78 @@ async def create_call_record(simulation_id: str, call_sid: str, phone_number: st
             "error_severity": None,
             "recovery_attempt": None,
             "recovery_success": None
-        }).execute()
+        }
+        if persona is not None:
+            record["persona"] = persona
+            record["persona_label"] = persona_label(persona)
+        if instructions is not None:
+            record["instructions"] = instructions
+        result = await db_client.table("voice_conversations").insert(record).execute()
         
-        return result.data[0]["id"]
+        record_id = result.data[0]["id"]
+        info = CallInfo(record_id, call_sid, simulation_id, phone_number, persona=persona, instructions=instructions)
+        if call_sid.startswith("pending"):
+            # Placeholder until the call is placed; see assign_call_sid
+            call_registry.register_pending(info)
+        else:
+            call_registry.register(info)
+        return record_id
     except Exception as e:
         logger.error(f"Error creating voice conversation record: {str(e)}")
         raise
 
+async def get_call_info(call_sid: str) -> Optional[CallInfo]:
+    """Resolve a call's record id, simulation and phone number, from the registry when possible."""
+    try:
+        return await call_registry.resolve(call_sid)
+    except Exception as e:
+        logger.error(f"Error looking up call {call_sid}: {str(e)}")
+        return None
+
+def _prepare_updates(updates: Dict) -> Dict:
+    # Ensure updated_at is set
+    updates["updated_at"] = datetime.now(UTC).isoformat()
+    
+    # Initialize empty lists/dicts for JSON fields if they're None
+    json_fields = ["transcript", "message_timestamps", "token_counts", 
+                  "response_times", "error_details", "conversation_metrics"]
+    for field in json_fields:
+        if field in updates and updates[field] is None:
+            updates[field] = [] if field != "token_counts" and field != "conversation_metrics" else {}
+    return updates
+
+async def update_call_record_by_id(record_id: str, updates: Dict) -> bool:
+    """Update a voice conversation record by primary key."""
+    try:
+        response = await db_client.table('voice_conversations')\
+            .update(_prepare_updates(updates))\
+            .eq('id', record_id)\
+            .execute()
+        return bool(response.data)
+    except Exception as e:
+        logger.error(f"Error updating voice conversation record {record_id}: {str(e)}")
+        return False
+
+async def assign_call_sid(record_id: str, call_sid: str, updates: Optional[Dict] = None) -> bool:
+    """Attach the SID Twilio assigned to a record created with a placeholder SID."""
+    call_registry.claim(record_id, call_sid)
+    return await update_call_record_by_id(record_id, {**(updates or {}), "call_sid": call_sid})
+
 async def update_call_record(
     simulation_id: str,
     call_sid: str,
     updates: Dict
 ) -> bool:
     """Update a voice conversation record."""
+    info = call_registry.get(call_sid)
+    if info is not None and info.simulation_id == simulation_id:
+        # Known call: update by primary key
+        return await update_call_record_by_id(info.id, updates)
     try:
-        # Ensure updated_at is set
-        updates["updated_at"] = datetime.now(UTC).isoformat()
-        
-        # Initialize empty lists/dicts for JSON fields if they're None
-        json_fields = ["transcript", "message_timestamps", "token_counts", 
-                      "response_times", "error_details", "conversation_metrics"]
-        for field in json_fields:
-            if field in updates and updates[field] is None:
-                updates[field] = [] if field != "token_counts" and field != "conversation_metrics" else {}
+        _prepare_updates(updates)
         
         # First try to find by call_sid
-        response = supabase_client.table('voice_conversations')\
+        response = await db_client.table('voice_conversations')\
             .update(updates)\
             .eq('simulation_id', simulation_id)\
             .eq('call_sid', call_sid)\
@@ -80,7 +189,7 @@ async def update_call_record(
             
         if not response.data:
             # If no record found by call_sid, try twilio_call_sid
-            response = supabase_client.table('voice_conversations')\
+            response = await db_client.table('voice_conversations')\
                 .update(updates)\
                 .eq('simulation_id', simulation_id)\
                 .eq('twilio_call_sid', call_sid)\
@@ -89,4 +198,468 @@ async def update_call_record(
         return bool(response.data)
     except Exception as e:
         logger.error(f"Error updating voice conversation record: {str(e)}")
-        return False 
\ No newline at end of file
+        return False
+
+async def append_conversation_turns(turns: List[Dict]) -> bool:
+    """
+    Insert conversation turns (conversation_id, call_sid, seq, role, content, spoken_at) in one request.
+
+    Turns already stored are skipped, so retrying an insert that committed but
+    timed out on our side succeeds instead of failing on UNIQUE(conversation_id, seq).
+    """
+    try:
+        await db_client.table("conversation_turns")\
+            .upsert(turns, on_conflict="conversation_id,seq", ignore_duplicates=True)\
+            .execute()
+        return True
+    except Exception as e:
+        logger.error(f"Error appending {len(turns)} conversation turns: {str(e)}")
+        return False
+
+async def get_call_statuses(call_sids: List[str]) -> Dict[str, Optional[str]]:
+    """Fetch the stored status of several calls in one query, keyed by call SID."""
+    if not call_sids:
+        return {}
+    try:
+        result = await db_client.table("voice_conversations")\
+            .select("call_sid, status")\
+            .in_("call_sid", call_sids)\
+            .execute()
+        return {record["call_sid"]: record["status"] for record in result.data}
+    except Exception as e:
+        logger.error(f"Error fetching call statuses: {str(e)}")
+        return {}
+
+async def get_conversation_turns(conversation_ids: List[str]) -> Dict[str, List[Dict]]:
+    """Fetch the turns of several conversations in one query, ordered by seq and keyed by conversation id."""
+    turns = {conversation_id: [] for conversation_id in conversation_ids}
+    if not conversation_ids:
+        return turns
+    try:
+        result = await db_client.table("conversation_turns")\
+            .select("conversation_id, seq, role, content, spoken_at")\
+            .in_("conversation_id", conversation_ids)\
+            .order("seq")\
+            .execute()
+        for turn in result.data:
+            turns[turn["conversation_id"]].append(turn)
+    except Exception as e:
+        logger.error(f"Error fetching conversation turns: {str(e)}")
+    return turns
+
+def rebuild_transcript(turns: List[Dict]) -> Tuple[List[str], List[Dict]]:
+    """Rebuild the legacy `transcript` and `message_timestamps` shapes from conversation turns."""
+    transcript = []
+    message_timestamps = []
+    for turn in turns:
+        message = f"{turn['role'].capitalize()}: {turn['content']}"
+        transcript.append(message)
+        message_timestamps.append({
+            "message": message,
+            "timestamp": turn["spoken_at"],
+            "type": turn["role"]
+        })
+    return transcript, message_timestamps
+
+async def with_turn_transcripts(records: List[Dict]) -> List[Dict]:
+    """
+    Fill `transcript` and `message_timestamps` of voice conversation records from
+    their conversation turns. Records without turns (calls made before turns were
+    stored separately) keep their stored transcript.
+    """
+    turns = await get_conversation_turns([record["id"] for record in records if record.get("id")])
+    for record in records:
+        if turns.get(record.get("id")):
+            record["transcript"], record["message_timestamps"] = rebuild_transcript(turns[record["id"]])
+    return records
+
+async def get_test_configuration(phone_number: Optional[str], test_id: Optional[str] = None) -> Optional[Dict]:
+    """Get the latest test configuration for a test or phone number, served from the configuration cache."""
+    try:
+        return await test_configuration_cache.get((phone_number, test_id))
+    except Exception as e:
+        logger.error(f"Error fetching test configuration: {str(e)}")
+        return None
+
+def invalidate_test_configurations(phone_number: Optional[str] = None, test_id: Optional[str] = None) -> int:
+    """
+    Drop cached test configurations after a configuration is written.
+
+    Without arguments everything is dropped. Otherwise the entries for
+    `test_id` and all phone number entries are dropped: any phone number
+    without its own configuration falls back to the latest one overall,
+    which the new configuration may have replaced.
+    """
+    if phone_number is None and test_id is None:
+        return test_configuration_cache.invalidate()
+    return test_configuration_cache.invalidate(lambda key: key[1] is None or key[1] == test_id)
+
+# Slots inserted per request when a simulation is created
+SLOT_INSERT_CHUNK = 500
+
+async def create_simulation(
+    user_id: str,
+    target_phone: str,
+    concurrent_calls: int,
+    scenario: Dict,
+    total_calls: Optional[int] = None,
+    seed: Optional[int] = None,
+    slots: Optional[List[Dict]] = None,
+    owner: Optional[str] = None,
+    lease_expires_at: Optional[str] = None
+) -> str:
+    """
+    Create a simulation and its call slots (one row per call to place) in
+    `initiated` status, leased to `owner` until `lease_expires_at`.
+    """
+    try:
+        now = datetime.now(UTC).isoformat()
+        simulation_id = str(uuid4())
+        slots = slots or []
+        await db_client.table("simulations").insert({
+            "id": simulation_id,
+            "user_id": user_id,
+            "target_phone": target_phone,
+            "concurrent_calls": concurrent_calls,
+            "scenario": scenario,
+            "status": "initiated",
+            "total_calls": total_calls if total_calls is not None else len(slots),
+            "seed": seed,
+            "queued_calls": len(slots),
+            "owner": owner,
+            # Without an owner the lease has already expired, so any process may run it
+            "lease_expires_at": lease_expires_at or now,
+            "created_at": now,
+            "updated_at": now
+        }).execute()
+        
+        rows = [{"simulation_id": simulation_id, "status": "queued", "updated_at": now, **slot} for slot in slots]
+        for start in range(0, len(rows), SLOT_INSERT_CHUNK):
+            await db_client.table("simulation_call_slots").insert(rows[start:start + SLOT_INSERT_CHUNK]).execute()
+        return simulation_id
+    except Exception as e:
+        logger.error(f"Error creating simulation: {str(e)}")
+        raise
+
+async def update_simulation(simulation_id: str, updates: Dict) -> bool:
+    """Update a simulation by id."""
+    try:
+        updates["updated_at"] = datetime.now(UTC).isoformat()
+        response = await db_client.table("simulations")\
+            .update(updates)\
+            .eq("id", simulation_id)\
+            .execute()
+        return bool(response.data)
+    except Exception as e:
+        logger.error(f"Error updating simulation {simulation_id}: {str(e)}")
+        return False
+
+async def update_simulation_status(simulation_id: str, status: str, error: Optional[str] = None, updates: Optional[Dict] = None) -> bool:
+    """Set a simulation's status; finished simulations also get their end time."""
+    updates = {**(updates or {}), "status": status}
+    if error is not None:
+        updates["error"] = error
+    if status == "running":
+        updates.setdefault("start_time", datetime.now(UTC).isoformat())
+    elif status in ("completed", "failed", "stopped"):
+        updates["end_time"] = datetime.now(UTC).isoformat()
+    return await update_simulation(simulation_id, updates)
+
+async def get_simulation(simulation_id: str) -> Optional[Dict]:
+    try:
+        result = await db_client.table("simulations").select("*").eq("id", simulation_id).execute()
+        return result.data[0] if result.data else None
+    except Exception as e:
+        logger.error(f"Error fetching simulation {simulation_id}: {str(e)}")
+        return None
+
+async def get_simulation_status(simulation_id: str) -> Optional[Dict]:
+    """A simulation's status and progress counters."""
+    simulation = await get_simulation(simulation_id)
+    if not simulation:
+        return None
+    return {
+        "id": simulation["id"],
+        "status": simulation["status"],
+        "total_calls": simulation.get("total_calls") or 0,
+        "queued_calls": simulation.get("queued_calls") or 0,
+        "active_calls": simulation.get("active_calls") or 0,
+        "completed_calls": simulation.get("completed_calls") or 0,
+        "failed_calls": simulation.get("failed_calls") or 0,
+        "stopped_calls": simulation.get("stopped_calls") or 0,
+        "start_time": simulation.get("start_time") or simulation.get("created_at"),
+        "end_time": simulation.get("end_time"),
+        "error": simulation.get("error")
+    }
+
+async def get_active_simulations() -> List[Dict]:
+    """Simulations that are initiated or running but not leased, e.g. because their process stopped."""
+    try:
+        result = await db_client.table("simulations")\
+            .select("*")\
+            .in_("status", ["initiated", "running"])\
+            .lt("lease_expires_at", datetime.now(UTC).isoformat())\
+            .order("created_at")\
+            .execute()
+        return result.data
+    except Exception as e:
+        logger.error(f"Error fetching active simulations: {str(e)}")
+        return []
+
+async def claim_simulation(simulation_id: str, owner: str, lease_expires_at: str) -> Optional[Dict]:
+    """
+    Lease an active simulation whose lease has expired to `owner`. Returns the
+    simulation, or None if another process holds it or it has finished.
+    """
+    try:
+        response = await db_client.table("simulations")\
+            .update({"owner": owner, "lease_expires_at": lease_expires_at})\
+            .eq("id", simulation_id)\
+            .in_("status", ["initiated", "running"])\
+            .lt("lease_expires_at", datetime.now(UTC).isoformat())\
+            .execute()
+        return response.data[0] if response.data else None
+    except Exception as e:
+        logger.error(f"Error claiming simulation {simulation_id}: {str(e)}")
+        return None
+
+async def renew_simulation_leases(simulation_ids: List[str], owner: str, lease_expires_at: str) -> Optional[Dict[str, str]]:
+    """
+    Extend the leases `owner` still holds. Returns the status of each renewed
+    simulation by id, or None if the renewal failed.
+    """
+    try:
+        response = await db_client.table("simulations")\
+            .update({"lease_expires_at": lease_expires_at})\
+            .in_("id", simulation_ids)\
+            .eq("owner", owner)\
+            .execute()
+        return {simulation["id"]: simulation["status"] for simulation in response.data}
+    except Exception as e:
+        logger.error(f"Error renewing simulation leases: {str(e)}")
+        return None
+
+async def release_simulation_leases(simulation_ids: List[str], owner: str) -> bool:
+    """Let the leases `owner` holds expire now, so another process can resume the simulations at once."""
+    try:
+        await db_client.table("simulations")\
+            .update({"lease_expires_at": datetime.now(UTC).isoformat()})\
+            .in_("id", simulation_ids)\
+            .eq("owner", owner)\
+            .execute()
+        return True
+    except Exception as e:
+        logger.error(f"Error releasing simulation leases: {str(e)}")
+        return False
+
+async def get_simulation_slots(simulation_id: str) -> List[Dict]:
+    result = await db_client.table("simulation_call_slots")\
+        .select("*")\
+        .eq("simulation_id", simulation_id)\
+        .order("slot")\
+        .execute()
+    return result.data
+
+async def update_simulation_slot(slot_id: str, updates: Dict) -> bool:
+    try:
+        updates["updated_at"] = datetime.now(UTC).isoformat()
+        response = await db_client.table("simulation_call_slots")\
+            .update(updates)\
+            .eq("id", slot_id)\
+            .execute()
+        return bool(response.data)
+    except Exception as e:
+        logger.error(f"Error updating simulation slot {slot_id}: {str(e)}")
+        return False
+
+async def get_simulation_slot(slot_id: str) -> Optional[Dict]:
+    try:
+        result = await db_client.table("simulation_call_slots").select("*").eq("id", slot_id).execute()
+        return result.data[0] if result.data else None
+    except Exception as e:
+        logger.error(f"Error fetching simulation slot {slot_id}: {str(e)}")
+        return None
+
+async def claim_simulation_slot(slot_id: str, updates: Dict) -> bool:
+    """
+    Move a slot out of `queued` with `updates`, only if it is still queued.
+    Returns False if it was stopped or claimed by another process meanwhile.
+    """
+    try:
+        updates["updated_at"] = datetime.now(UTC).isoformat()
+        response = await db_client.table("simulation_call_slots")\
+            .update(updates)\
+            .eq("id", slot_id)\
+            .eq("status", "queued")\
+            .execute()
+        return bool(response.data)
+    except Exception as e:
+        logger.error(f"Error claiming simulation slot {slot_id}: {str(e)}")
+        return False
+
+async def stop_queued_slots(simulation_id: str) -> int:
+    """Mark every slot of a simulation that hasn't been dialed yet as stopped. Returns the number stopped."""
+    try:
+        response = await db_client.table("simulation_call_slots")\
+            .update({"status": "stopped", "updated_at": datetime.now(UTC).isoformat()})\
+            .eq("simulation_id", simulation_id)\
+            .eq("status", "queued")\
+            .execute()
+        return len(response.data)
+    except Exception as e:
+        logger.error(f"Error stopping queued slots of simulation {simulation_id}: {str(e)}")
+        return 0
+
+async def get_simulation_results(simulation_id: str) -> Optional[Dict]:
+    """Per-simulation totals plus the transcript of every call, keyed by call SID."""
+    simulation = await get_simulation(simulation_id)
+    if not simulation:
+        return None
+    try:
+        result = await db_client.table("voice_conversations")\
+            .select("id, call_sid, status, duration, persona_label, transcript")\
+            .eq("simulation_id", simulation_id)\
+            .execute()
+        records = await with_turn_transcripts(result.data)
+    except Exception as e:
+        logger.error(f"Error fetching results of simulation {simulation_id}: {str(e)}")
+        return None
+    
+    successful = [record for record in records if record["status"] == "completed"]
+    durations = [record["duration"] for record in successful if record.get("duration") is not None]
+    total_calls = simulation.get("total_calls") or len(records)
+    return {
+        "simulation_id": simulation_id,
+        "total_calls": total_calls,
+        "successful_calls": len(successful),
+        "failed_calls": simulation.get("failed_calls") or len(records) - len(successful),
+        "average_duration": sum(durations) / len(durations) if durations else 0.0,
+        "transcripts": {record["call_sid"]: record.get("transcript") or [] for record in records},
+        "metrics": {
+            "success_rate": round(len(successful) / total_calls, 3) if total_calls else 0.0,
+            "stopped_calls": float(simulation.get("stopped_calls") or 0)
+        }
+    }
+
+async def update_call_transcript(simulation_id: str, call_sid: str, transcript: List[str]) -> bool:
+    """Replace the stored transcript of a call."""
+    return await update_call_record(simulation_id, call_sid, {"transcript": transcript})
+
+async def create_analysis_job(
+    conversation_id: str,
+    call_sid: Optional[str],
+    message_timestamps: List[Dict],
+    response_times: Optional[List[Dict]] = None
+) -> Dict:
+    """Persist a queued conversation analysis job and return its row."""
+    try:
+        now = datetime.now(UTC).isoformat()
+        job = {
+            "id": str(uuid4()),
+            "conversation_id": str(conversation_id),
+            "call_sid": call_sid,
+            "message_timestamps": message_timestamps,
+            "response_times": response_times or [],
+            "status": "queued",
+            "attempts": 0,
+            "created_at": now,
+            "updated_at": now
+        }
+        await db_client.table("analysis_jobs").insert(job).execute()
+        return job
+    except Exception as e:
+        logger.error(f"Error creating analysis job for conversation {conversation_id}: {str(e)}")
+        raise
+
+async def get_pending_analysis_jobs() -> List[Dict]:
+    """
+    Analysis jobs waiting to run, oldest first, e.g. when the process last
+    stopped. Running jobs whose lease has expired are queued again first;
+    those still leased belong to a live process.
+    """
+    try:
+        now = datetime.now(UTC).isoformat()
+        await db_client.table("analysis_jobs")\
+            .update({"status": "queued", "owner": None, "updated_at": now})\
+            .eq("status", "running")\
+            .lt("lease_expires_at", now)\
+            .execute()
+        result = await db_client.table("analysis_jobs")\
+            .select("*")\
+            .eq("status", "queued")\
+            .order("created_at")\
+            .execute()
+        return result.data
+    except Exception as e:
+        logger.error(f"Error fetching pending analysis jobs: {str(e)}")
+        return []
+
+async def claim_analysis_jobs(job_ids: List[str], updates: Dict) -> List[str]:
+    """
+    Apply `updates` (status running, owner and lease) to the jobs that are
+    still queued, in one request. Returns the ids of the jobs claimed.
+    """
+    try:
+        updates["updated_at"] = datetime.now(UTC).isoformat()
+        response = await db_client.table("analysis_jobs")\
+            .update(updates)\
+            .in_("id", job_ids)\
+            .eq("status", "queued")\
+            .execute()
+        return [job["id"] for job in response.data]
+    except Exception as e:
+        logger.error(f"Error claiming analysis jobs {job_ids}: {str(e)}")
+        raise
+
+async def update_analysis_jobs(job_ids: List[str], updates: Dict) -> bool:
+    """Apply the same update to several analysis jobs in one request."""
+    try:
+        updates["updated_at"] = datetime.now(UTC).isoformat()
+        response = await db_client.table("analysis_jobs")\
+            .update(updates)\
+            .in_("id", job_ids)\
+            .execute()
+        return bool(response.data)
+    except Exception as e:
+        logger.error(f"Error updating analysis jobs {job_ids}: {str(e)}")
+        return False
+
+async def get_cached_analyses(cache_keys: List[str]) -> Dict[str, Dict]:
+    """Stored conversation analyses by cache key; keys without a stored analysis are left out."""
+    try:
+        result = await db_client.table("analysis_cache")\
+            .select("cache_key, analysis")\
+            .in_("cache_key", cache_keys)\
+            .execute()
+        return {row["cache_key"]: row["analysis"] for row in result.data}
+    except Exception as e:
+        logger.error(f"Error fetching cached analyses: {str(e)}")
+        return {}
+
+async def store_cached_analyses(entries: List[Dict]) -> bool:
+    """Store conversation analyses by cache key in one request, replacing existing entries."""
+    try:
+        now = datetime.now(UTC).isoformat()
+        rows = [{**entry, "created_at": now} for entry in entries]
+        response = await db_client.table("analysis_cache")\
+            .upsert(rows, on_conflict="cache_key")\
+            .execute()
+        return bool(response.data)
+    except Exception as e:
+        logger.error(f"Error storing cached analyses: {str(e)}")
+        return False
+
+async def delete_cached_analyses(prompt_version: Optional[str] = None) -> int:
+    """Delete the stored analyses of a prompt version, or all of them if None. Returns the number deleted."""
+    try:
+        query = db_client.table("analysis_cache").delete()
+        if prompt_version is None:
+            # PostgREST refuses an unfiltered delete
+            query = query.neq("cache_key", "")
+        else:
+            query = query.eq("prompt_version", prompt_version)
+        response = await query.execute()
+        return len(response.data)
+    except Exception as e:
+        logger.error(f"Error deleting cached analyses: {str(e)}")
+        return 0
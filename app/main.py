@@ -19,14 +19,38 @@ app.add_middleware(
 
 # Import router after FastAPI initialization
 from app.voice_router import router as voice_router
+from app.routers.test_simulations import router as test_simulations_router
 
 # Include router
 app.include_router(voice_router, tags=["Voice"])
+app.include_router(test_simulations_router, prefix="/simulations", tags=["Simulations"])
 
 @app.on_event("startup")
 async def startup_event():
     from app.database import init_db
+    from app.config import REALTIME_POOL_CALLS_PER_SECOND
+    from app.voice_router import realtime_pool, completion_notifier, simulation_engine, analysis_queue
     await init_db()
+    await completion_notifier.start()
+    await simulation_engine.start()
+    await analysis_queue.start()
+    if REALTIME_POOL_CALLS_PER_SECOND > 0:
+        await realtime_pool.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    from app.database import close_db
+    from app.voice_router import realtime_pool, dial_dispatcher, completion_notifier, simulation_engine, analysis_queue
+    await simulation_engine.close()
+    await dial_dispatcher.close()
+    await completion_notifier.close()
+    await analysis_queue.close()
+    from app.services.twilio_service import close_twilio
+    from app.services.analysis_service import close_openai_client
+    await realtime_pool.close()
+    await close_twilio()
+    await close_openai_client()
+    await close_db()
 
 @app.get("/")
 async def root():
@@ -5,6 +5,8 @@ from pydantic import BaseModel, Field
 class SimulationCreate(BaseModel):
     target_phone: str
     concurrent_calls: int = Field(gt=0, le=100)  # Limit max concurrent calls
+    total_calls: Optional[int] = Field(None, gt=0)  # Defaults to concurrent_calls
+    seed: Optional[int] = None  # Persona assignment seed; random if omitted
     scenario: Dict = Field(...)
     
     class Config:
@@ -12,6 +14,7 @@ class SimulationCreate(BaseModel):
             "example": {
                 "target_phone": "+1234567890",
                 "concurrent_calls": 5,
+                "total_calls": 100,
                 "scenario": {
                     "voice": "sage",
                     "system_message": "You are a customer calling to place an order.",
@@ -33,9 +36,12 @@ class SimulationResponse(BaseModel):
 class SimulationStatus(BaseModel):
     id: str
     status: str
+    total_calls: int = 0
+    queued_calls: int = 0
     active_calls: int
     completed_calls: int
     failed_calls: int
+    stopped_calls: int = 0
     start_time: datetime
     end_time: Optional[datetime] = None
     error: Optional[str] = None
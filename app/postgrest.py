@@ -0,0 +1,247 @@
+import json
+import logging
+import time
+from typing import Any, Dict, List, Optional, Union
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+class PostgrestError(Exception):
+    """Error response from PostgREST."""
+
+    def __init__(self, message: str, status_code: int, details: Optional[Dict] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.details = details or {}
+
+
+class APIResponse:
+    """Result of an executed query, shaped like the Supabase client's response."""
+
+    def __init__(self, data: List[Dict], count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+
+def _format_value(value: Any) -> str:
+    if value is True:
+        return "true"
+    if value is False:
+        return "false"
+    if value is None:
+        return "null"
+    return str(value)
+
+
+def _quote(value: Any) -> str:
+    # Values inside in.(...) lists are quoted so commas and parentheses survive
+    text = _format_value(value)
+    return '"' + text.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+class QueryBuilder:
+    """
+    Fluent query against one PostgREST table.
+
+    Mirrors the subset of the Supabase query builder this app uses:
+    `select`/`insert`/`update`/`upsert`/`delete`, filters, `order`, `limit`,
+    and an awaitable `execute`.
+    """
+
+    def __init__(self, client: "PostgrestClient", table: str):
+        self._client = client
+        self._table = table
+        self._method = "GET"
+        self._params: List = []
+        self._headers: Dict[str, str] = {}
+        self._body = None
+
+    def select(self, columns: str = "*", count: Optional[str] = None) -> "QueryBuilder":
+        self._method = "GET"
+        self._params.append(("select", "".join(columns.split())))
+        if count:
+            self._prefer(f"count={count}")
+        return self
+
+    def insert(self, rows: Union[Dict, List[Dict]]) -> "QueryBuilder":
+        self._method = "POST"
+        self._body = rows
+        self._prefer("return=representation")
+        return self
+
+    def upsert(self, rows: Union[Dict, List[Dict]], on_conflict: Optional[str] = None, ignore_duplicates: bool = False) -> "QueryBuilder":
+        """Insert rows, updating (or with `ignore_duplicates`, skipping) those that conflict on `on_conflict`."""
+        self.insert(rows)
+        self._prefer("resolution=ignore-duplicates" if ignore_duplicates else "resolution=merge-duplicates")
+        if on_conflict:
+            self._params.append(("on_conflict", on_conflict))
+        return self
+
+    def update(self, values: Dict) -> "QueryBuilder":
+        self._method = "PATCH"
+        self._body = values
+        self._prefer("return=representation")
+        return self
+
+    def delete(self) -> "QueryBuilder":
+        self._method = "DELETE"
+        self._prefer("return=representation")
+        return self
+
+    def eq(self, column: str, value: Any) -> "QueryBuilder":
+        return self._filter(column, "eq", _format_value(value))
+
+    def neq(self, column: str, value: Any) -> "QueryBuilder":
+        return self._filter(column, "neq", _format_value(value))
+
+    def gt(self, column: str, value: Any) -> "QueryBuilder":
+        return self._filter(column, "gt", _format_value(value))
+
+    def gte(self, column: str, value: Any) -> "QueryBuilder":
+        return self._filter(column, "gte", _format_value(value))
+
+    def lt(self, column: str, value: Any) -> "QueryBuilder":
+        return self._filter(column, "lt", _format_value(value))
+
+    def lte(self, column: str, value: Any) -> "QueryBuilder":
+        return self._filter(column, "lte", _format_value(value))
+
+    def is_(self, column: str, value: Any) -> "QueryBuilder":
+        return self._filter(column, "is", _format_value(value))
+
+    def in_(self, column: str, values: List) -> "QueryBuilder":
+        return self._filter(column, "in", "(" + ",".join(_quote(v) for v in values) + ")")
+
+    def order(self, column: str, desc: bool = False) -> "QueryBuilder":
+        self._params.append(("order", f"{column}.{'desc' if desc else 'asc'}"))
+        return self
+
+    def limit(self, count: int) -> "QueryBuilder":
+        self._params.append(("limit", str(count)))
+        return self
+
+    async def execute(self) -> APIResponse:
+        return await self._client.request(self._method, self._table, self._params, self._headers, self._body)
+
+    def _filter(self, column: str, operator: str, value: str) -> "QueryBuilder":
+        self._params.append((column, f"{operator}.{value}"))
+        return self
+
+    def _prefer(self, preference: str) -> None:
+        existing = self._headers.get("Prefer")
+        self._headers["Prefer"] = f"{existing},{preference}" if existing else preference
+
+
+class PostgrestClient:
+    """
+    Async PostgREST client sharing one pooled keep-alive HTTP connection pool.
+
+    Requests never block the event loop; at most `max_connections` run at once
+    and the rest wait for a pooled connection, bounded by `timeout`. The HTTP
+    client is created on first use and closed by `close`.
+    """
+
+    def __init__(
+        self,
+        rest_url: str,
+        api_key: str,
+        max_connections: int = 20,
+        timeout: float = 10.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.rest_url = rest_url.rstrip("/")
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self._headers = {
+            "apikey": api_key,
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+            "Accept": "application/json"
+        }
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._total_ms = 0.0
+        self.max_ms = 0.0
+
+    def table(self, name: str) -> QueryBuilder:
+        return QueryBuilder(self, name)
+
+    async def request(self, method: str, table: str, params: List, headers: Dict, body: Any = None) -> APIResponse:
+        client = self._get_client()
+        started = time.monotonic()
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            response = await client.request(
+                method,
+                f"/{table}",
+                params=params,
+                headers=headers,
+                content=json.dumps(body) if body is not None else None
+            )
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            elapsed_ms = (time.monotonic() - started) * 1000
+            self.requests += 1
+            self._total_ms += elapsed_ms
+            self.max_ms = max(self.max_ms, elapsed_ms)
+
+        if response.status_code >= 400:
+            self.errors += 1
+            try:
+                details = response.json()
+            except ValueError:
+                details = {"message": response.text}
+            raise PostgrestError(details.get("message") or f"HTTP {response.status_code}", response.status_code, details)
+
+        data = response.json() if response.content else []
+        if isinstance(data, dict):
+            data = [data]
+        return APIResponse(data, self._parse_count(response.headers.get("content-range")))
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def stats(self) -> Dict:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "max_connections": self.max_connections,
+            "avg_ms": round(self._total_ms / self.requests, 2) if self.requests else None,
+            "max_ms": round(self.max_ms, 2)
+        }
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.rest_url,
+                headers=self._headers,
+                timeout=httpx.Timeout(self.timeout),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections
+                ),
+                transport=self._transport
+            )
+        return self._client
+
+    @staticmethod
+    def _parse_count(content_range: Optional[str]) -> Optional[int]:
+        # Content-Range looks like "0-9/42", or "*/42" for an empty page
+        if not content_range or "/" not in content_range:
+            return None
+        total = content_range.rsplit("/", 1)[1]
+        return int(total) if total.isdigit() else None
@@ -3,47 +3,39 @@ from datetime import datetime
 import asyncio
 import logging
 
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 
 # Import local modules
-from app.services.twilio_service import TwilioService
-from app.services.test_runner import TestRunner
 from app.models.simulation import SimulationCreate, SimulationResponse, SimulationStatus
-from app.database import get_db
+from app.database import get_simulation_status as load_simulation_status, get_simulation_results as load_simulation_results
+from app.voice_router import simulation_engine, plan_personas, call_limit_error
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
 @router.post("/create", response_model=SimulationResponse)
-async def create_simulation(
-    simulation: SimulationCreate,
-    background_tasks: BackgroundTasks
-):
+async def create_simulation(simulation: SimulationCreate):
     """
     Create a new test simulation with specified parameters.
     """
+    total_calls = simulation.total_calls or simulation.concurrent_calls
+    limit_error = call_limit_error(total_calls, simulation.concurrent_calls)
+    if limit_error:
+        raise HTTPException(status_code=400, detail=limit_error)
     try:
-        db = await get_db()
-        # Create simulation record in database
-        simulation_id = await db.create_simulation(
-            user_id="default",  # Using a default user ID since we removed auth
+        # Expand the persona matrix once; the engine stores it with each call slot
+        seed, personas = await plan_personas(simulation.target_phone, total_calls, simulation.seed)
+        simulation_id = await simulation_engine.create(
             target_phone=simulation.target_phone,
             concurrent_calls=simulation.concurrent_calls,
-            scenario=simulation.scenario
+            total_calls=total_calls,
+            scenario=simulation.scenario,
+            personas=personas,
+            seed=seed,
+            user_id="default"  # Using a default user ID since we removed auth
         )
         
-        # Initialize test runner
-        test_runner = TestRunner(
-            simulation_id=simulation_id,
-            target_phone=simulation.target_phone,
-            concurrent_calls=simulation.concurrent_calls,
-            scenario=simulation.scenario
-        )
-        
-        # Start simulation in background
-        background_tasks.add_task(test_runner.run_simulation)
-        
         return SimulationResponse(
             id=simulation_id,
             status="initiated",
@@ -60,14 +52,15 @@ async def get_simulation_status(simulation_id: str):
     Get the current status of a test simulation.
     """
     try:
-        db = await get_db()
-        status = await db.get_simulation_status(simulation_id)
-        if not status:
-            raise HTTPException(status_code=404, detail="Simulation not found")
-        return status
+        status = await load_simulation_status(simulation_id)
     except Exception as e:
         logger.error(f"Error getting simulation status: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+    if not status:
+        raise HTTPException(status_code=404, detail="Simulation not found")
+    # Counters of a simulation running here are newer than the written-behind row
+    status.update(simulation_engine.progress(simulation_id) or {})
+    return status
 
 @router.post("/stop/{simulation_id}")
 async def stop_simulation(simulation_id: str):
@@ -75,12 +68,13 @@ async def stop_simulation(simulation_id: str):
     Stop an ongoing test simulation.
     """
     try:
-        db = await get_db()
-        await db.update_simulation_status(simulation_id, "stopped")
-        return {"message": "Simulation stopped successfully"}
+        found = await simulation_engine.stop(simulation_id)
     except Exception as e:
         logger.error(f"Error stopping simulation: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+    if not found:
+        raise HTTPException(status_code=404, detail="Simulation not found")
+    return {"message": "Simulation stopped successfully"}
 
 @router.get("/results/{simulation_id}")
 async def get_simulation_results(simulation_id: str):
@@ -88,11 +82,10 @@ async def get_simulation_results(simulation_id: str):
     Get detailed results of a completed test simulation.
     """
     try:
-        db = await get_db()
-        results = await db.get_simulation_results(simulation_id)
-        if not results:
-            raise HTTPException(status_code=404, detail="Simulation results not found")
-        return results
+        results = await load_simulation_results(simulation_id)
     except Exception as e:
         logger.error(f"Error getting simulation results: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+    if not results:
+        raise HTTPException(status_code=404, detail="Simulation results not found")
+    return results
@@ -2,7 +2,7 @@ from fastapi import APIRouter, Request, WebSocket, Form
 from fastapi.responses import HTMLResponse, JSONResponse
 from twilio.twiml.voice_response import VoiceResponse, Connect, Start
 from app.websocket_handler import handle_media_stream
-from app.database import create_call_record, update_call_record, update_call_transcript, supabase_client
+from app.database import create_call_record, update_call_record, update_call_transcript, db_client
 from typing import Optional
 import asyncio
 import logging
@@ -126,7 +126,7 @@ async def transcription_complete(
 @router.get("/transcript", response_class=JSONResponse)
 async def get_transcript():
     try:
-        result = supabase_client.table('call_records').select('transcription').order('created_at', desc=True).limit(1).execute()
+        result = await db_client.table('call_records').select('transcription').order('created_at', desc=True).limit(1).execute()
         return {"transcript": result.data[0]["transcription"] if result.data else ""}
     except Exception as e:
         logger.error(f"Error getting latest transcript: {str(e)}")
@@ -140,7 +140,7 @@ async def websocket_endpoint(websocket: WebSocket):
 async def test_db():
     try:
         # Try to query the table
-        result = supabase_client.table('call_records').select('*').limit(1).execute()
+        result = await db_client.table('call_records').select('*').limit(1).execute()
         return {"status": "success", "data": result.data}
     except Exception as e:
         return {
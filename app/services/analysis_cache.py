@@ -0,0 +1,128 @@
+import copy
+import hashlib
+import re
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_transcript(conversation_text: str) -> str:
+    """
+    Transcript text reduced to what an analysis depends on: lowercase words
+    separated by single spaces, one line per message, without punctuation.
+    Transcripts that differ only in case, spacing or punctuation, as repeated
+    IVR prompts and scripted callers do, normalize to the same text.
+    """
+    lines = []
+    for line in conversation_text.lower().splitlines():
+        line = _WHITESPACE.sub(" ", _PUNCTUATION.sub(" ", line)).strip()
+        if line:
+            lines.append(line)
+    return "\n".join(lines)
+
+
+def analysis_cache_key(conversation_text: str, prompt_version: str) -> str:
+    """Hash of the normalized transcript and the prompt version it was analyzed with."""
+    return hashlib.sha256(f"{prompt_version}\n{normalize_transcript(conversation_text)}".encode()).hexdigest()
+
+
+class AnalysisCache:
+    """
+    Conversation analyses by transcript, so duplicate conversations skip GPT-4.
+
+    Entries are keyed by `analysis_cache_key` under `prompt_version`, so a
+    prompt change starts from an empty cache. The most recently used
+    `max_entries` analyses are kept in memory; on a miss `load(keys)` looks
+    the rest up in the persistent store and `store(entries)` writes new
+    results there. `invalidate` drops a prompt version's entries in memory
+    and through `delete(prompt_version)` (every version if None). Lookups
+    return copies, so callers may add per-call metrics to them.
+    """
+
+    def __init__(
+        self,
+        load: Callable[[List[str]], Awaitable[Dict[str, Dict]]],
+        store: Callable[[List[Dict]], Awaitable[bool]],
+        delete: Callable[[Optional[str]], Awaitable[int]],
+        prompt_version: str,
+        max_entries: int = 1000
+    ):
+        self._load = load
+        self._store = store
+        self._delete = delete
+        self.prompt_version = prompt_version
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[str, Dict]]" = OrderedDict()
+        self.memory_hits = 0
+        self.stored_hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.invalidations = 0
+
+    def key(self, conversation_text: str) -> str:
+        return analysis_cache_key(conversation_text, self.prompt_version)
+
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, Dict]:
+        """Cached analyses of the given keys; keys without one are left out."""
+        found = {}
+        missing = []
+        for key in dict.fromkeys(keys):
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                found[key] = copy.deepcopy(entry[1])
+                self.memory_hits += 1
+            else:
+                missing.append(key)
+        if missing:
+            stored = await self._load(missing)
+            for key in missing:
+                if key in stored:
+                    self._remember(key, stored[key])
+                    found[key] = copy.deepcopy(stored[key])
+                    self.stored_hits += 1
+                else:
+                    self.misses += 1
+        return found
+
+    async def put_many(self, analyses: Dict[str, Dict]) -> None:
+        """Cache new analyses by key, in memory and in the persistent store."""
+        if not analyses:
+            return
+        for key, analysis in analyses.items():
+            self._remember(key, copy.deepcopy(analysis))
+        if await self._store([
+            {"cache_key": key, "prompt_version": self.prompt_version, "analysis": analysis}
+            for key, analysis in analyses.items()
+        ]):
+            self.writes += len(analyses)
+
+    async def invalidate(self, prompt_version: Optional[str] = None) -> Dict:
+        """Drop the entries of `prompt_version`, or of every version if None. Returns the numbers dropped."""
+        self.invalidations += 1
+        keys = [key for key, (version, _) in self._entries.items() if prompt_version is None or version == prompt_version]
+        for key in keys:
+            del self._entries[key]
+        return {"memory": len(keys), "stored": await self._delete(prompt_version)}
+
+    def stats(self) -> Dict:
+        lookups = self.memory_hits + self.stored_hits + self.misses
+        return {
+            "prompt_version": self.prompt_version,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "memory_hits": self.memory_hits,
+            "stored_hits": self.stored_hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "invalidations": self.invalidations,
+            "hit_rate": round((self.memory_hits + self.stored_hits) / lookups, 3) if lookups else None
+        }
+
+    def _remember(self, key: str, analysis: Dict) -> None:
+        self._entries[key] = (self.prompt_version, analysis)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
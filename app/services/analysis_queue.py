@@ -0,0 +1,275 @@
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from datetime import datetime, timedelta, UTC
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyWindow:
+    """Recent durations of one kind, summarized as average, p95 and max milliseconds."""
+
+    def __init__(self, size: int = 500):
+        self._values_ms = deque(maxlen=size)
+
+    def add(self, seconds: float) -> None:
+        self._values_ms.append(seconds * 1000)
+
+    def to_dict(self) -> Dict:
+        values = sorted(self._values_ms)
+        return {
+            "avg_ms": round(sum(values) / len(values), 2) if values else None,
+            "p95_ms": round(values[min(len(values) - 1, int(len(values) * 0.95))], 2) if values else None,
+            "max_ms": round(values[-1], 2) if values else None
+        }
+
+
+def conversation_chars(job: Dict) -> int:
+    """Length of a job's conversation text, for packing batches."""
+    return sum(len(message.get("message") or "") for message in job.get("message_timestamps") or [])
+
+
+class AnalysisQueue:
+    """
+    Runs conversation analyses in a background worker pool.
+
+    `submit` stores a job through `create_job` and queues it, and
+    `concurrency` workers take jobs in order and run `analyze(jobs)` on
+    batches of up to `batch_size` jobs, as long as their conversations fit in
+    `batch_max_chars`. `analyze` returns the jobs that failed, keyed by id,
+    and only those are retried; if it raises, the whole batch failed.
+
+    Before a batch runs, `claim_jobs(job_ids, updates)` moves its jobs from
+    queued to running, leased to `owner` for `lease_seconds`, and returns
+    the ids it moved; jobs another process claimed first are dropped. Every
+    other state change is written through `update_jobs(job_ids, updates)`.
+    `start` queues the jobs `load_pending` returns, so analyses that were
+    queued, or running under a lease that has since expired, run after a
+    restart.
+
+    Failures that `is_retryable` accepts are retried up to `max_retries`
+    times after the longer of `retry_after(error)` (the server's Retry-After
+    hint, if any) and an exponential backoff with full jitter; the worker
+    moves on while a job waits. `stats` reports queue depth, throughput and
+    wait and run latency.
+    """
+
+    def __init__(
+        self,
+        analyze: Callable[[List[Dict]], Awaitable[Dict[str, Exception]]],
+        create_job: Callable[[str, Optional[str], List[Dict], Optional[List[Dict]]], Awaitable[Dict]],
+        load_pending: Callable[[], Awaitable[List[Dict]]],
+        update_jobs: Callable[[List[str], Dict], Awaitable[bool]],
+        claim_jobs: Callable[[List[str], Dict], Awaitable[List[str]]],
+        owner: str = "default",
+        lease_seconds: float = 600.0,
+        concurrency: int = 2,
+        batch_size: int = 1,
+        batch_max_chars: int = 12000,
+        max_retries: int = 5,
+        retry_base_delay: float = 2.0,
+        retry_max_delay: float = 60.0,
+        is_retryable: Optional[Callable[[Exception], bool]] = None,
+        retry_after: Optional[Callable[[Exception], Optional[float]]] = None,
+        clock=time.monotonic,
+        rng: random.Random = random
+    ):
+        self._analyze = analyze
+        self._create_job = create_job
+        self._load_pending = load_pending
+        self._update_jobs = update_jobs
+        self._claim_jobs = claim_jobs
+        self.owner = owner
+        self.lease_seconds = lease_seconds
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.batch_max_chars = batch_max_chars
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self._is_retryable = is_retryable or (lambda error: False)
+        self._retry_after = retry_after or (lambda error: None)
+        self._clock = clock
+        self._rng = rng
+        self._queue: "asyncio.Queue[Tuple[Dict, float]]" = asyncio.Queue()
+        self._workers: List[asyncio.Task] = []
+        self._retry_timers: Dict[str, asyncio.TimerHandle] = {}
+        self._submitted_at: Dict[str, float] = {}
+        self._finished_at = deque(maxlen=10000)
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.retries = 0
+        self.resumed = 0
+        self.claimed_elsewhere = 0
+        self.batches = 0
+        self.batched_jobs = 0
+        self.wait_latency = LatencyWindow()
+        self.run_latency = LatencyWindow()
+        self.total_latency = LatencyWindow()
+
+    async def start(self) -> None:
+        """Queue the jobs left over from the last process and start the workers."""
+        if self._workers:
+            return
+        for job in await self._load_pending():
+            if job["id"] in self._submitted_at:
+                # Submitted before start; already queued
+                continue
+            self._enqueue(job)
+            self.resumed += 1
+        if self.resumed:
+            logger.info(f"Resumed {self.resumed} analysis jobs")
+        self._workers = [asyncio.create_task(self._work()) for _ in range(self.concurrency)]
+
+    async def close(self) -> None:
+        """Stop the workers; unfinished jobs keep their stored status and resume on the next start."""
+        for timer in self._retry_timers.values():
+            timer.cancel()
+        self._retry_timers.clear()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def submit(
+        self,
+        conversation_id: str,
+        call_sid: Optional[str],
+        message_timestamps: List[Dict],
+        response_times: Optional[List[Dict]] = None
+    ) -> str:
+        """Store an analysis job with the call's messages and measured turn timings, and queue it. Returns the job id."""
+        job = await self._create_job(conversation_id, call_sid, message_timestamps, response_times)
+        self._enqueue(job)
+        return job["id"]
+
+    def stats(self) -> Dict:
+        cutoff = self._clock() - 60
+        return {
+            "queued": self._queue.qsize(),
+            "waiting_to_retry": len(self._retry_timers),
+            "in_flight": self.in_flight,
+            "workers": self.concurrency,
+            "completed": self.completed,
+            "failed": self.failed,
+            "retries": self.retries,
+            "resumed": self.resumed,
+            "claimed_elsewhere": self.claimed_elsewhere,
+            "batches": self.batches,
+            "avg_batch_size": round(self.batched_jobs / self.batches, 2) if self.batches else None,
+            "finished_last_minute": sum(1 for finished_at in self._finished_at if finished_at >= cutoff),
+            "wait": self.wait_latency.to_dict(),
+            "run": self.run_latency.to_dict(),
+            "total": self.total_latency.to_dict()
+        }
+
+    def _enqueue(self, job: Dict) -> None:
+        now = self._clock()
+        self._submitted_at.setdefault(job["id"], now)
+        self._queue.put_nowait((job, now))
+
+    def _retry(self, job: Dict) -> None:
+        self._retry_timers.pop(job["id"], None)
+        self._enqueue(job)
+
+    async def _work(self) -> None:
+        carried = None
+        while True:
+            batch = [carried or await self._queue.get()]
+            carried = None
+            chars = conversation_chars(batch[0][0])
+            while len(batch) < self.batch_size and not self._queue.empty():
+                item = self._queue.get_nowait()
+                if chars + conversation_chars(item[0]) > self.batch_max_chars:
+                    # Too long to share this batch; it starts the next one
+                    carried = item
+                    break
+                batch.append(item)
+                chars += conversation_chars(item[0])
+            try:
+                await self._run(batch)
+            except Exception as e:
+                # Bookkeeping failed; the jobs keep their stored status and run again after a restart
+                logger.error(f"Error running analysis jobs {[job['id'] for job, _ in batch]}: {str(e)}")
+
+    async def _run(self, batch: List[Tuple[Dict, float]]) -> None:
+        started = self._clock()
+        for job, _ in batch:
+            job["attempts"] = (job.get("attempts") or 0) + 1
+        # Resumed jobs may be on a different attempt than the rest of the batch
+        claimed = set()
+        for attempts in sorted({job["attempts"] for job, _ in batch}):
+            claimed.update(await self._claim_jobs([job["id"] for job, _ in batch if job["attempts"] == attempts], {
+                "status": "running",
+                "owner": self.owner,
+                "lease_expires_at": (datetime.now(UTC) + timedelta(seconds=self.lease_seconds)).isoformat(),
+                "attempts": attempts,
+                "started_at": datetime.now(UTC).isoformat()
+            }))
+        jobs = []
+        for job, queued_at in batch:
+            if job["id"] not in claimed:
+                # Another process resumed the job after this one queued it
+                self.claimed_elsewhere += 1
+                self._submitted_at.pop(job["id"], None)
+                continue
+            self.wait_latency.add(started - queued_at)
+            jobs.append(job)
+        if not jobs:
+            return
+        self.batches += 1
+        self.batched_jobs += len(jobs)
+        self.in_flight += len(jobs)
+        try:
+            failures = await self._analyze(jobs) or {}
+        except Exception as e:
+            failures = {job["id"]: e for job in jobs}
+        finally:
+            self.in_flight -= len(jobs)
+            elapsed = self._clock() - started
+            for _ in jobs:
+                self.run_latency.add(elapsed)
+
+        succeeded = [job for job in jobs if job["id"] not in failures]
+        if succeeded:
+            self.completed += len(succeeded)
+            for job in succeeded:
+                self._finish(job)
+            await self._update_jobs([job["id"] for job in succeeded], {
+                "status": "completed",
+                "error": None,
+                "finished_at": datetime.now(UTC).isoformat()
+            })
+        for job in jobs:
+            if job["id"] in failures:
+                await self._fail(job, failures[job["id"]])
+
+    async def _fail(self, job: Dict, error: Exception) -> None:
+        if job["attempts"] <= self.max_retries and self._is_retryable(error):
+            backoff = self._rng.uniform(0, min(self.retry_max_delay, self.retry_base_delay * 2 ** (job["attempts"] - 1)))
+            delay = max(backoff, self._retry_after(error) or 0)
+            logger.warning(f"Analysis job {job['id']} failed (attempt {job['attempts']}), retrying in {delay:.2f}s: {str(error)}")
+            self.retries += 1
+            await self._update_jobs([job["id"]], {"status": "queued", "error": str(error)})
+            self._retry_timers[job["id"]] = asyncio.get_running_loop().call_later(delay, self._retry, job)
+            return
+
+        logger.error(f"Analysis job {job['id']} failed: {str(error)}")
+        self.failed += 1
+        self._finish(job)
+        await self._update_jobs([job["id"]], {
+            "status": "failed",
+            "error": str(error),
+            "finished_at": datetime.now(UTC).isoformat()
+        })
+
+    def _finish(self, job: Dict) -> None:
+        now = self._clock()
+        self._finished_at.append(now)
+        submitted_at = self._submitted_at.pop(job["id"], None)
+        if submitted_at is not None:
+            self.total_latency.add(now - submitted_at)
@@ -1,16 +1,40 @@
+import asyncio
+import hashlib
 import json
 import logging
-from datetime import datetime
 import openai
-from typing import Dict, List
-from app.database import supabase_client
-from app.config import OPENAI_API_KEY
+from typing import Dict, List, Optional, Tuple
+from app.database import db_client, get_cached_analyses, store_cached_analyses, delete_cached_analyses
+from app.config import OPENAI_API_KEY, REALTIME_TEMPERATURE, ANALYSIS_CACHE_SIZE, ANALYSIS_PROMPT_VERSION, ANALYSIS_MAX_TRANSCRIPT_TOKENS, ANALYSIS_CHUNK_CONCURRENCY
+from app.services.analysis_cache import AnalysisCache
+from app.services.call_metrics import compute_technical_metrics
+from app.services.transcript_compactor import TranscriptTurn, chunk_transcript, compact_transcript, merge_chunk_analyses, render_transcript, transcript_tokens
 from uuid import UUID
 
 logger = logging.getLogger(__name__)
 
+# Shared async OpenAI client, created on first use; retries are left to the analysis queue
+_openai_client: Optional[openai.AsyncOpenAI] = None
+
+def get_openai_client() -> openai.AsyncOpenAI:
+    global _openai_client
+    if _openai_client is None:
+        _openai_client = openai.AsyncOpenAI(api_key=OPENAI_API_KEY, max_retries=0)
+    return _openai_client
+
+async def close_openai_client():
+    global _openai_client
+    if _openai_client is not None:
+        await _openai_client.close()
+        _openai_client = None
+
+class BatchItemError(ValueError):
+    """A conversation's part of a batch analysis answer was missing or unusable."""
+
 ANALYSIS_PROMPT = '''You are an extremely precise and objective conversation analysis system. Your task is to analyze a conversation between a User and an Assistant in a restaurant ordering context, providing detailed metrics across multiple dimensions. You must be intensely scrutinizing and precise in your analysis.
 
+Each line of the conversation is one speaker's turn, starting with the time since the call began as [minutes:seconds].
+
 Analyze the conversation and provide exact numerical values for the following metrics:
 
 Quality Metrics (all values between 0 and 1):
@@ -24,15 +48,6 @@ Quality Metrics (all values between 0 and 1):
 - overall_quality_score: Overall quality assessment DECIMAL
 
 Technical Metrics:
-- avg_latency_ms: Average response time in milliseconds INTEGER
-- min_latency_ms: Minimum response time in milliseconds INTEGER
-- max_latency_ms: Maximum response time in milliseconds INTEGER
-- p95_latency_ms: 95th percentile latency INTEGER
-- total_tokens: Estimated total tokens used INTEGER
-- tokens_per_message: Average tokens per message DECIMAL
-- token_efficiency: Ratio of meaningful content to total tokens (0-1) DECIMAL
-- memory_usage_mb: Estimated memory usage in MB INTEGER
-- model_temperature: Temperature setting used for generation DECIMAL
 - conversation_type: Type of conversation (e.g., "Restaurant Order") TEXT
 - sentiment_score: Overall sentiment analysis (-1 to 1) DECIMAL
 - message_type: Type of message (e.g., "order", "clarification", "confirmation") TEXT
@@ -40,7 +55,6 @@ Technical Metrics:
 Restaurant-Specific Metrics:
 - order_accuracy: How accurately the order was captured (0-1) DECIMAL
 - required_clarifications: Number of times clarification was needed INTEGER
-- completion_time: Time taken to complete the order in seconds INTEGER
 - menu_knowledge: Assistant's knowledge of menu items (0-1) DECIMAL
 - special_requests: Number of special requests handled INTEGER
 - upsell_attempts: Number of appropriate upsell attempts INTEGER
@@ -54,48 +68,175 @@ Semantic Analysis:
 
 Provide your analysis in valid JSON format with these exact field names and absolutely no other text. Ensure all numerical values match their specified data types (INTEGER or DECIMAL).'''
 
-async def analyze_conversation(conversation_id: UUID, message_timestamps: List[Dict]) -> bool:
+BATCH_ANALYSIS_PROMPT = ANALYSIS_PROMPT + '''
+
+You will receive several conversations, each introduced by a line "### Conversation <id>". Analyze each conversation on its own. Respond with a single JSON object whose keys are the conversation ids and whose values are that conversation's analysis in the format described above.'''
+
+CHUNK_ANALYSIS_PROMPT = ANALYSIS_PROMPT + '''
+
+The conversation is one part of a longer call, introduced by a line "### Part <n> of <total>". Analyze only this part, and count only the clarifications, special requests and upsell attempts that happen in it.'''
+
+ANALYSIS_MODEL = "gpt-4"
+
+# Cached analyses are reused only under the prompts and model that produced them
+PROMPT_VERSION = ANALYSIS_PROMPT_VERSION or hashlib.sha256(
+    f"{ANALYSIS_MODEL}\n{ANALYSIS_PROMPT}\n{BATCH_ANALYSIS_PROMPT}\n{CHUNK_ANALYSIS_PROMPT}".encode()
+).hexdigest()[:12]
+
+# Analyses by normalized transcript, so duplicate conversations skip GPT-4
+analysis_cache = AnalysisCache(
+    get_cached_analyses,
+    store_cached_analyses,
+    delete_cached_analyses,
+    PROMPT_VERSION,
+    max_entries=ANALYSIS_CACHE_SIZE
+)
+
+async def run_analysis_batch(jobs: List[Dict]) -> Dict[str, Exception]:
     """
-    Analyze a conversation using GPT-4 and store results in the database.
+    Analyze the conversations of queued analysis jobs and store the results.
+
+    Transcripts analyzed before are answered from the analysis cache, and
+    identical transcripts in the batch are analyzed once. The rest go to
+    `analyze_transcripts`, and all results share one upsert per table. Returns the
+    jobs whose analysis was unusable, keyed by job id, so only those are
+    retried.
     """
-    try:
-        # Format conversation for analysis
-        conversation_text = format_conversation(message_timestamps)
-        # Log the conversation text being analyzed
-        logger.info("Analyzing conversation text:")
-        logger.info(conversation_text)
-        # Get GPT analysis
-        analysis = await get_gpt_analysis(conversation_text)
-        # Log the raw analysis output
-        logger.info("Raw analysis output from GPT:")
-        logger.info(json.dumps(analysis, indent=2))
-        # Store results in database
-        await store_analysis_results(conversation_id, analysis)
-        
+    logger.info(f"Analyzing {len(jobs)} conversations: {', '.join(str(job['conversation_id']) for job in jobs)}")
+    keys = {}
+    pending = {}
+    for job in jobs:
+        turns = compact_transcript(job.get("message_timestamps") or [])
+        # Timing differs between otherwise identical calls, so it is left out of the cache key
+        keys[job["id"]] = analysis_cache.key(render_transcript(turns, timestamps=False))
+        pending.setdefault(keys[job["id"]], turns)
+    results = await analysis_cache.get_many(pending)
+    for key in results:
+        del pending[key]
+    if results:
+        logger.info(f"Reusing cached analyses for {sum(1 for key in keys.values() if key in results)} of {len(jobs)} conversations")
+
+    if pending:
+        results.update(await analyze_transcripts(pending))
+        await analysis_cache.put_many({key: results[key] for key in pending if not isinstance(results[key], Exception)})
+
+    failures = {}
+    analyses = []
+    for job in jobs:
+        result = results[keys[job["id"]]]
+        if isinstance(result, Exception):
+            failures[job["id"]] = result
+            continue
+        # Copied, as duplicate transcripts share one result
+        analysis = dict(result)
+        # Latency, tokens, duration and temperature come from the recorded call, not from the model
+        analysis.update(compute_technical_metrics(job.get("message_timestamps") or [], job.get("response_times"), REALTIME_TEMPERATURE))
+        analyses.append((job["conversation_id"], analysis))
+    if analyses:
+        await store_analysis_batch(analyses)
+    return failures
+
+def is_retryable_analysis_error(error: Exception) -> bool:
+    """
+    Rate limits, server errors, timeouts and dropped connections are worth
+    retrying, as is a conversation left out of a batch answer; bad requests
+    and bad output for a single conversation are not.
+    """
+    if isinstance(error, (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError, BatchItemError)):
         return True
-    except Exception as e:
-        logger.error(f"Error analyzing conversation: {str(e)}")
-        return False
+    status = getattr(error, "status_code", None)
+    return isinstance(status, int) and (status == 429 or status >= 500)
+
+def openai_retry_after(error: Exception) -> Optional[float]:
+    """Seconds the API asked us to wait before retrying, from the Retry-After headers of the error response."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except ValueError:
+        pass
+    return None
 
 def format_conversation(message_timestamps: List[Dict]) -> str:
-    """Format the conversation for GPT analysis."""
-    formatted_conversation = []
-    for msg in message_timestamps:
-        formatted_conversation.append(f"{msg['message']} [Timestamp: {msg['timestamp']}]")
-    return "\n".join(formatted_conversation)
+    """Format the conversation for GPT analysis: one line per speaker turn, with its time into the call."""
+    return render_transcript(compact_transcript(message_timestamps))
 
-async def get_gpt_analysis(conversation_text: str) -> Dict:
-    """Get analysis from GPT-4."""
+async def analyze_transcripts(transcripts: Dict[str, List[TranscriptTurn]]) -> Dict[str, object]:
+    """
+    GPT-4 analysis of each transcript, keyed like `transcripts`, or the
+    exception explaining why it failed.
+
+    Transcripts within ANALYSIS_MAX_TRANSCRIPT_TOKENS share one request.
+    Longer ones are analyzed in chunks by `get_chunked_analysis`, at the same
+    time as the shared request.
+    """
+    short = {
+        key: render_transcript(turns)
+        for key, turns in transcripts.items()
+        if transcript_tokens(turns) <= ANALYSIS_MAX_TRANSCRIPT_TOKENS
+    }
+    results = {}
+
+    async def analyze_short():
+        # Batch answers are keyed by short ids rather than by the callers' keys
+        requested = {str(index + 1): key for index, key in enumerate(short)}
+        try:
+            if len(requested) == 1:
+                answers = {"1": await get_gpt_analysis(short[requested["1"]])}
+            else:
+                answers = await get_gpt_batch_analysis({short_id: short[key] for short_id, key in requested.items()})
+        except Exception as e:
+            answers = {short_id: e for short_id in requested}
+        results.update({key: answers[short_id] for short_id, key in requested.items()})
+
+    async def analyze_long(key: str, turns: List[TranscriptTurn]):
+        try:
+            results[key] = await get_chunked_analysis(turns)
+        except Exception as e:
+            results[key] = e
+
+    tasks = [analyze_long(key, turns) for key, turns in transcripts.items() if key not in short]
+    if short:
+        tasks.append(analyze_short())
+    await asyncio.gather(*tasks)
+    return results
+
+async def get_chunked_analysis(turns: List[TranscriptTurn]) -> Dict:
+    """
+    Analyze a transcript too long for one request: its chunks are analyzed
+    concurrently, up to ANALYSIS_CHUNK_CONCURRENCY at a time, and their
+    results merged into one analysis. Raises if any chunk fails.
+    """
+    chunks = chunk_transcript(turns, ANALYSIS_MAX_TRANSCRIPT_TOKENS)
+    logger.info(f"Analyzing a {transcript_tokens(turns)}-token conversation in {len(chunks)} chunks")
+    semaphore = asyncio.Semaphore(ANALYSIS_CHUNK_CONCURRENCY)
+
+    async def analyze_chunk(index: int, chunk: List[TranscriptTurn]) -> Dict:
+        async with semaphore:
+            content = f"### Part {index + 1} of {len(chunks)}\n{render_transcript(chunk)}"
+            return flatten_analysis(await request_analysis(CHUNK_ANALYSIS_PROMPT, content))
+
+    analyses = await asyncio.gather(*(analyze_chunk(index, chunk) for index, chunk in enumerate(chunks)), return_exceptions=True)
+    for analysis in analyses:
+        if isinstance(analysis, Exception):
+            raise analysis
+    return merge_chunk_analyses(analyses, [transcript_tokens(chunk) for chunk in chunks])
+
+async def request_analysis(system_prompt: str, content: str) -> Dict:
+    """Send conversation text to GPT-4 and return its parsed JSON answer."""
     try:
-        client = openai.OpenAI(api_key=OPENAI_API_KEY)
+        client = get_openai_client()
         
         logger.info("Sending conversation to OpenAI for analysis...")
         try:
-            response = client.chat.completions.create(
-                model="gpt-4",
+            response = await client.chat.completions.create(
+                model=ANALYSIS_MODEL,
                 messages=[
-                    {"role": "system", "content": ANALYSIS_PROMPT},
-                    {"role": "user", "content": conversation_text}
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": content}
                 ],
                 temperature=0.3
             )
@@ -126,112 +267,154 @@ async def get_gpt_analysis(conversation_text: str) -> Dict:
             logger.error(f"Unexpected error parsing OpenAI response: {str(e)}")
             raise
             
-        # Flatten the nested structure
-        analysis = {}
-        
-        # Extract Quality Metrics
-        if "Quality Metrics" in nested_analysis:
-            analysis.update(nested_analysis["Quality Metrics"])
-            
-        # Extract Technical Metrics
-        if "Technical Metrics" in nested_analysis:
-            analysis.update(nested_analysis["Technical Metrics"])
-            
-        # Extract Restaurant-Specific Metrics
-        if "Restaurant-Specific Metrics" in nested_analysis:
-            analysis.update(nested_analysis["Restaurant-Specific Metrics"])
-            
-        # Extract Semantic Analysis
-        if "Semantic Analysis" in nested_analysis:
-            analysis.update(nested_analysis["Semantic Analysis"])
-            
-        # Validate required fields are present
-        required_fields = ['overall_quality_score', 'task_completion_score', 'order_accuracy']
-        missing_fields = [field for field in required_fields if field not in analysis]
-        if missing_fields:
-            logger.error(f"Analysis response missing required fields: {missing_fields}")
-            logger.error(f"Available fields: {list(analysis.keys())}")
-            logger.error(f"Full nested response: {json.dumps(nested_analysis, indent=2)}")
-            raise ValueError(f"Invalid analysis response: missing fields {missing_fields}")
-        
-        # Log the analysis results
-        logger.info("OpenAI Analysis Results:")
-        logger.info(f"Overall Quality Score: {analysis.get('overall_quality_score', 'N/A')}")
-        logger.info(f"Task Completion Score: {analysis.get('task_completion_score', 'N/A')}")
-        logger.info(f"Order Accuracy: {analysis.get('order_accuracy', 'N/A')}")
-        logger.info(f"Required Clarifications: {analysis.get('required_clarifications', 'N/A')}")
-        logger.info(f"Conversation Type: {analysis.get('conversation_type', 'N/A')}")
-        logger.info(f"Sentiment Score: {analysis.get('sentiment_score', 'N/A')}")
-        logger.info(f"Topics: {', '.join(analysis.get('topic_classification', []))}")
-        
-        return analysis
+        return nested_analysis
     except Exception as e:
         logger.error(f"Error getting GPT analysis: {str(e)}")
         raise
 
+def flatten_analysis(nested_analysis: Dict) -> Dict:
+    """Flatten one conversation's sectioned analysis and check the required fields are present."""
+    # Flatten the nested structure
+    analysis = {}
+    
+    # Extract Quality Metrics
+    if "Quality Metrics" in nested_analysis:
+        analysis.update(nested_analysis["Quality Metrics"])
+        
+    # Extract Technical Metrics
+    if "Technical Metrics" in nested_analysis:
+        analysis.update(nested_analysis["Technical Metrics"])
+        
+    # Extract Restaurant-Specific Metrics
+    if "Restaurant-Specific Metrics" in nested_analysis:
+        analysis.update(nested_analysis["Restaurant-Specific Metrics"])
+        
+    # Extract Semantic Analysis
+    if "Semantic Analysis" in nested_analysis:
+        analysis.update(nested_analysis["Semantic Analysis"])
+        
+    # Validate required fields are present
+    required_fields = ['overall_quality_score', 'task_completion_score', 'order_accuracy']
+    missing_fields = [field for field in required_fields if field not in analysis]
+    if missing_fields:
+        logger.error(f"Analysis response missing required fields: {missing_fields}")
+        logger.error(f"Available fields: {list(analysis.keys())}")
+        logger.error(f"Full nested response: {json.dumps(nested_analysis, indent=2)}")
+        raise ValueError(f"Invalid analysis response: missing fields {missing_fields}")
+    
+    # Log the analysis results
+    logger.info("OpenAI Analysis Results:")
+    logger.info(f"Overall Quality Score: {analysis.get('overall_quality_score', 'N/A')}")
+    logger.info(f"Task Completion Score: {analysis.get('task_completion_score', 'N/A')}")
+    logger.info(f"Order Accuracy: {analysis.get('order_accuracy', 'N/A')}")
+    logger.info(f"Required Clarifications: {analysis.get('required_clarifications', 'N/A')}")
+    logger.info(f"Conversation Type: {analysis.get('conversation_type', 'N/A')}")
+    logger.info(f"Sentiment Score: {analysis.get('sentiment_score', 'N/A')}")
+    logger.info(f"Topics: {', '.join(analysis.get('topic_classification', []))}")
+    
+    return analysis
+
+async def get_gpt_analysis(conversation_text: str) -> Dict:
+    """Get analysis from GPT-4."""
+    return flatten_analysis(await request_analysis(ANALYSIS_PROMPT, conversation_text))
+
+async def get_gpt_batch_analysis(conversations: Dict[str, str]) -> Dict[str, object]:
+    """
+    Analyze several conversations, keyed by id, in one GPT-4 request.
+
+    Returns each conversation's flattened analysis, or the exception explaining
+    why its part of the answer was unusable, so callers can retry just that one.
+    """
+    content = "\n\n".join(f"### Conversation {key}\n{text}" for key, text in conversations.items())
+    answer = await request_analysis(BATCH_ANALYSIS_PROMPT, content)
+    results = {}
+    for key in conversations:
+        try:
+            if not isinstance(answer.get(key), dict):
+                raise BatchItemError(f"Invalid batch analysis response: conversation {key} missing")
+            results[key] = flatten_analysis(answer[key])
+        except Exception as e:
+            results[key] = BatchItemError(str(e))
+    return results
+
+def analysis_rows(conversation_id: UUID, analysis: Dict) -> Tuple[Dict, Dict, Dict]:
+    """The quality_metrics, technical_metrics and analysis_results rows of one analysis."""
+    # Extract quality metrics
+    quality_metrics = {
+        "conversation_id": str(conversation_id),
+        "coherence_score": analysis.get("coherence_score"),
+        "task_completion_score": analysis.get("task_completion_score"),
+        "context_retention_score": analysis.get("context_retention_score"),
+        "natural_language_score": analysis.get("natural_language_score"),
+        "appropriateness_score": analysis.get("appropriateness_score"),
+        "engagement_score": analysis.get("engagement_score"),
+        "error_recovery_score": analysis.get("error_recovery_score"),
+        "overall_quality_score": analysis.get("overall_quality_score"),
+        "order_accuracy": analysis.get("order_accuracy"),
+        "required_clarifications": analysis.get("required_clarifications"),
+        "completion_time": analysis.get("completion_time"),
+        "menu_knowledge": analysis.get("menu_knowledge"),
+        "special_requests": analysis.get("special_requests"),
+        "upsell_attempts": analysis.get("upsell_attempts")
+    }
+    
+    # Extract technical metrics
+    technical_metrics = {
+        "conversation_id": str(conversation_id),
+        "avg_latency_ms": analysis.get("avg_latency_ms"),
+        "min_latency_ms": analysis.get("min_latency_ms"),
+        "max_latency_ms": analysis.get("max_latency_ms"),
+        "p95_latency_ms": analysis.get("p95_latency_ms"),
+        "total_tokens": analysis.get("total_tokens"),
+        "tokens_per_message": analysis.get("tokens_per_message"),
+        "token_efficiency": analysis.get("token_efficiency"),
+        "memory_usage_mb": analysis.get("memory_usage_mb"),
+        "model_temperature": analysis.get("model_temperature"),
+        "conversation_type": analysis.get("conversation_type"),
+        "sentiment_score": analysis.get("sentiment_score"),
+        "message_type": analysis.get("message_type")
+    }
+    
+    # Extract analysis results
+    analysis_results = {
+        "conversation_id": str(conversation_id),
+        "intent_classification": analysis.get("intent_classification"),
+        "entity_extraction": analysis.get("entity_extraction"),
+        "topic_classification": analysis.get("topic_classification"),
+        "semantic_role_labels": analysis.get("semantic_role_labels"),
+        "conversation_flow": analysis.get("conversation_flow")
+    }
+    return quality_metrics, technical_metrics, analysis_results
+
 async def store_analysis_results(conversation_id: UUID, analysis: Dict) -> None:
     """Store analysis results in the database."""
+    await store_analysis_batch([(conversation_id, analysis)])
+
+async def store_analysis_batch(analyses: List[Tuple[UUID, Dict]]) -> None:
+    """
+    Store the results of several analyses with one multi-row upsert per table.
+
+    Rows are keyed by conversation, so a batch that is retried after one of
+    its writes failed, or a conversation analyzed again, replaces its rows
+    instead of adding duplicates.
+    """
     try:
-        # Extract and store quality metrics
-        quality_metrics = {
-            "conversation_id": str(conversation_id),
-            "coherence_score": analysis.get("coherence_score"),
-            "task_completion_score": analysis.get("task_completion_score"),
-            "context_retention_score": analysis.get("context_retention_score"),
-            "natural_language_score": analysis.get("natural_language_score"),
-            "appropriateness_score": analysis.get("appropriateness_score"),
-            "engagement_score": analysis.get("engagement_score"),
-            "error_recovery_score": analysis.get("error_recovery_score"),
-            "overall_quality_score": analysis.get("overall_quality_score"),
-            "order_accuracy": analysis.get("order_accuracy"),
-            "required_clarifications": analysis.get("required_clarifications"),
-            "completion_time": analysis.get("completion_time"),
-            "menu_knowledge": analysis.get("menu_knowledge"),
-            "special_requests": analysis.get("special_requests"),
-            "upsell_attempts": analysis.get("upsell_attempts")
-        }
-        
-        # Extract and store technical metrics
-        technical_metrics = {
-            "conversation_id": str(conversation_id),
-            "avg_latency_ms": analysis.get("avg_latency_ms"),
-            "min_latency_ms": analysis.get("min_latency_ms"),
-            "max_latency_ms": analysis.get("max_latency_ms"),
-            "p95_latency_ms": analysis.get("p95_latency_ms"),
-            "total_tokens": analysis.get("total_tokens"),
-            "tokens_per_message": analysis.get("tokens_per_message"),
-            "token_efficiency": analysis.get("token_efficiency"),
-            "memory_usage_mb": analysis.get("memory_usage_mb"),
-            "model_temperature": analysis.get("model_temperature"),
-            "conversation_type": analysis.get("conversation_type"),
-            "sentiment_score": analysis.get("sentiment_score"),
-            "message_type": analysis.get("message_type")
-        }
-        
-        # Extract and store analysis results
-        analysis_results = {
-            "conversation_id": str(conversation_id),
-            "intent_classification": analysis.get("intent_classification"),
-            "entity_extraction": analysis.get("entity_extraction"),
-            "topic_classification": analysis.get("topic_classification"),
-            "semantic_role_labels": analysis.get("semantic_role_labels"),
-            "conversation_flow": analysis.get("conversation_flow")
-        }
+        rows = [analysis_rows(conversation_id, analysis) for conversation_id, analysis in analyses]
         
         # Log before database operations
-        logger.info("Storing analysis results in database...")
+        logger.info(f"Storing {len(rows)} analysis results in database...")
         
-        # Insert into database tables
-        supabase_client.table("quality_metrics").insert(quality_metrics).execute()
+        # Upsert into database tables
+        await db_client.table("quality_metrics").upsert([quality for quality, _, _ in rows], on_conflict="conversation_id").execute()
         logger.info("Stored quality metrics")
         
-        supabase_client.table("technical_metrics").insert(technical_metrics).execute()
+        await db_client.table("technical_metrics").upsert([technical for _, technical, _ in rows], on_conflict="conversation_id").execute()
         logger.info("Stored technical metrics")
         
-        supabase_client.table("analysis_results").insert(analysis_results).execute()
+        await db_client.table("analysis_results").upsert([results for _, _, results in rows], on_conflict="conversation_id").execute()
         logger.info("Stored analysis results")
         
     except Exception as e:
         logger.error(f"Error storing analysis results: {str(e)}")
-        logger.error(f"Analysis data: {json.dumps(analysis, indent=2)}")
-        raise 
\ No newline at end of file
+        logger.error(f"Analysis data: {json.dumps([analysis for _, analysis in analyses], indent=2)}")
+        raise
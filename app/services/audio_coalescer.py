@@ -0,0 +1,77 @@
+import base64
+import time
+from typing import Dict, Optional
+
+# g711 μ-law at 8 kHz is one byte per sample
+ULAW_BYTES_PER_MS = 8
+
+
+class InboundAudioCoalescer:
+    """
+    Batches Twilio `media` frames into fewer `input_audio_buffer.append` events.
+
+    Twilio sends 20 ms of μ-law per frame. Frames are buffered until `window_ms`
+    of audio is collected, or until the oldest buffered frame is `max_delay_ms`
+    old, whichever comes first. Callers flush early on stream events such as
+    `stop` and `mark`. A window of 0 disables coalescing.
+    """
+
+    def __init__(self, window_ms: int = 100, max_delay_ms: int = 150, clock=time.monotonic):
+        self.window_ms = window_ms
+        self.max_delay_ms = max_delay_ms
+        self._window_bytes = window_ms * ULAW_BYTES_PER_MS
+        self._max_delay = max_delay_ms / 1000
+        self._clock = clock
+        self._buffer = bytearray()
+        self._first_frame_at = None
+        self.frames_in = 0
+        self.appends_out = 0
+        self.deadline_flushes = 0
+
+    def add(self, payload: str) -> Optional[str]:
+        """Buffer a base64 frame; return a coalesced base64 payload when one is ready to send."""
+        self.frames_in += 1
+        if not self._window_bytes:
+            self.appends_out += 1
+            return payload
+
+        if not self._buffer:
+            self._first_frame_at = self._clock()
+        self._buffer += base64.b64decode(payload)
+        if len(self._buffer) >= self._window_bytes:
+            return self.flush()
+        if self.expired():
+            self.deadline_flushes += 1
+            return self.flush()
+        return None
+
+    def expired(self) -> bool:
+        """Whether buffered audio has waited longer than the latency deadline."""
+        return bool(self._buffer) and self._clock() - self._first_frame_at >= self._max_delay
+
+    def flush_expired(self) -> Optional[str]:
+        """Flush buffered audio only if it has passed the latency deadline."""
+        if not self.expired():
+            return None
+        self.deadline_flushes += 1
+        return self.flush()
+
+    def flush(self) -> Optional[str]:
+        """Return all buffered audio as one base64 payload, or None if nothing is buffered."""
+        if not self._buffer:
+            return None
+        payload = base64.b64encode(self._buffer).decode('utf-8')
+        self._buffer = bytearray()
+        self._first_frame_at = None
+        self.appends_out += 1
+        return payload
+
+    def stats(self) -> Dict:
+        return {
+            "window_ms": self.window_ms,
+            "frames_in": self.frames_in,
+            "appends_out": self.appends_out,
+            "deadline_flushes": self.deadline_flushes,
+            "frames_per_append": round(self.frames_in / self.appends_out, 2) if self.appends_out else None,
+            "buffered_ms": len(self._buffer) // ULAW_BYTES_PER_MS
+        }
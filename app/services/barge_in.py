@@ -0,0 +1,111 @@
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+
+class BargeInController:
+    """
+    Tracks assistant playback on the Twilio leg and handles caller interruptions.
+
+    A Twilio mark is queued after every assistant audio delta; Twilio echoes a
+    mark back once the audio before it has played, so unacknowledged marks mean
+    audio is still buffered on the caller's side. When the caller starts
+    speaking over that audio the controller produces the `conversation.item.truncate`
+    event, and the caller sends a Twilio `clear`. Twilio acknowledges the marks
+    of cleared audio immediately, so the time from `speech_started` to the last
+    of those acknowledgements is the interruption latency.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self._mark_counter = 0
+        self.pending_marks = deque()
+        self.last_assistant_item = None
+        self.response_start_timestamp = None  # Twilio media timestamp when the current item started
+        self.interrupted_item = None
+        self._awaiting_marks = set()
+        self._current = None
+        self.interruptions: List[Dict] = []
+
+    def on_audio_delta(self, item_id: Optional[str], media_timestamp: int) -> Optional[str]:
+        """
+        Register an assistant audio delta about to be forwarded to Twilio.
+
+        Returns the name of the mark to send after it, or None if the delta
+        belongs to an item that was just interrupted and should be dropped.
+        """
+        if item_id is not None and item_id == self.interrupted_item:
+            return None
+        if item_id != self.last_assistant_item or self.response_start_timestamp is None:
+            self.last_assistant_item = item_id
+            self.response_start_timestamp = media_timestamp
+        self._mark_counter += 1
+        name = f"audio-{self._mark_counter}"
+        self.pending_marks.append(name)
+        return name
+
+    def on_speech_started(self, media_timestamp: int) -> Optional[Dict]:
+        """
+        Handle `input_audio_buffer.speech_started`.
+
+        Returns the truncate event for the interrupted item if assistant audio is
+        still playing, in which case the caller must clear the Twilio buffer;
+        returns None when there is nothing to interrupt.
+        """
+        if not self.pending_marks or self.last_assistant_item is None:
+            return None
+
+        audio_end_ms = max(media_timestamp - (self.response_start_timestamp or media_timestamp), 0)
+        truncate_event = {
+            "type": "conversation.item.truncate",
+            "item_id": self.last_assistant_item,
+            "content_index": 0,
+            "audio_end_ms": audio_end_ms
+        }
+        self._current = {
+            "item_id": self.last_assistant_item,
+            "audio_end_ms": audio_end_ms,
+            "speech_started_at": self._clock(),
+            "marks_cleared": len(self.pending_marks),
+            "cleared_ms": None
+        }
+        self.interruptions.append(self._current)
+        self._awaiting_marks = set(self.pending_marks)
+        self.interrupted_item = self.last_assistant_item
+        self.last_assistant_item = None
+        self.response_start_timestamp = None
+        return truncate_event
+
+    def discard_unsent_marks(self, count: int) -> None:
+        """Forget the newest `count` marks, which were removed from the send queue before reaching Twilio."""
+        for _ in range(min(count, len(self.pending_marks))):
+            self._awaiting_marks.discard(self.pending_marks.pop())
+        self._maybe_cleared()
+
+    def on_mark(self, name: Optional[str]) -> None:
+        """Handle a mark acknowledgement from Twilio."""
+        if name not in self.pending_marks:
+            return
+        # Twilio acknowledges marks in order, so earlier marks have played too
+        while self.pending_marks:
+            acknowledged = self.pending_marks.popleft()
+            self._awaiting_marks.discard(acknowledged)
+            if acknowledged == name:
+                break
+        self._maybe_cleared()
+
+    def stats(self) -> Dict:
+        latencies = [i["cleared_ms"] for i in self.interruptions if i["cleared_ms"] is not None]
+        return {
+            "interruptions": len(self.interruptions),
+            "pending_marks": len(self.pending_marks),
+            "cleared_latencies_ms": latencies,
+            "avg_cleared_ms": round(sum(latencies) / len(latencies), 2) if latencies else None,
+            "max_cleared_ms": max(latencies) if latencies else None,
+            "unconfirmed": len(self.interruptions) - len(latencies)
+        }
+
+    def _maybe_cleared(self) -> None:
+        if self._current is not None and not self._awaiting_marks:
+            self._current["cleared_ms"] = round((self._clock() - self._current["speech_started_at"]) * 1000, 2)
+            self._current = None
@@ -0,0 +1,165 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Twilio call statuses after which nothing more happens on the call
+TERMINAL_STATUSES = frozenset({"completed", "failed", "busy", "no-answer", "canceled"})
+
+
+class CompletionNotifier:
+    """
+    Per-call futures resolved when a call reaches a terminal status.
+
+    `notify` is called from the places that learn a call's status (status
+    webhooks, media stream shutdown), and `wait` lets batch orchestration
+    await a set of calls without polling. The latest status is remembered
+    for the last `max_recent` calls, so `status` answers without a REST
+    fetch and waiting on a call that already ended returns immediately.
+    Callbacks can be lost, so a background sweep asks `reconcile(call_sids)`
+    for the stored status of calls that have been watched for longer than
+    `sweep_interval` and resolves those that ended. A call stops being
+    watched once the last `wait` on it has timed out or been cancelled.
+    """
+
+    def __init__(
+        self,
+        reconcile: Callable[[List[str]], Awaitable[Dict[str, Optional[str]]]],
+        sweep_interval: float = 30.0,
+        max_recent: int = 10000,
+        clock=time.monotonic
+    ):
+        self._reconcile = reconcile
+        self.sweep_interval = sweep_interval
+        self.max_recent = max_recent
+        self._clock = clock
+        self._waiting: Dict[str, asyncio.Future] = {}
+        # Number of `wait` calls currently waiting on each call
+        self._waiters: Dict[str, int] = {}
+        self._watched_at: Dict[str, float] = {}
+        self._recent: "OrderedDict[str, str]" = OrderedDict()
+        self._sweep_task = None
+        self.notified = 0
+        self.reconciled = 0
+        self.timeouts = 0
+        self.sweeps = 0
+
+    async def start(self) -> None:
+        if self._sweep_task is None:
+            self._sweep_task = asyncio.create_task(self._sweep_loop())
+
+    async def close(self) -> None:
+        if self._sweep_task is not None:
+            self._sweep_task.cancel()
+            self._sweep_task = None
+        for future in self._waiting.values():
+            future.cancel()
+        self._waiting.clear()
+        self._watched_at.clear()
+        self._waiters.clear()
+
+    def watch(self, call_sid: str) -> asyncio.Future:
+        """Future for the call's terminal status; already resolved if the call has ended."""
+        future = self._waiting.get(call_sid)
+        if future is not None:
+            return future
+        future = asyncio.get_running_loop().create_future()
+        status = self._recent.get(call_sid)
+        if status in TERMINAL_STATUSES:
+            future.set_result(status)
+            return future
+        self._waiting[call_sid] = future
+        self._watched_at[call_sid] = self._clock()
+        return future
+
+    def status(self, call_sid: str) -> Optional[str]:
+        """The call's latest known status, if this process has seen one."""
+        return self._recent.get(call_sid)
+
+    def notify(self, call_sid: str, status: str) -> bool:
+        """Record a status for the call. Returns True if it ended the call."""
+        previous = self._recent.get(call_sid)
+        if previous in TERMINAL_STATUSES:
+            return False
+        self._recent[call_sid] = status
+        self._recent.move_to_end(call_sid)
+        while len(self._recent) > self.max_recent:
+            self._recent.popitem(last=False)
+        if status not in TERMINAL_STATUSES:
+            return False
+        self.notified += 1
+        future = self._waiting.pop(call_sid, None)
+        self._watched_at.pop(call_sid, None)
+        if future is not None and not future.done():
+            future.set_result(status)
+        return True
+
+    async def wait(self, call_sids: Iterable[str], timeout: Optional[float] = None) -> Dict[str, str]:
+        """Wait for the calls to end; returns each call's terminal status, or "timeout"."""
+        futures = {call_sid: self.watch(call_sid) for call_sid in call_sids}
+        for call_sid in futures:
+            self._waiters[call_sid] = self._waiters.get(call_sid, 0) + 1
+        try:
+            if futures:
+                await asyncio.wait([asyncio.shield(future) for future in futures.values()], timeout=timeout)
+        finally:
+            for call_sid, future in futures.items():
+                self._leave(call_sid, future)
+        statuses = {}
+        for call_sid, future in futures.items():
+            if future.done() and not future.cancelled():
+                statuses[call_sid] = future.result()
+            else:
+                statuses[call_sid] = "timeout"
+                self.timeouts += 1
+        return statuses
+
+    def _leave(self, call_sid: str, future: asyncio.Future) -> None:
+        waiters = self._waiters.get(call_sid, 0) - 1
+        if waiters > 0:
+            self._waiters[call_sid] = waiters
+            return
+        self._waiters.pop(call_sid, None)
+        # Stop reconciling a call nobody is waiting for; a later watch starts over
+        if not future.done() and self._waiting.get(call_sid) is future:
+            del self._waiting[call_sid]
+            self._watched_at.pop(call_sid, None)
+
+    async def sweep(self) -> int:
+        """Resolve watched calls whose callbacks were missed. Returns the number resolved."""
+        cutoff = self._clock() - self.sweep_interval
+        overdue = [call_sid for call_sid, watched_at in self._watched_at.items() if watched_at <= cutoff]
+        if not overdue:
+            return 0
+        self.sweeps += 1
+        statuses = await self._reconcile(overdue)
+        resolved = 0
+        for call_sid in overdue:
+            status = statuses.get(call_sid)
+            if status and self.notify(call_sid, status):
+                resolved += 1
+        self.reconciled += resolved
+        if resolved:
+            logger.info(f"Reconciled {resolved} calls whose completion callbacks were missed")
+        return resolved
+
+    def stats(self) -> Dict:
+        return {
+            "waiting": len(self._waiting),
+            "recent": len(self._recent),
+            "notified": self.notified,
+            "reconciled": self.reconciled,
+            "timeouts": self.timeouts,
+            "sweeps": self.sweeps
+        }
+
+    async def _sweep_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            try:
+                await self.sweep()
+            except Exception as e:
+                logger.error(f"Error reconciling call completions: {str(e)}")
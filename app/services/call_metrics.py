@@ -0,0 +1,88 @@
+from datetime import datetime, timedelta, UTC
+from statistics import fmean
+from typing import Dict, List, Optional
+
+
+def _parse_time(value: Optional[str]) -> Optional[datetime]:
+    """An ISO timestamp as an aware UTC datetime, so stored and live timestamps can be compared."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+    # Older turns were stamped in server time without an offset; the servers run on UTC
+    if parsed.tzinfo is None:
+        return parsed.replace(tzinfo=UTC)
+    return parsed.astimezone(UTC)
+
+
+def message_started_at(message: Dict) -> Optional[datetime]:
+    """When an utterance began: its timestamp marks the end, less its duration when known."""
+    ended = _parse_time(message.get("timestamp"))
+    if ended is None:
+        return None
+    return ended - timedelta(milliseconds=message.get("duration_ms") or 0)
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def response_latencies_ms(message_timestamps: List[Dict], response_times: Optional[List[Dict]] = None) -> List[float]:
+    """
+    Assistant response latency for each turn, in milliseconds.
+
+    Turns measured live (`response_times` from TurnTimer) give the time from the
+    end of the caller's speech to the first assistant audio. Calls without
+    those fall back to the gap between the end of each caller message and the
+    start of the assistant message that follows it.
+    """
+    measured = [turn["ttfa_ms"] for turn in response_times or [] if turn.get("ttfa_ms") is not None]
+    if measured:
+        return measured
+
+    latencies = []
+    for previous, message in zip(message_timestamps, message_timestamps[1:]):
+        if previous.get("type") != "user" or message.get("type") != "assistant":
+            continue
+        user_ended = _parse_time(previous.get("timestamp"))
+        assistant_started = message_started_at(message)
+        if user_ended is not None and assistant_started is not None:
+            latencies.append(max(0.0, (assistant_started - user_ended).total_seconds() * 1000))
+    return latencies
+
+
+def compute_technical_metrics(
+    message_timestamps: List[Dict],
+    response_times: Optional[List[Dict]] = None,
+    model_temperature: Optional[float] = None
+) -> Dict:
+    """
+    Latency, token and duration metrics of a call, computed from what was recorded
+    rather than estimated from the transcript, plus the realtime session's
+    `model_temperature`. Metrics without data are None.
+    """
+    latencies = response_latencies_ms(message_timestamps, response_times)
+    usage = [turn.get("usage") or {} for turn in response_times or []]
+    token_counts = [u["total_tokens"] for u in usage if u.get("total_tokens") is not None]
+    total_tokens = sum(token_counts) if token_counts else None
+
+    starts = [t for t in map(message_started_at, message_timestamps) if t is not None]
+    ends = [t for t in (_parse_time(m.get("timestamp")) for m in message_timestamps) if t is not None]
+    completion_time = round((max(ends) - min(starts)).total_seconds()) if starts and ends else None
+
+    return {
+        "avg_latency_ms": round(fmean(latencies)) if latencies else None,
+        "min_latency_ms": round(min(latencies)) if latencies else None,
+        "max_latency_ms": round(max(latencies)) if latencies else None,
+        "p95_latency_ms": round(_percentile(latencies, 0.95)) if latencies else None,
+        "total_tokens": total_tokens,
+        "tokens_per_message": round(total_tokens / len(message_timestamps), 2) if total_tokens is not None and message_timestamps else None,
+        "completion_time": completion_time,
+        "model_temperature": model_temperature,
+        # Not observable from inside the app per call
+        "memory_usage_mb": None,
+        "token_efficiency": None
+    }
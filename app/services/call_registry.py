@@ -0,0 +1,135 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CallInfo:
+    """What the app needs to know about a call without querying voice_conversations."""
+
+    __slots__ = ("id", "call_sid", "simulation_id", "phone_number", "persona", "instructions", "streamed")
+
+    def __init__(
+        self,
+        id: str,
+        call_sid: str,
+        simulation_id: str,
+        phone_number: Optional[str] = None,
+        persona: Optional[Dict] = None,
+        instructions: Optional[str] = None,
+        streamed: bool = False
+    ):
+        self.id = id
+        self.call_sid = call_sid
+        self.simulation_id = simulation_id
+        self.phone_number = phone_number
+        self.persona = persona
+        # Pre-rendered system message for the persona, sent as-is when the stream starts
+        self.instructions = instructions
+        # Whether a media stream may already have recorded turns for this call
+        self.streamed = streamed
+
+
+class CallRegistry:
+    """
+    In-process index of call records keyed by call SID.
+
+    Records are registered when they are created, so webhooks and media
+    streams for calls placed by this process resolve their row id and
+    simulation without a query. Records created before Twilio has assigned
+    a SID are held by row id until `claim` attaches the real SID. Calls
+    created elsewhere are loaded once through `load` and then cached. The
+    least recently used entries are evicted beyond `max_entries`.
+
+    A call's media stream can start before its SID is claimed, so a SID
+    that misses both the index and `load` while records are pending waits
+    up to `claim_timeout` seconds for the claim.
+    """
+
+    def __init__(
+        self,
+        load: Callable[[str], Awaitable[Optional[CallInfo]]],
+        max_entries: int = 10000,
+        claim_timeout: float = 2.0
+    ):
+        self._load = load
+        self.max_entries = max_entries
+        self.claim_timeout = claim_timeout
+        self._calls: "OrderedDict[str, CallInfo]" = OrderedDict()
+        self._pending: Dict[str, CallInfo] = {}
+        self._claims: Dict[str, asyncio.Event] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def register(self, info: CallInfo) -> CallInfo:
+        self._calls[info.call_sid] = info
+        self._calls.move_to_end(info.call_sid)
+        while len(self._calls) > self.max_entries:
+            self._calls.popitem(last=False)
+        return info
+
+    def register_pending(self, info: CallInfo) -> CallInfo:
+        """Hold a record whose call hasn't been placed yet, keyed by row id."""
+        self._pending[info.id] = info
+        # Records whose call was never placed are never claimed; drop the oldest
+        while len(self._pending) > self.max_entries:
+            self._pending.pop(next(iter(self._pending)))
+        return info
+
+    def claim(self, record_id: str, call_sid: str) -> Optional[CallInfo]:
+        """Register a pending record under the SID Twilio assigned to its call."""
+        info = self._pending.pop(record_id, None)
+        if info is not None:
+            info.call_sid = call_sid
+            self.register(info)
+            claimed = self._claims.pop(call_sid, None)
+            if claimed is not None:
+                claimed.set()
+        return info
+
+    def get(self, call_sid: str) -> Optional[CallInfo]:
+        info = self._calls.get(call_sid)
+        if info is not None:
+            self._calls.move_to_end(call_sid)
+        return info
+
+    async def resolve(self, call_sid: str) -> Optional[CallInfo]:
+        """Return the call's info, loading and caching it if this process hasn't seen the call."""
+        info = self.get(call_sid)
+        if info is not None:
+            self.hits += 1
+            return info
+        self.misses += 1
+        info = await self._load(call_sid)
+        # The call may have been claimed while loading; its registered info carries the persona
+        claimed = self.get(call_sid)
+        if claimed is not None:
+            return claimed
+        if info is not None:
+            return self.register(info)
+        if self._pending:
+            return await self._wait_for_claim(call_sid)
+        return None
+
+    async def _wait_for_claim(self, call_sid: str) -> Optional[CallInfo]:
+        claimed = self._claims.setdefault(call_sid, asyncio.Event())
+        try:
+            await asyncio.wait_for(claimed.wait(), self.claim_timeout)
+        except asyncio.TimeoutError:
+            self._claims.pop(call_sid, None)
+        return self.get(call_sid)
+
+    def discard(self, call_sid: str) -> None:
+        self._calls.pop(call_sid, None)
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._calls),
+            "pending": len(self._pending),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None
+        }
@@ -0,0 +1,103 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ConcurrencyTimeline:
+    """Records how many calls were in flight over time."""
+
+    def __init__(self, target: int, clock=time.monotonic):
+        self.target = target
+        self._clock = clock
+        self._started = clock()
+        self.in_flight = 0
+        self.peak = 0
+        self.points = [(0.0, 0)]  # (seconds since start, calls in flight from then on)
+
+    def change(self, delta: int) -> None:
+        self.in_flight += delta
+        self.peak = max(self.peak, self.in_flight)
+        self.points.append((round(self._clock() - self._started, 3), self.in_flight))
+
+    def summary(self) -> Dict:
+        elapsed = self._clock() - self._started
+        # Time-weighted average of the step function, and the share of time spent at the target
+        weighted = at_target = 0.0
+        for (start, level), (end, _) in zip(self.points, self.points[1:] + [(elapsed, 0)]):
+            weighted += level * (end - start)
+            if level >= self.target:
+                at_target += end - start
+        average = weighted / elapsed if elapsed > 0 else 0.0
+        return {
+            "target": self.target,
+            "peak": self.peak,
+            "average": round(average, 2),
+            "utilization": round(average / self.target, 3) if self.target else None,
+            "time_at_target": round(at_target / elapsed, 3) if elapsed > 0 else None,
+            "elapsed_seconds": round(elapsed, 3),
+            "timeline": self.points
+        }
+
+
+class SlidingWindow:
+    """
+    Runs calls with exactly `concurrency` in flight until `total` have run.
+
+    `place(index)` dials call `index` and returns its SID (None if it could
+    not be placed); `wait_for_end(call_sid)` returns the call's final status.
+    A slot is held from dialing until the call ends, and the next call is
+    dialed as soon as any slot frees up. When `slots` is given, every call
+    also holds one of its permits, so windows running side by side share
+    one capacity limit.
+    """
+
+    def __init__(
+        self,
+        place: Callable[[int], Awaitable[Optional[str]]],
+        wait_for_end: Callable[[str], Awaitable[str]],
+        concurrency: int,
+        slots: Optional[asyncio.Semaphore] = None,
+        clock=time.monotonic
+    ):
+        self._place = place
+        self._wait_for_end = wait_for_end
+        self.concurrency = concurrency
+        self._slots = slots
+        self._clock = clock
+        self.timeline: Optional[ConcurrencyTimeline] = None
+
+    async def run(self, total: int) -> List[Dict]:
+        """Run calls 0..total-1; returns one result per call, in order."""
+        self.timeline = ConcurrencyTimeline(min(self.concurrency, total), self._clock)
+        results: List[Optional[Dict]] = [None] * total
+        next_index = 0
+
+        async def worker():
+            nonlocal next_index
+            while next_index < total:
+                index = next_index
+                next_index += 1
+                if self._slots is not None:
+                    async with self._slots:
+                        results[index] = await self._run_call(index)
+                else:
+                    results[index] = await self._run_call(index)
+
+        await asyncio.gather(*(worker() for _ in range(min(self.concurrency, total))))
+        return results
+
+    async def _run_call(self, index: int) -> Dict:
+        self.timeline.change(1)
+        call_sid = None
+        try:
+            call_sid = await self._place(index)
+            status = await self._wait_for_end(call_sid) if call_sid else "failed"
+        except Exception as e:
+            logger.error(f"Error running call {index + 1}: {str(e)}")
+            status = "failed"
+        finally:
+            self.timeline.change(-1)
+        return {"call_number": index + 1, "call_sid": call_sid, "status": status}
@@ -0,0 +1,86 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+class ConfigCache:
+    """
+    TTL cache with single-flight loading for rarely written, often read rows.
+
+    Concurrent `get` calls for a key that isn't cached share one `load` call.
+    Results, including "not found", are kept for `ttl_seconds` or until
+    `invalidate` drops them. A load that started before an invalidation is
+    returned to its waiters but not cached, so it can't resurrect stale data,
+    and later `get` calls start a fresh load instead of joining it.
+    """
+
+    def __init__(self, load: Callable[[Hashable], Awaitable[Any]], ttl_seconds: float = 60, clock=time.monotonic):
+        self._load = load
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+        self._loading: Dict[Hashable, asyncio.Future] = {}
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.loads = 0
+        self.invalidations = 0
+
+    async def get(self, key: Hashable) -> Any:
+        entry = self._entries.get(key)
+        if entry is not None and self._clock() - entry[0] < self.ttl_seconds:
+            self.hits += 1
+            return entry[1]
+
+        loading = self._loading.get(key)
+        if loading is not None:
+            self.coalesced += 1
+            return await asyncio.shield(loading)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._loading[key] = future
+        generation = self._generation
+        try:
+            self.loads += 1
+            value = await self._load(key)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception retrieved when nobody else was waiting
+            future.exception()
+            raise
+        finally:
+            # An invalidation may have replaced this load with a newer one
+            if self._loading.get(key) is future:
+                del self._loading[key]
+        if generation == self._generation:
+            self._entries[key] = (self._clock(), value)
+        future.set_result(value)
+        return value
+
+    def invalidate(self, match: Optional[Callable[[Hashable], bool]] = None) -> int:
+        """Drop cached entries whose key satisfies `match` (all entries if omitted). Returns the number dropped."""
+        self._generation += 1
+        self.invalidations += 1
+        keys = [key for key in self._entries if match is None or match(key)]
+        for key in keys:
+            del self._entries[key]
+        for key in [key for key in self._loading if match is None or match(key)]:
+            del self._loading[key]
+        return len(keys)
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "loads": self.loads,
+            "invalidations": self.invalidations,
+            "hit_rate": round((self.hits + self.coalesced) / lookups, 3) if lookups else None
+        }
@@ -0,0 +1,259 @@
+import asyncio
+import logging
+import random
+import time
+from collections import OrderedDict
+from datetime import datetime, UTC
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+class DialRequest:
+    """One outbound call of a dial job and what happened to it."""
+
+    __slots__ = (
+        "job_id", "call_number", "to_number", "simulation_id", "persona", "instructions",
+        "record_id", "call_sid", "status", "attempts", "error", "queued_at", "dialed_at"
+    )
+
+    def __init__(
+        self,
+        job_id: str,
+        call_number: int,
+        to_number: str,
+        simulation_id: str,
+        persona: Optional[Dict] = None,
+        instructions: Optional[str] = None
+    ):
+        self.job_id = job_id
+        self.call_number = call_number
+        self.to_number = to_number
+        self.simulation_id = simulation_id
+        self.persona = persona
+        # System message for the call; rendered from the persona when not given
+        self.instructions = instructions
+        # Set by the dial function as it goes, so a retry doesn't redo completed steps
+        self.record_id: Optional[str] = None
+        self.call_sid: Optional[str] = None
+        self.status = "queued"  # queued -> dialing -> initiated | failed
+        self.attempts = 0
+        self.error: Optional[str] = None
+        self.queued_at = datetime.now(UTC).isoformat()
+        self.dialed_at: Optional[str] = None
+
+    def to_dict(self) -> Dict:
+        return {
+            "job_id": self.job_id,
+            "call_number": self.call_number,
+            "to_number": self.to_number,
+            "call_sid": self.call_sid,
+            "status": self.status,
+            "attempts": self.attempts,
+            "error": self.error,
+            "queued_at": self.queued_at,
+            "dialed_at": self.dialed_at
+        }
+
+
+class DialJob:
+    """A batch of dial requests submitted together."""
+
+    def __init__(self, job_id: str, requests: List[DialRequest]):
+        self.job_id = job_id
+        self.requests = requests
+        self.created_at = datetime.now(UTC).isoformat()
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def done(self) -> bool:
+        return all(request.status in ("initiated", "failed") for request in self.requests)
+
+    async def wait(self) -> List[DialRequest]:
+        """Wait until every request has been dialed or has failed."""
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        return self.requests
+
+    def to_dict(self) -> Dict:
+        counts: Dict[str, int] = {}
+        for request in self.requests:
+            counts[request.status] = counts.get(request.status, 0) + 1
+        return {
+            "job_id": self.job_id,
+            "created_at": self.created_at,
+            "done": self.done,
+            "counts": counts,
+            "calls": [request.to_dict() for request in self.requests]
+        }
+
+
+class TokenBucket:
+    """Allows `rate` acquisitions per second on average, with bursts of up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float = 1, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = capacity
+        self._updated = clock()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> float:
+        """Take one token, sleeping until one is available. Returns the seconds waited."""
+        waited = 0.0
+        # Waiters take turns, so tokens go out in arrival order
+        async with self._lock:
+            while True:
+                now = self._clock()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+                waited += delay
+                await asyncio.sleep(delay)
+
+
+# Failures to get a connection, raised before the request was sent
+_NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+def is_retryable_dial_error(error: Exception) -> bool:
+    """
+    Only retry dials that certainly didn't place a call: Twilio rate limiting
+    (429) and connection errors raised before the request was sent. Creating
+    a call isn't idempotent, so a 5xx or a timeout may have placed it already.
+    """
+    if isinstance(error, _NOT_SENT_ERRORS):
+        return True
+    status = getattr(error, "status", None) or getattr(error, "status_code", None)
+    return status == 429
+
+
+class DialDispatcher:
+    """
+    Places outbound calls concurrently under the account's calls-per-second limit.
+
+    The `dial` callable places one call and returns its SID. Every attempt
+    first takes a token from a bucket refilled at `calls_per_second`, and at most
+    `max_concurrency` dials are in flight. Failures that `is_retryable`
+    accepts are retried up to `max_retries` times after an exponential
+    backoff with full jitter, without holding a concurrency slot. Jobs are kept for status queries; the oldest
+    finished jobs are dropped beyond `max_jobs`.
+    """
+
+    def __init__(
+        self,
+        dial: Callable[[DialRequest], Awaitable[str]],
+        calls_per_second: float = 1.0,
+        burst: int = 1,
+        max_concurrency: int = 10,
+        max_retries: int = 3,
+        retry_base_delay: float = 1.0,
+        retry_max_delay: float = 30.0,
+        is_retryable: Callable[[Exception], bool] = is_retryable_dial_error,
+        max_jobs: int = 1000,
+        clock=time.monotonic,
+        rng: random.Random = random
+    ):
+        self._dial = dial
+        self.bucket = TokenBucket(calls_per_second, burst, clock)
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self._is_retryable = is_retryable
+        self.max_jobs = max_jobs
+        self._rng = rng
+        self._jobs: "OrderedDict[str, DialJob]" = OrderedDict()
+        self.dialed = 0
+        self.failed = 0
+        self.retries = 0
+        self.rate_limit_wait_seconds = 0.0
+        self._in_flight = 0
+
+    def submit(self, job_id: str, requests: List[DialRequest]) -> DialJob:
+        """Start dialing `requests` in the background and return the job tracking them."""
+        job = DialJob(job_id, requests)
+        job._tasks = [asyncio.create_task(self._run(request)) for request in requests]
+        self._jobs[job_id] = job
+        self._prune_jobs()
+        return job
+
+    async def dial(self, request: DialRequest) -> DialRequest:
+        """Dial a single request under the same limits and wait for the outcome, without tracking it as a job."""
+        await self._run(request)
+        return request
+
+    def get_job(self, job_id: str) -> Optional[DialJob]:
+        return self._jobs.get(job_id)
+
+    async def close(self) -> None:
+        tasks = [task for job in self._jobs.values() for task in job._tasks if not task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict:
+        return {
+            "jobs": len(self._jobs),
+            "in_flight": self._in_flight,
+            "dialed": self.dialed,
+            "failed": self.failed,
+            "retries": self.retries,
+            "calls_per_second": self.bucket.rate,
+            "rate_limit_wait_seconds": round(self.rate_limit_wait_seconds, 3)
+        }
+
+    async def _run(self, request: DialRequest) -> None:
+        while True:
+            async with self._slots:
+                self._in_flight += 1
+                try:
+                    delay = await self._attempt(request)
+                finally:
+                    self._in_flight -= 1
+            if delay is None:
+                return
+            # Back off outside the slot, so waiting retries don't hold up other dials
+            await asyncio.sleep(delay)
+
+    async def _attempt(self, request: DialRequest) -> Optional[float]:
+        """Dial once. Returns the backoff before the next attempt, or None once the request is settled."""
+        self.rate_limit_wait_seconds += await self.bucket.acquire()
+        request.status = "dialing"
+        request.attempts += 1
+        try:
+            request.call_sid = await self._dial(request)
+        except asyncio.CancelledError:
+            request.status = "failed"
+            request.error = "cancelled"
+            raise
+        except Exception as e:
+            request.error = str(e)
+            if request.attempts <= self.max_retries and self._is_retryable(e):
+                delay = self._rng.uniform(0, min(self.retry_max_delay, self.retry_base_delay * 2 ** (request.attempts - 1)))
+                logger.warning(f"Dial {request.job_id}#{request.call_number} failed (attempt {request.attempts}), retrying in {delay:.2f}s: {str(e)}")
+                self.retries += 1
+                request.status = "queued"
+                return delay
+            logger.error(f"Dial {request.job_id}#{request.call_number} failed: {str(e)}")
+            request.status = "failed"
+            self.failed += 1
+            return None
+        request.status = "initiated"
+        request.error = None
+        request.dialed_at = datetime.now(UTC).isoformat()
+        self.dialed += 1
+        return None
+
+    def _prune_jobs(self) -> None:
+        while len(self._jobs) > self.max_jobs:
+            oldest_id = next((job_id for job_id, job in self._jobs.items() if job.done), None)
+            if oldest_id is None:
+                return
+            del self._jobs[oldest_id]
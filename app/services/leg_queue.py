@@ -0,0 +1,176 @@
+import asyncio
+import base64
+import logging
+import time
+from collections import deque
+from typing import Awaitable, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+# Overflow policies for audio items once a queue is full. Control messages are never dropped.
+DROP_OLDEST = "drop_oldest"    # discard the stalest queued audio to make room
+DROP_NEWEST = "drop_newest"    # discard the incoming audio
+COALESCE = "coalesce"          # append the incoming audio to the last queued item if it is audio, else drop the stalest audio
+OVERFLOW_POLICIES = (DROP_OLDEST, DROP_NEWEST, COALESCE)
+
+_AUDIO = 0
+_CONTROL = 1
+_DROPPABLE_CONTROL = 2
+
+
+def _join_base64(first: str, second: str) -> str:
+    # Unpadded base64 can be concatenated directly; padded chunks have to be re-encoded
+    if not first.endswith("="):
+        return first + second
+    return base64.b64encode(base64.b64decode(first) + base64.b64decode(second)).decode('utf-8')
+
+
+class LegSendQueue:
+    """
+    Bounded send queue feeding one leg of the media bridge from its own sender task.
+
+    The opposite leg's read loop only enqueues, so a slow peer fills this queue
+    instead of stalling the reader. Audio items hold base64 payloads and are
+    rendered to wire messages by `render_audio` at send time, which lets the
+    coalesce policy merge them; control items are pre-serialized messages.
+
+    Control items count toward `maxsize`: one arriving at a full queue evicts
+    the stalest audio. Audio is never merged across a control item, so a mark
+    still follows exactly the audio that was queued before it, and dropping
+    audio keeps its mark. Only a queue holding nothing but control items grows
+    past `maxsize`.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        send: Callable[[str], Awaitable],
+        render_audio: Callable[[str], str],
+        maxsize: int = 100,
+        policy: str = DROP_OLDEST,
+        clock=time.monotonic
+    ):
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy {policy!r}, expected one of {OVERFLOW_POLICIES}")
+        self.name = name
+        self.maxsize = maxsize
+        self.policy = policy
+        self._send = send
+        self._render_audio = render_audio
+        self._clock = clock
+        self._items = deque()
+        self._ready = asyncio.Event()
+        self.closed = False
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.cleared = 0
+        self.max_depth = 0
+        self.last_lag_ms = 0.0
+        self.max_lag_ms = 0.0
+        self._total_lag_ms = 0.0
+
+    def __len__(self):
+        return len(self._items)
+
+    def put_audio(self, payload: str) -> bool:
+        """Enqueue a base64 audio payload, applying the overflow policy. Returns False if it was dropped."""
+        if self.closed:
+            return False
+        if len(self._items) >= self.maxsize:
+            if self.policy == COALESCE and self._items and self._items[-1][0] == _AUDIO:
+                # Only the tail item; merging into audio behind a mark would get the mark acknowledged early
+                self._items[-1][1] = _join_base64(self._items[-1][1], payload)
+                self.coalesced += 1
+                return True
+            self.dropped += 1
+            if self.policy == DROP_NEWEST or not self._drop_oldest_audio():
+                # Under drop_newest, or when only control messages are queued, the incoming audio goes
+                return False
+        self._append([_AUDIO, payload, self._clock()])
+        return True
+
+    def put_control(self, message: str, droppable: bool = False) -> None:
+        """
+        Enqueue a serialized control message. It is never dropped; at a full
+        queue the stalest audio makes room for it.
+
+        Droppable control messages (such as Twilio marks that follow an audio
+        chunk) are removed together with queued audio by `clear_audio`.
+        """
+        if self.closed:
+            return
+        if len(self._items) >= self.maxsize and self._drop_oldest_audio():
+            self.dropped += 1
+        self._append([_DROPPABLE_CONTROL if droppable else _CONTROL, message, self._clock()])
+
+    def clear_audio(self) -> int:
+        """
+        Drop all queued audio and droppable control messages.
+
+        Returns the number of droppable control messages removed, which are
+        always the newest ones the caller enqueued.
+        """
+        kept = deque(item for item in self._items if item[0] == _CONTROL)
+        controls_removed = sum(1 for item in self._items if item[0] == _DROPPABLE_CONTROL)
+        self.cleared += len(self._items) - len(kept) - controls_removed
+        self._items = kept
+        return controls_removed
+
+    def close(self) -> None:
+        self.closed = True
+        self._ready.set()
+
+    async def run(self) -> None:
+        """Sender task: drain the queue into the peer socket until closed or the send fails."""
+        try:
+            while True:
+                if not self._items:
+                    if self.closed:
+                        return
+                    self._ready.clear()
+                    await self._ready.wait()
+                    continue
+                kind, data, enqueued_at = self._items.popleft()
+                message = self._render_audio(data) if kind == _AUDIO else data
+                await self._send(message)
+                lag_ms = (self._clock() - enqueued_at) * 1000
+                self.sent += 1
+                self.last_lag_ms = lag_ms
+                self._total_lag_ms += lag_ms
+                if lag_ms > self.max_lag_ms:
+                    self.max_lag_ms = lag_ms
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error in {self.name} sender: {str(e)}")
+        finally:
+            self.closed = True
+
+    def stats(self) -> Dict:
+        return {
+            "policy": self.policy,
+            "maxsize": self.maxsize,
+            "depth": len(self._items),
+            "max_depth": self.max_depth,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+            "cleared": self.cleared,
+            "last_lag_ms": round(self.last_lag_ms, 2),
+            "avg_lag_ms": round(self._total_lag_ms / self.sent, 2) if self.sent else None,
+            "max_lag_ms": round(self.max_lag_ms, 2)
+        }
+
+    def _append(self, item) -> None:
+        self._items.append(item)
+        if len(self._items) > self.max_depth:
+            self.max_depth = len(self._items)
+        self._ready.set()
+
+    def _drop_oldest_audio(self) -> bool:
+        for index, item in enumerate(self._items):
+            if item[0] == _AUDIO:
+                del self._items[index]
+                return True
+        return False
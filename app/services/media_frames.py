@@ -0,0 +1,149 @@
+import base64
+import json
+import re
+from typing import Dict
+
+
+def passthrough_payload(delta: str, passthrough: bool = True) -> str:
+    """
+    Return the base64 μ-law payload to forward to Twilio.
+
+    OpenAI already emits g711_ulaw audio as base64, which is exactly what Twilio
+    expects, so in passthrough mode the string is forwarded untouched. With
+    passthrough disabled the payload is decoded and re-encoded, which validates
+    it at the cost of two base64 passes per frame.
+    """
+    if passthrough:
+        return delta
+    return base64.b64encode(base64.b64decode(delta)).decode('utf-8')
+
+
+class TwilioMediaFrame:
+    """
+    Pre-serialized outbound Twilio `media` frame for a single stream.
+
+    The JSON around the payload never changes for a stream, so it is rendered
+    once and each frame is built with two string concatenations. Base64 only
+    uses characters that need no JSON escaping.
+    """
+
+    __slots__ = ("stream_sid", "_prefix", "_suffix")
+
+    def __init__(self, stream_sid: str):
+        self.stream_sid = stream_sid
+        self._prefix = '{"event":"media","streamSid":' + json.dumps(stream_sid) + ',"media":{"payload":"'
+        self._suffix = '"}}'
+
+    def render(self, payload: str) -> str:
+        return self._prefix + payload + self._suffix
+
+    def mark(self, name: str) -> str:
+        return json.dumps({"event": "mark", "streamSid": self.stream_sid, "mark": {"name": name}})
+
+    def clear(self) -> str:
+        return json.dumps({"event": "clear", "streamSid": self.stream_sid})
+
+
+def input_audio_append(payload: str) -> str:
+    """Serialize an `input_audio_buffer.append` event for the OpenAI realtime socket."""
+    return '{"type":"input_audio_buffer.append","audio":"' + payload + '"}'
+
+
+# Twilio and OpenAI both put the event name first in every frame, so it can be
+# read with an anchored match instead of parsing the whole message. Anything
+# that does not match falls back to a full json.loads.
+_TWILIO_EVENT = re.compile(r'\{\s*"event"\s*:\s*"([^"\\]*)"')
+_OPENAI_TYPE = re.compile(r'\{\s*"type"\s*:\s*"([^"\\]*)"')
+_TIMESTAMP = re.compile(r'"timestamp"\s*:\s*"?(\d+)')
+
+
+def _string_field(message: str, key: str, start: int):
+    """
+    Return the string value of `"key": "..."` found after `start`, or None.
+
+    Uses plain `str.find` so long base64 values are sliced rather than scanned
+    by the regex engine. Escaped values are left to the full JSON parser.
+    """
+    i = message.find(key, start)
+    if i < 0:
+        return None
+    i = message.find(':', i + len(key))
+    if i < 0:
+        return None
+    i = message.find('"', i)
+    j = message.find('"', i + 1)
+    if i < 0 or j < 0:
+        return None
+    value = message[i + 1:j]
+    if '\\' in value:
+        return None
+    return value
+
+
+class Frame:
+    """
+    A websocket frame whose JSON body is only parsed on first access to `data`.
+
+    Audio frames carry their payload (and Twilio media timestamp or OpenAI item
+    id) as attributes so the hot path never needs the parsed body.
+    """
+
+    __slots__ = ("kind", "raw", "payload", "timestamp", "item_id", "_data")
+
+    def __init__(self, kind, raw, payload=None, timestamp=None, item_id=None, data=None):
+        self.kind = kind
+        self.raw = raw
+        self.payload = payload
+        self.timestamp = timestamp
+        self.item_id = item_id
+        self._data = data
+
+    @property
+    def data(self) -> Dict:
+        if self._data is None:
+            self._data = json.loads(self.raw)
+        return self._data
+
+
+def decode_twilio_frame(message: str) -> Frame:
+    """Decode a Twilio media stream message, extracting `media` frames without parsing them."""
+    match = _TWILIO_EVENT.match(message)
+    if match is None:
+        data = json.loads(message)
+        frame = Frame(data.get('event'), message, data=data)
+    else:
+        frame = Frame(match.group(1), message)
+
+    if frame.kind == 'media':
+        if frame._data is None:
+            payload = _string_field(message, '"payload"', match.end())
+            timestamp = _TIMESTAMP.search(message, match.end())
+            if payload is not None and timestamp is not None:
+                frame.payload = payload
+                frame.timestamp = int(timestamp.group(1))
+                return frame
+        media = frame.data['media']
+        frame.payload = media['payload']
+        frame.timestamp = int(media['timestamp'])
+    return frame
+
+
+def decode_openai_frame(message: str) -> Frame:
+    """Decode an OpenAI realtime event, extracting `response.audio.delta` frames without parsing them."""
+    match = _OPENAI_TYPE.match(message)
+    if match is None:
+        data = json.loads(message)
+        frame = Frame(data.get('type'), message, data=data)
+    else:
+        frame = Frame(match.group(1), message)
+
+    if frame.kind == 'response.audio.delta':
+        if frame._data is None:
+            delta = _string_field(message, '"delta"', match.end())
+            if delta is not None:
+                frame.payload = delta
+                frame.item_id = _string_field(message, '"item_id"', match.end())
+                return frame
+        frame.payload = frame.data.get('delta')
+        frame.item_id = frame.data.get('item_id')
+    return frame
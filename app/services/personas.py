@@ -0,0 +1,108 @@
+import itertools
+import math
+import random
+from typing import Dict, List, Optional
+
+# Test configuration fields that vary the simulated caller; list values are the variants to choose from
+PERSONA_FIELDS = (
+    "accent_types",
+    "industry",
+    "speaking_pace",
+    "emotion_types",
+    "background_noise",
+    "max_turns",
+    "complexity_level",
+    "prompt_template",
+)
+PERSONA_DEFAULTS = {
+    "accent_types": "neutral",
+    "industry": "general service",
+}
+# Above this many combinations the matrix is stratified per field instead of enumerated
+MAX_ENUMERATED_COMBINATIONS = 10000
+
+
+def persona_options(config: Dict) -> Dict[str, List]:
+    """The variants available for each persona field of a test configuration."""
+    options = {}
+    for field in PERSONA_FIELDS:
+        value = config.get(field)
+        if isinstance(value, list):
+            options[field] = list(value) or [PERSONA_DEFAULTS.get(field)]
+        elif value is not None:
+            options[field] = [value]
+        else:
+            options[field] = [PERSONA_DEFAULTS.get(field)]
+    return options
+
+
+def sample_persona(config: Dict, rng: random.Random = random) -> Dict:
+    """Pick one variant per field at random."""
+    return {field: rng.choice(values) for field, values in persona_options(config).items()}
+
+
+def expand_persona_matrix(config: Dict, num_calls: int, seed: Optional[int] = None) -> List[Dict]:
+    """
+    Assign a persona to each of `num_calls` call slots.
+
+    When there are no more combinations than calls, every combination is
+    used and the matrix is repeated in a shuffled order. Otherwise each
+    field's variants are spread evenly across the slots (counts differ by at
+    most one) and shuffled independently. The same config, call count and
+    seed always give the same assignment.
+    """
+    rng = random.Random(seed)
+    options = persona_options(config)
+    fields = list(options)
+    total = math.prod(len(values) for values in options.values())
+
+    if total <= num_calls and total <= MAX_ENUMERATED_COMBINATIONS:
+        combinations = list(itertools.product(*options.values()))
+        rng.shuffle(combinations)
+        slots = [combinations[i % total] for i in range(num_calls)]
+    else:
+        columns = []
+        for values in options.values():
+            column = [values[i % len(values)] for i in range(num_calls)]
+            rng.shuffle(column)
+            columns.append(column)
+        slots = list(zip(*columns))
+    return [dict(zip(fields, slot)) for slot in slots]
+
+
+def persona_label(persona: Dict) -> str:
+    """Stable, human-readable key for grouping results by persona."""
+    return "/".join(str(persona.get(field)) for field in PERSONA_FIELDS if persona.get(field) is not None)
+
+
+def render_instructions(persona: Dict) -> str:
+    """Render the system message for a persona."""
+    message_parts = []
+
+    # Basic role and context
+    message_parts.append(f"You are a {persona.get('accent_types') or 'neutral'} speaking customer service agent")
+    message_parts.append(f"in the {persona.get('industry') or 'general service'} industry")
+
+    # Speaking characteristics
+    if persona.get('speaking_pace'):
+        message_parts.append(f"Speak at a {persona['speaking_pace']} pace")
+    if persona.get('emotion_types'):
+        message_parts.append(f"Express {persona['emotion_types']} emotions")
+
+    # Background conditions
+    if persona.get('background_noise'):
+        message_parts.append(f"You are in an environment with {persona['background_noise']} background noise")
+
+    # Conversation parameters
+    if persona.get('max_turns'):
+        message_parts.append(f"Limit the conversation to approximately {persona['max_turns']} turns")
+    if persona.get('complexity_level'):
+        message_parts.append(f"Maintain a complexity level of {persona['complexity_level']} in your responses")
+
+    # Template and specific instructions
+    if persona.get('prompt_template'):
+        message_parts.append(persona['prompt_template'])
+
+    # Always end with goodbye instruction
+    message_parts.append("IMPORTANT: End the conversation by saying ONLY 'Goodbye!' or 'Bye!' as your last message.")
+    return " ".join(message_parts)
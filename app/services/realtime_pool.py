@@ -0,0 +1,156 @@
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from typing import Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class RealtimeSessionPool:
+    """
+    Pool of pre-connected, pre-initialized OpenAI Realtime websocket sessions.
+
+    `connect` returns an awaitable websocket connection (e.g. a `websockets.connect(...)`
+    call); every session gets `session_update` sent before it is pooled, so a
+    media stream can start forwarding audio as soon as it acquires one. The
+    pool is sized from the expected call rate and the observed handshake time,
+    refilled by a background task, and sessions idle for longer than
+    `max_idle_seconds` are recycled before the server times them out.
+    """
+
+    def __init__(
+        self,
+        connect: Callable,
+        session_update: str,
+        calls_per_second: float = 0.5,
+        min_size: int = 1,
+        max_size: int = 20,
+        max_idle_seconds: float = 300,
+        refill_interval: float = 1.0,
+        clock=time.monotonic
+    ):
+        self._connect = connect
+        self._session_update = session_update
+        self.calls_per_second = calls_per_second
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_idle_seconds = max_idle_seconds
+        self.refill_interval = refill_interval
+        self._clock = clock
+        self._idle = deque()  # (websocket, connected_at)
+        self._connecting = 0
+        self._refill_needed = asyncio.Event()
+        self._refill_task = None
+        self.hits = 0
+        self.misses = 0
+        self.recycled = 0
+        self.failures = 0
+        self._handshake_ms = deque(maxlen=200)
+
+    @property
+    def target_size(self) -> int:
+        """Sessions to keep warm: enough to cover the call rate for two refill cycles."""
+        if not self._refill_task:
+            return 0
+        handshake_s = (sum(self._handshake_ms) / len(self._handshake_ms) / 1000) if self._handshake_ms else 1.0
+        wanted = math.ceil(self.calls_per_second * (handshake_s + self.refill_interval) * 2)
+        return max(self.min_size, min(self.max_size, wanted))
+
+    async def start(self) -> None:
+        if self._refill_task is None:
+            self._refill_task = asyncio.create_task(self._refill_loop())
+            logger.info(f"Realtime session pool started (target size {self.target_size})")
+
+    async def close(self) -> None:
+        if self._refill_task is not None:
+            self._refill_task.cancel()
+            self._refill_task = None
+        while self._idle:
+            websocket, _ = self._idle.popleft()
+            await websocket.close()
+
+    async def acquire(self):
+        """Return an initialized session, warm from the pool if one is available."""
+        now = self._clock()
+        while self._idle:
+            websocket, connected_at = self._idle.popleft()
+            if websocket.open and now - connected_at < self.max_idle_seconds:
+                self.hits += 1
+                self._refill_needed.set()
+                return websocket
+            self.recycled += 1
+            asyncio.create_task(websocket.close())
+
+        self.misses += 1
+        self._refill_needed.set()
+        return await self._open_session()
+
+    def stats(self) -> Dict:
+        handshakes = sorted(self._handshake_ms)
+        requests = self.hits + self.misses
+        return {
+            "idle": len(self._idle),
+            "connecting": self._connecting,
+            "target_size": self.target_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / requests, 3) if requests else None,
+            "recycled": self.recycled,
+            "failures": self.failures,
+            "avg_handshake_ms": round(sum(handshakes) / len(handshakes), 2) if handshakes else None,
+            "p95_handshake_ms": handshakes[min(len(handshakes) - 1, int(len(handshakes) * 0.95))] if handshakes else None
+        }
+
+    async def _open_session(self):
+        started = self._clock()
+        websocket = await self._connect()
+        try:
+            await websocket.send(self._session_update)
+        except Exception:
+            await websocket.close()
+            raise
+        self._handshake_ms.append(round((self._clock() - started) * 1000, 2))
+        return websocket
+
+    async def _add_session(self) -> None:
+        self._connecting += 1
+        try:
+            websocket = await self._open_session()
+            self._idle.append((websocket, self._clock()))
+        except Exception as e:
+            self.failures += 1
+            logger.error(f"Error pre-connecting realtime session: {str(e)}")
+            await asyncio.sleep(self.refill_interval)
+        finally:
+            self._connecting -= 1
+
+    def _recycle_stale(self) -> None:
+        now = self._clock()
+        while self._idle:
+            websocket, connected_at = self._idle[0]
+            if websocket.open and now - connected_at < self.max_idle_seconds:
+                break
+            self._idle.popleft()
+            self.recycled += 1
+            asyncio.create_task(websocket.close())
+
+    async def _refill_loop(self) -> None:
+        while True:
+            try:
+                self._recycle_stale()
+                missing = self.target_size - len(self._idle) - self._connecting
+                if missing > 0:
+                    await asyncio.gather(*(self._add_session() for _ in range(missing)))
+                    continue
+                self._refill_needed.clear()
+                try:
+                    await asyncio.wait_for(self._refill_needed.wait(), self.refill_interval)
+                except asyncio.TimeoutError:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error in realtime session pool refill: {str(e)}")
+                await asyncio.sleep(self.refill_interval)
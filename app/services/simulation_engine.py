@@ -0,0 +1,357 @@
+import asyncio
+import logging
+from collections import Counter
+from datetime import datetime, timedelta, UTC
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from app.database import (
+    claim_simulation,
+    claim_simulation_slot,
+    create_simulation,
+    get_active_simulations,
+    get_simulation,
+    get_simulation_slot,
+    get_simulation_slots,
+    release_simulation_leases,
+    renew_simulation_leases,
+    stop_queued_slots,
+    update_simulation,
+    update_simulation_slot,
+    update_simulation_status
+)
+from app.services.call_window import SlidingWindow
+from app.services.dial_dispatcher import DialRequest
+from app.services.personas import persona_label, render_instructions
+from app.services.write_behind import CallPersister
+
+logger = logging.getLogger(__name__)
+
+# Slot states that hold a window slot; anything else but "queued" is final
+ACTIVE_SLOT_STATES = ("dialing", "in_progress")
+
+# Error of a slot whose dial was interrupted before its call SID was stored
+INTERRUPTED_DIAL_ERROR = "Dial interrupted before the call SID was stored; the call may have been placed"
+
+
+def progress_counters(counts: Counter) -> Dict[str, int]:
+    """Simulation progress columns from the number of slots in each state."""
+    active = sum(counts[state] for state in ACTIVE_SLOT_STATES)
+    finished = sum(counts.values()) - counts["queued"] - active
+    return {
+        "queued_calls": counts["queued"],
+        "active_calls": active,
+        "completed_calls": counts["completed"],
+        "stopped_calls": counts["stopped"],
+        # Twilio's failure statuses (busy, no-answer, ...), failed dials and timeouts
+        "failed_calls": finished - counts["completed"] - counts["stopped"]
+    }
+
+
+class SimulationRun:
+    """In-process state of one running simulation."""
+
+    def __init__(self, simulation: Dict, slots: List[Dict], flush_interval: float):
+        self.id = simulation["id"]
+        self.target_phone = simulation["target_phone"]
+        self.concurrency = simulation["concurrent_calls"]
+        self.slots = slots
+        self.counts = Counter(slot["status"] for slot in slots)
+        self.by_call_sid = {slot["call_sid"]: slot for slot in slots if slot.get("call_sid")}
+        self.stopping = False
+        self.task: Optional[asyncio.Task] = None
+        self.persister = CallPersister(
+            f"simulation {self.id}",
+            lambda fields: update_simulation(self.id, fields),
+            flush_interval=flush_interval
+        )
+
+    def progress(self) -> Dict[str, int]:
+        return progress_counters(self.counts)
+
+
+class SimulationEngine:
+    """
+    Durable execution of simulations.
+
+    A simulation is a `simulations` row plus one `simulation_call_slots` row
+    per call to place. Every slot moves from queued to dialing to
+    in_progress to a final status, and each move is written to its row.
+
+    A process runs a simulation while it holds its lease: the simulation row
+    names the `owner` and when the lease expires, and a heartbeat renews it
+    every third of `lease_seconds`. `start` and every heartbeat take over
+    initiated or running simulations whose lease has expired, e.g. because
+    their process stopped: slots with a call SID are waited on again, queued
+    slots are dialed, and slots left dialing without a call SID are failed,
+    since Twilio may have placed their call. A slot is only dialed after a
+    conditional update moves it out of `queued`, so a call is never placed
+    twice. Calls run through a
+    sliding window of the simulation's `concurrent_calls`. Progress counters
+    are kept in memory and written behind to the simulation row. `stop` stops
+    dialing and hangs up the calls in flight, also when another process
+    runs the simulation; `close` releases the leases so the next process
+    picks the simulations up at once.
+
+    `dial(request)` places a call and returns the request with its outcome,
+    `wait_for_end(call_sid)` returns the call's final status and
+    `hang_up(call_sid)` ends a call.
+    """
+
+    def __init__(
+        self,
+        dial: Callable[[DialRequest], Awaitable[DialRequest]],
+        wait_for_end: Callable[[str], Awaitable[str]],
+        hang_up: Callable[[str], Awaitable[None]],
+        slots: Optional[asyncio.Semaphore] = None,
+        flush_interval: float = 1.0,
+        owner: str = "default",
+        lease_seconds: float = 60.0
+    ):
+        self._dial = dial
+        self._wait_for_end = wait_for_end
+        self._hang_up = hang_up
+        self._slots = slots
+        self.flush_interval = flush_interval
+        self.owner = owner
+        self.lease_seconds = lease_seconds
+        self._runs: Dict[str, SimulationRun] = {}
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self.resumed = 0
+        self.lost_leases = 0
+
+    async def start(self) -> None:
+        """Resume the simulations nobody holds a lease on and start the heartbeat."""
+        await self.resume()
+        if self._heartbeat_task is None:
+            self._heartbeat_task = asyncio.create_task(self._heartbeat_loop())
+
+    async def close(self) -> None:
+        """Stop running simulations in this process without changing their stored status, and release their leases."""
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            self._heartbeat_task = None
+        runs = list(self._runs.values())
+        for run in runs:
+            run.task.cancel()
+        await asyncio.gather(*(run.task for run in runs), return_exceptions=True)
+        if runs:
+            await release_simulation_leases([run.id for run in runs], self.owner)
+
+    async def resume(self) -> int:
+        """Take over the initiated or running simulations whose lease has expired. Returns the number resumed."""
+        resumed = 0
+        for candidate in await get_active_simulations():
+            if candidate["id"] in self._runs:
+                continue
+            simulation = await claim_simulation(candidate["id"], self.owner, self._lease_expiry())
+            if simulation is None:
+                # Another process got there first
+                continue
+            try:
+                slots = await get_simulation_slots(simulation["id"])
+            except Exception as e:
+                logger.error(f"Error loading slots of simulation {simulation['id']}: {str(e)}")
+                continue
+            # Twilio may have placed a call whose SID was never stored, so such a slot is failed, not dialed again
+            for slot in slots:
+                if slot["status"] in ACTIVE_SLOT_STATES and not slot.get("call_sid"):
+                    slot["status"] = "failed"
+                    slot["error"] = INTERRUPTED_DIAL_ERROR
+                    await update_simulation_slot(slot["id"], {"status": "failed", "error": INTERRUPTED_DIAL_ERROR})
+            self._launch(simulation, slots)
+            resumed += 1
+            logger.info(f"Resumed simulation {simulation['id']} ({len(slots)} slots)")
+        self.resumed += resumed
+        return resumed
+
+    async def heartbeat(self) -> None:
+        """
+        Renew the leases of the simulations running here, give up those another
+        process has taken over, halt those stopped elsewhere, and resume
+        simulations whose lease has expired.
+        """
+        runs = dict(self._runs)
+        statuses = None
+        if runs:
+            statuses = await renew_simulation_leases(list(runs), self.owner, self._lease_expiry())
+        # After a failed renewal the leases are unknown; keep running and try again on the next beat
+        if statuses is not None:
+            for simulation_id, run in runs.items():
+                status = statuses.get(simulation_id)
+                if status is None:
+                    logger.warning(f"Lost the lease on simulation {simulation_id} to another process")
+                    self.lost_leases += 1
+                    run.task.cancel()
+                elif status == "stopped" and not run.stopping:
+                    logger.info(f"Simulation {simulation_id} was stopped by another process")
+                    await self._halt(run)
+        await self.resume()
+
+    async def create(
+        self,
+        target_phone: str,
+        concurrent_calls: int,
+        total_calls: int,
+        scenario: Dict,
+        personas: List[Optional[Dict]],
+        seed: Optional[int] = None,
+        user_id: str = "default"
+    ) -> str:
+        """Persist a simulation with one slot per persona and start running it."""
+        slots = []
+        for index, persona in enumerate(personas[:total_calls]):
+            instructions = scenario.get("system_message") or (render_instructions(persona) if persona else None)
+            slots.append({
+                "slot": index,
+                "persona": persona,
+                "persona_label": persona_label(persona) if persona else None,
+                "instructions": instructions
+            })
+        simulation_id = await create_simulation(
+            user_id=user_id,
+            target_phone=target_phone,
+            concurrent_calls=concurrent_calls,
+            scenario=scenario,
+            total_calls=total_calls,
+            seed=seed,
+            slots=slots,
+            owner=self.owner,
+            lease_expires_at=self._lease_expiry()
+        )
+        simulation = await get_simulation(simulation_id)
+        self._launch(simulation, await get_simulation_slots(simulation_id))
+        return simulation_id
+
+    async def stop(self, simulation_id: str) -> bool:
+        """Stop dialing a simulation's remaining calls and hang up the ones in flight. Returns False if unknown."""
+        run = self._runs.get(simulation_id)
+        if run is None:
+            simulation = await get_simulation(simulation_id)
+            if not simulation:
+                return False
+            if simulation["status"] in ("initiated", "running"):
+                # Not running here; stop it in place. A process running it fails to
+                # claim the stopped slots and hangs up its calls on its next heartbeat.
+                await stop_queued_slots(simulation_id)
+                await update_simulation_status(simulation_id, "stopped")
+            return True
+
+        stopped = await stop_queued_slots(simulation_id)
+        logger.info(f"Stopping simulation {simulation_id}: {stopped} queued calls stopped")
+        await self._halt(run)
+        return True
+
+    async def _halt(self, run: SimulationRun) -> None:
+        """Stop dialing a run's queued slots, whose rows are already stopped, and hang up its calls in flight."""
+        run.stopping = True
+        for slot in run.slots:
+            if slot["status"] == "queued":
+                self._count(run, slot, "stopped")
+        for slot in run.slots:
+            if slot["status"] == "in_progress" and slot.get("call_sid"):
+                try:
+                    await self._hang_up(slot["call_sid"])
+                except Exception as e:
+                    logger.error(f"Error hanging up call {slot['call_sid']}: {str(e)}")
+
+    def progress(self, simulation_id: str) -> Optional[Dict[str, int]]:
+        """Live progress counters of a simulation running in this process."""
+        run = self._runs.get(simulation_id)
+        return run.progress() if run else None
+
+    def stats(self) -> Dict:
+        return {
+            "owner": self.owner,
+            "running": len(self._runs),
+            "resumed": self.resumed,
+            "lost_leases": self.lost_leases,
+            "active_calls": sum(run.progress()["active_calls"] for run in self._runs.values())
+        }
+
+    def _lease_expiry(self) -> str:
+        return (datetime.now(UTC) + timedelta(seconds=self.lease_seconds)).isoformat()
+
+    async def _heartbeat_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                await self.heartbeat()
+            except Exception as e:
+                logger.error(f"Error renewing simulation leases: {str(e)}")
+
+    def _launch(self, simulation: Dict, slots: List[Dict]) -> None:
+        run = SimulationRun(simulation, slots, self.flush_interval)
+        run.persister.start()
+        self._runs[run.id] = run
+        run.task = asyncio.create_task(self._run(run))
+
+    async def _run(self, run: SimulationRun) -> None:
+        try:
+            await update_simulation_status(run.id, "running", updates=run.progress())
+            # Calls already in flight take their window slots first
+            pending = [slot for slot in run.slots if slot["status"] in ACTIVE_SLOT_STATES]
+            pending += [slot for slot in run.slots if slot["status"] == "queued"]
+
+            async def place(index: int) -> Optional[str]:
+                return await self._place(run, pending[index])
+
+            async def wait_for_end(call_sid: str) -> str:
+                status = await self._wait_for_end(call_sid)
+                await self._set_slot(run, run.by_call_sid[call_sid], status, ended_at=datetime.now(UTC).isoformat())
+                return status
+
+            window = SlidingWindow(place, wait_for_end, run.concurrency, slots=self._slots)
+            await window.run(len(pending))
+            await run.persister.close()
+            status = "stopped" if run.stopping else "completed"
+            await update_simulation_status(run.id, status, updates=run.progress())
+            logger.info(f"Simulation {run.id} {status}: {run.progress()}, concurrency {window.timeline.summary()['average']}")
+        except asyncio.CancelledError:
+            # Process shutdown: keep the stored status so the simulation resumes on the next start
+            await run.persister.close()
+            raise
+        except Exception as e:
+            logger.error(f"Error in simulation {run.id}: {str(e)}")
+            await run.persister.close()
+            await update_simulation_status(run.id, "failed", error=str(e), updates=run.progress())
+        finally:
+            self._runs.pop(run.id, None)
+
+    async def _place(self, run: SimulationRun, slot: Dict) -> Optional[str]:
+        if slot["status"] == "stopped":
+            return None
+        if slot.get("call_sid"):
+            # Resumed call that was already placed
+            return slot["call_sid"]
+
+        started_at = datetime.now(UTC).isoformat()
+        if not await claim_simulation_slot(slot["id"], {"status": "dialing", "started_at": started_at}):
+            # Stopped, or dialed by a process that took the simulation over
+            stored = await get_simulation_slot(slot["id"])
+            self._count(run, slot, stored["status"] if stored else "stopped")
+            return None
+        self._count(run, slot, "dialing")
+        slot["started_at"] = started_at
+        request = DialRequest(run.id, slot["slot"] + 1, run.target_phone, run.id, slot.get("persona"), slot.get("instructions"))
+        request.record_id = slot.get("record_id")
+        await self._dial(request)
+        if request.status != "initiated":
+            await self._set_slot(run, slot, "failed", record_id=request.record_id, error=request.error, attempts=request.attempts)
+            return None
+
+        run.by_call_sid[request.call_sid] = slot
+        await self._set_slot(run, slot, "in_progress", record_id=request.record_id, call_sid=request.call_sid, attempts=request.attempts)
+        if run.stopping:
+            await self._hang_up(request.call_sid)
+        return request.call_sid
+
+    async def _set_slot(self, run: SimulationRun, slot: Dict, status: str, **fields) -> None:
+        self._count(run, slot, status)
+        slot.update(fields)
+        await update_simulation_slot(slot["id"], {"status": status, **fields})
+
+    def _count(self, run: SimulationRun, slot: Dict, status: str) -> None:
+        run.counts[slot["status"]] -= 1
+        run.counts[status] += 1
+        slot["status"] = status
+        run.persister.update(run.progress())
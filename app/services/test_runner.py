@@ -1,5 +1,6 @@
-from typing import Dict, List
+from typing import Dict, List, Optional
 from datetime import datetime
+from uuid import uuid4
 import asyncio
 import logging
 import websockets
@@ -7,6 +8,8 @@ import json
 import base64
 
 # Import local modules
+from app.services.call_completion import CompletionNotifier
+from app.services.turn_aggregator import TurnAggregator
 from app.services.twilio_service import TwilioService
 from app.database import (
     update_simulation_status,
@@ -30,13 +33,25 @@ class TestRunner:
         simulation_id: str,
         target_phone: str,
         concurrent_calls: int,
-        scenario: Dict
+        scenario: Dict,
+        notifier: Optional[CompletionNotifier] = None
     ):
+        """
+        `notifier` is the call status cache fed by the status callback webhook;
+        the app's `app.voice_router.completion_notifier` unless given.
+
+        Simulations run through `SimulationEngine`; this runner is only used
+        by the live end-to-end test in tests/test_database.py.
+        """
+        if notifier is None:
+            # Imported here: the router module builds the app's services on import
+            from app.voice_router import completion_notifier as notifier
         self.simulation_id = simulation_id
         self.target_phone = target_phone
         self.concurrent_calls = concurrent_calls
         self.scenario = scenario
         self.twilio_service = TwilioService()
+        self.notifier = notifier
         self.active_calls: Dict[str, asyncio.Task] = {}
         self.should_stop = False
 
@@ -73,8 +88,12 @@ class TestRunner:
     async def handle_single_call(self, call_index: int):
         """
         Handle a single call simulation with real-time conversation.
+
+        The conversation runs until the scenario ends it or a status callback
+        reports that the call ended, whichever happens first; nothing is polled.
         """
         call_sid = None
+        ended = None
         try:
             logger.info(f"Call {call_index}: Target phone: {self.target_phone}")
             logger.info(f"Call {call_index}: From phone: {TWILIO_PHONE_NUMBER}")
@@ -102,52 +121,38 @@ class TestRunner:
                 call_sid = call.sid
                 logger.info(f"Call {call_index}: Call created with SID: {call_sid}")
                 self.active_calls[call_sid] = asyncio.current_task()
+                # Resolved by the status callback webhook when the call ends; waiting
+                # through `wait` lets the notifier forget the call once this task is cancelled
+                ended = asyncio.create_task(self.notifier.wait([call_sid]))
                 
                 # Create call record
                 logger.info(f"Call {call_index}: Creating call record in database...")
-                await create_call_record(self.simulation_id, call_sid)
+                await create_call_record(
+                    self.simulation_id,
+                    call_sid,
+                    phone_number=self.target_phone,
+                    user_id=str(uuid4()),
+                    instructions=self.scenario.get("system_message")
+                )
                 
                 # Process the conversation
                 logger.info(f"Call {call_index}: Starting conversation processing...")
-                conversation_transcript = []
+                conversation = asyncio.create_task(self.process_conversation(openai_ws, call_sid))
+                try:
+                    await asyncio.wait({conversation, ended}, return_when=asyncio.FIRST_COMPLETED)
+                finally:
+                    if not conversation.done():
+                        conversation.cancel()
+                        await asyncio.gather(conversation, return_exceptions=True)
                 
-                while True:
-                    # Receive message from OpenAI
-                    message = await openai_ws.recv()
-                    response = json.loads(message)
-                    
-                    # Handle different types of responses
-                    if response.get("type") == "conversation.item.input_audio_transcription.completed":
-                        transcript = response.get("transcript", "")
-                        logger.info(f"Call {call_index}: User said: {transcript}")
-                        conversation_transcript.append(f"User: {transcript}")
-                        
-                    elif response.get("type") == "response.text.delta" and "text" in response:
-                        assistant_text = response["text"]
-                        logger.info(f"Call {call_index}: Assistant said: {assistant_text}")
-                        conversation_transcript.append(f"Assistant: {assistant_text}")
-                    
-                    # Update database with conversation progress
-                    await update_call_transcript(
-                        simulation_id=self.simulation_id,
-                        call_sid=call_sid,
-                        transcript=conversation_transcript
-                    )
-                    
-                    # Check call status
-                    status = await self.twilio_service.get_call_status(call_sid)
-                    if status in ["completed", "failed", "no-answer"]:
-                        logger.info(f"Call {call_index}: Call ended with status: {status}")
-                        await update_call_record(self.simulation_id, call_sid, {"status": status})
-                        break
-                    
-                    # Check if we should end based on scenario
-                    if await self.should_end_conversation(conversation_transcript):
-                        logger.info(f"Call {call_index}: Conversation completed based on scenario")
-                        await update_call_record(self.simulation_id, call_sid, {"status": "completed"})
-                        break
-                    
-                    await asyncio.sleep(0.1)  # Small delay to prevent tight loop
+                if ended.done():
+                    status = ended.result()[call_sid]
+                    logger.info(f"Call {call_index}: Call ended with status: {status}")
+                else:
+                    status = conversation.result()
+                    logger.info(f"Call {call_index}: Conversation completed based on scenario")
+                if status:
+                    await update_call_record(self.simulation_id, call_sid, {"status": status})
                 
         except Exception as e:
             logger.error(f"Error in call {call_index}: {str(e)}")
@@ -155,6 +160,9 @@ class TestRunner:
                 await update_call_record(self.simulation_id, call_sid, {"status": "failed"})
             raise
         finally:
+            if ended is not None and not ended.done():
+                ended.cancel()
+                await asyncio.gather(ended, return_exceptions=True)
             if call_sid in self.active_calls:
                 del self.active_calls[call_sid]
 
@@ -179,28 +187,29 @@ class TestRunner:
         }
         await websocket.send(json.dumps(session_update))
 
-    async def process_conversation(self, websocket, call_sid: str):
+    async def process_conversation(self, websocket, call_sid: str) -> Optional[str]:
         """
         Process the conversation based on the scenario.
+
+        Returns the call's status once the scenario is done or the socket
+        closes, or None if the simulation was stopped. The transcript is
+        stored each time a turn is added, not for every message.
         """
         conversation_transcript = []
+        turns = TurnAggregator()
         
         try:
-            while not self.should_stop:
-                # Receive message from OpenAI
-                message = await websocket.recv()
-                response = json.loads(message)
+            async for message in websocket:
+                if self.should_stop:
+                    return None
+                finished = turns.feed(json.loads(message))
+                if not finished:
+                    continue
+                for turn in finished:
+                    logger.info(f"Call {call_sid}: {turn['role'].capitalize()} said: {turn['text']}")
+                    conversation_transcript.append(f"{turn['role'].capitalize()}: {turn['text']}")
                 
-                # Handle different types of responses
-                if response.get("type") == "conversation.item.input_audio_transcription.completed":
-                    transcript = response.get("transcript", "")
-                    conversation_transcript.append(f"User: {transcript}")
-                    
-                elif response.get("type") == "response.text.delta" and "text" in response:
-                    assistant_text = response["text"]
-                    conversation_transcript.append(f"Assistant: {assistant_text}")
-                
-                # Update database with conversation progress
+                # Update database with the new turns
                 await update_call_transcript(
                     simulation_id=self.simulation_id,
                     call_sid=call_sid,
@@ -209,16 +218,24 @@ class TestRunner:
                 
                 # Check if conversation should end based on scenario
                 if await self.should_end_conversation(conversation_transcript):
-                    await update_call_record(self.simulation_id, call_sid, {"status": "completed"})
-                    break
+                    return "completed"
         
         except websockets.exceptions.ConnectionClosed:
             logger.info(f"WebSocket connection closed for call {call_sid}")
-            await update_call_record(self.simulation_id, call_sid, {"status": "completed"})
         except Exception as e:
             logger.error(f"Error processing conversation for call {call_sid}: {str(e)}")
-            await update_call_record(self.simulation_id, call_sid, {"status": "failed"})
             raise
+        
+        # Keep the turn that was cut off when the socket closed
+        cut_off = turns.flush()
+        if cut_off:
+            conversation_transcript.extend(f"{turn['role'].capitalize()}: {turn['text']}" for turn in cut_off)
+            await update_call_transcript(
+                simulation_id=self.simulation_id,
+                call_sid=call_sid,
+                transcript=conversation_transcript
+            )
+        return "completed"
 
     async def should_end_conversation(self, transcript: List[str]) -> bool:
         """
@@ -0,0 +1,207 @@
+import json
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.services.call_metrics import message_started_at
+
+_SPEAKER_PREFIX = re.compile(r"^(\w+):\s*")
+_WHITESPACE = re.compile(r"\s+")
+
+# Analysis fields that count events, so a call's total is the sum over its chunks
+COUNT_FIELDS = {"required_clarifications", "special_requests", "upsell_attempts"}
+
+# Average length of a GPT token in English text
+CHARS_PER_TOKEN = 4
+
+
+@dataclass
+class TranscriptTurn:
+    """Consecutive messages of one speaker, starting `offset_seconds` into the call (None if unknown)."""
+    speaker: str
+    text: str
+    offset_seconds: Optional[float] = None
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough GPT token count of English text, without running a tokenizer."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _speaker_and_text(message: Dict) -> Tuple[str, str]:
+    text = message.get("message") or ""
+    speaker = (message.get("type") or "").capitalize()
+    match = _SPEAKER_PREFIX.match(text)
+    if match and (not speaker or match.group(1).lower() == speaker.lower()):
+        speaker = speaker or match.group(1).capitalize()
+        text = text[match.end():]
+    return speaker or "Unknown", _WHITESPACE.sub(" ", text).strip()
+
+
+def compact_transcript(message_timestamps: List[Dict]) -> List[TranscriptTurn]:
+    """
+    Transcript turns of a call, with consecutive messages of the same speaker
+    merged and each turn's start given relative to the start of the call.
+    Empty messages are dropped.
+    """
+    turns: List[TranscriptTurn] = []
+    call_started = None
+    for message in message_timestamps:
+        speaker, text = _speaker_and_text(message)
+        if not text:
+            continue
+        started = message_started_at(message)
+        if call_started is None:
+            call_started = started
+        if turns and turns[-1].speaker == speaker:
+            turns[-1].text += " " + text
+            continue
+        offset = None
+        if started is not None and call_started is not None:
+            offset = max(0.0, (started - call_started).total_seconds())
+        turns.append(TranscriptTurn(speaker, text, offset))
+    return turns
+
+
+def format_offset(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+
+def render_turn(turn: TranscriptTurn, timestamps: bool = True) -> str:
+    line = f"{turn.speaker}: {turn.text}"
+    if timestamps and turn.offset_seconds is not None:
+        line = f"[{format_offset(turn.offset_seconds)}] {line}"
+    return line
+
+
+def render_transcript(turns: List[TranscriptTurn], timestamps: bool = True) -> str:
+    """One line per turn, prefixed with its [minutes:seconds] into the call unless `timestamps` is False."""
+    return "\n".join(render_turn(turn, timestamps) for turn in turns)
+
+
+def transcript_tokens(turns: List[TranscriptTurn]) -> int:
+    return estimate_tokens(render_transcript(turns))
+
+
+def _split_turn(turn: TranscriptTurn, max_tokens: int) -> List[TranscriptTurn]:
+    """Split a turn too long for one chunk at word boundaries."""
+    if estimate_tokens(render_turn(turn)) <= max_tokens:
+        return [turn]
+    prefix = len(render_turn(TranscriptTurn(turn.speaker, "", turn.offset_seconds)))
+    pieces = []
+    words: List[str] = []
+    length = prefix
+    for word in turn.text.split(" "):
+        if words and math.ceil((length + 1 + len(word)) / CHARS_PER_TOKEN) > max_tokens:
+            pieces.append(TranscriptTurn(turn.speaker, " ".join(words), turn.offset_seconds))
+            words = []
+            length = prefix
+        length += len(word) + (1 if words else 0)
+        words.append(word)
+    pieces.append(TranscriptTurn(turn.speaker, " ".join(words), turn.offset_seconds))
+    return pieces
+
+
+def chunk_transcript(turns: List[TranscriptTurn], max_tokens: int) -> List[List[TranscriptTurn]]:
+    """
+    Split a transcript into consecutive chunks of at most about `max_tokens`.
+
+    Chunks are sized evenly rather than filled one after another, so a call
+    just over the budget becomes two halves instead of a full chunk and a
+    sliver. Only a single turn longer than `max_tokens` is split mid-turn.
+    """
+    total = transcript_tokens(turns)
+    if total <= max_tokens:
+        return [turns] if turns else []
+    target = math.ceil(total / math.ceil(total / max_tokens))
+
+    chunks = []
+    chunk: List[TranscriptTurn] = []
+    chunk_chars = 0
+    for turn in turns:
+        for piece in _split_turn(turn, max_tokens):
+            # Counted in characters, as the chunk will be rendered, so rounding doesn't add up across turns
+            chars = len(render_turn(piece)) + (1 if chunk else 0)
+            if chunk and math.ceil((chunk_chars + chars) / CHARS_PER_TOKEN) > max_tokens:
+                chunks.append(chunk)
+                chunk = []
+                chunk_chars = 0
+                chars -= 1
+            chunk.append(piece)
+            chunk_chars += chars
+            if math.ceil(chunk_chars / CHARS_PER_TOKEN) >= target:
+                chunks.append(chunk)
+                chunk = []
+                chunk_chars = 0
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
+def _unique(values: List[Any]) -> List[Any]:
+    seen = set()
+    unique = []
+    for value in values:
+        marker = json.dumps(value, sort_keys=True, default=str)
+        if marker not in seen:
+            seen.add(marker)
+            unique.append(value)
+    return unique
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _merge_maps(maps: List[Dict]) -> Dict:
+    merged: Dict = {}
+    for mapping in maps:
+        for key, value in mapping.items():
+            if key not in merged:
+                merged[key] = value
+            elif _is_number(value) and _is_number(merged[key]):
+                merged[key] = max(merged[key], value)
+            elif isinstance(value, list) and isinstance(merged[key], list):
+                merged[key] = _unique(merged[key] + value)
+    return merged
+
+
+def merge_chunk_analyses(analyses: List[Dict], weights: List[float]) -> Dict:
+    """
+    Combine the analyses of a call's chunks, in call order, into one analysis
+    with the same fields.
+
+    Counts are summed and other numbers averaged, weighted by chunk length.
+    Text fields take the value with the most weight. Lists are concatenated
+    without repeats. Maps, such as intent confidences, keep the highest
+    number for each key.
+    """
+    merged = {}
+    fields = list(dict.fromkeys(field for analysis in analyses for field in analysis))
+    for field in fields:
+        values = [(analysis[field], weight) for analysis, weight in zip(analyses, weights) if analysis.get(field) is not None]
+        if not values:
+            merged[field] = None
+        elif field in COUNT_FIELDS and all(_is_number(value) for value, _ in values):
+            merged[field] = sum(value for value, _ in values)
+        elif all(_is_number(value) for value, _ in values):
+            total_weight = sum(weight for _, weight in values)
+            if total_weight:
+                merged[field] = round(sum(value * weight for value, weight in values) / total_weight, 3)
+            else:
+                merged[field] = round(sum(value for value, _ in values) / len(values), 3)
+        elif all(isinstance(value, list) for value, _ in values):
+            merged[field] = _unique([item for value, _ in values for item in value])
+        elif all(isinstance(value, dict) for value, _ in values):
+            merged[field] = _merge_maps([value for value, _ in values])
+        else:
+            votes: Counter = Counter()
+            for value, weight in values:
+                votes[json.dumps(value, sort_keys=True, default=str)] += weight
+            winner = votes.most_common(1)[0][0]
+            merged[field] = next(value for value, _ in values if json.dumps(value, sort_keys=True, default=str) == winner)
+    return merged
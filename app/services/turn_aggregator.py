@@ -0,0 +1,150 @@
+import time
+from datetime import datetime, timedelta, UTC
+from typing import Dict, List, Optional
+
+# Assistant delta events and the stream each one belongs to
+_ASSISTANT_DELTAS = {
+    "response.text.delta": "text",
+    "response.audio_transcript.delta": "audio_transcript"
+}
+# Assistant events that carry a stream's final text, and the field holding it
+_ASSISTANT_DONE = {
+    "response.text.done": ("text", "text"),
+    "response.audio_transcript.done": ("audio_transcript", "transcript")
+}
+# Streams in order of preference: what was spoken, then what was written
+_STREAMS = ("audio_transcript", "text", "transcript")
+
+
+def _key(role: str, item_id: Optional[str], response_id: Optional[str] = None) -> str:
+    # Events normally name their conversation item; fall back to the response
+    return item_id or f"{role}:{response_id}"
+
+
+class _PendingTurn:
+    __slots__ = ("role", "item_id", "response_id", "started", "parts", "final")
+
+    def __init__(self, role: str, item_id: Optional[str], response_id: Optional[str], started: float):
+        self.role = role
+        self.item_id = item_id
+        self.response_id = response_id
+        self.started = started
+        self.parts: Dict[str, List[str]] = {}
+        self.final: Dict[str, str] = {}
+
+    def text(self) -> str:
+        for stream in _STREAMS:
+            if self.final.get(stream):
+                return self.final[stream].strip()
+        for stream in _STREAMS:
+            if self.parts.get(stream):
+                return "".join(self.parts[stream]).strip()
+        return ""
+
+
+class TurnAggregator:
+    """
+    Builds complete conversational turns from Realtime API event streams.
+
+    Assistant speech arrives as `response.audio_transcript.delta` (or
+    `response.text.delta`) events and caller speech as
+    `conversation.item.input_audio_transcription.delta` events, each keyed by
+    conversation item. `feed` takes events in order and returns the turns they
+    finalize: a caller turn when its transcription completes, and one assistant
+    turn per output item when `response.done` arrives. The text is taken from
+    the final event when there is one and from the joined deltas otherwise.
+    Each turn carries when its first event arrived and how long it took to
+    complete. Utterances with no text produce no turn.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self._pending: Dict[str, _PendingTurn] = {}
+        self.turns: List[Dict] = []
+
+    def feed(self, event: Dict) -> List[Dict]:
+        """Consume one event; returns the turns it finalized, usually none."""
+        kind = event.get("type")
+        item_id = event.get("item_id")
+
+        if kind in _ASSISTANT_DELTAS:
+            pending = self._pending_turn("assistant", item_id, event.get("response_id"))
+            pending.parts.setdefault(_ASSISTANT_DELTAS[kind], []).append(event.get("delta") or "")
+        elif kind in _ASSISTANT_DONE:
+            stream, field = _ASSISTANT_DONE[kind]
+            self._pending_turn("assistant", item_id, event.get("response_id")).final[stream] = event.get(field) or ""
+        elif kind == "input_audio_buffer.speech_started":
+            # The caller's turn starts when they start speaking, not when its transcript arrives
+            self._pending_turn("user", item_id)
+        elif kind == "conversation.item.input_audio_transcription.delta":
+            self._pending_turn("user", item_id).parts.setdefault("transcript", []).append(event.get("delta") or "")
+        elif kind == "conversation.item.input_audio_transcription.completed":
+            pending = self._pending_turn("user", item_id)
+            pending.final["transcript"] = event.get("transcript") or ""
+            del self._pending[_key("user", item_id)]
+            return self._finalize([pending])
+        elif kind == "conversation.item.input_audio_transcription.failed":
+            self._pending.pop(_key("user", item_id), None)
+        elif kind == "response.done":
+            return self._finalize_response(event.get("response") or {})
+        return []
+
+    def flush(self) -> List[Dict]:
+        """Finalize whatever is still pending, e.g. when the stream closes mid-response."""
+        pending = list(self._pending.values())
+        self._pending.clear()
+        return self._finalize(pending, status="incomplete")
+
+    def _pending_turn(self, role: str, item_id: Optional[str], response_id: Optional[str] = None) -> _PendingTurn:
+        key = _key(role, item_id, response_id)
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = self._pending[key] = _PendingTurn(role, item_id, response_id, self._clock())
+        elif response_id and pending.response_id is None:
+            pending.response_id = response_id
+        return pending
+
+    def _finalize_response(self, response: Dict) -> List[Dict]:
+        response_id = response.get("id")
+        finished = []
+        for item in response.get("output") or []:
+            if item.get("role") != "assistant":
+                continue
+            pending = self._pending.pop(_key("assistant", item.get("id"), response_id), None)
+            if pending is None:
+                # Nothing was streamed for this item; its text is only in the output
+                pending = _PendingTurn("assistant", item.get("id"), response_id, self._clock())
+            for content in item.get("content") or []:
+                if content.get("type") == "audio" and content.get("transcript"):
+                    pending.final.setdefault("audio_transcript", content["transcript"])
+                elif content.get("type") == "text" and content.get("text"):
+                    pending.final.setdefault("text", content["text"])
+            finished.append(pending)
+        # Streamed items the response.done output didn't list
+        for key, pending in list(self._pending.items()):
+            if pending.role == "assistant" and pending.response_id == response_id:
+                finished.append(self._pending.pop(key))
+        return self._finalize(finished, status=response.get("status"))
+
+    def _finalize(self, pending_turns: List[_PendingTurn], status: Optional[str] = "completed") -> List[Dict]:
+        now = self._clock()
+        ended_at = datetime.now(UTC)
+        finished = []
+        for pending in pending_turns:
+            text = pending.text()
+            if not text:
+                continue
+            duration = now - pending.started
+            turn = {
+                "role": pending.role,
+                "text": text,
+                "item_id": pending.item_id,
+                "response_id": pending.response_id,
+                "status": status,
+                "started_at": (ended_at - timedelta(seconds=duration)).isoformat(),
+                "ended_at": ended_at.isoformat(),
+                "duration_ms": round(duration * 1000, 2)
+            }
+            self.turns.append(turn)
+            finished.append(turn)
+        return finished
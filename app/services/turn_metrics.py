@@ -0,0 +1,100 @@
+import time
+from datetime import datetime, UTC
+from typing import Dict, List, Optional
+
+_USAGE_FIELDS = ("total_tokens", "input_tokens", "output_tokens")
+
+
+def _ms(start: Optional[float], end: Optional[float]) -> Optional[float]:
+    if start is None or end is None:
+        return None
+    return round((end - start) * 1000, 2)
+
+
+def _percentile(values: List[float], fraction: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class TurnTimer:
+    """
+    Measures assistant response latency for each conversational turn.
+
+    The media bridge stamps `input_audio_buffer.speech_stopped`,
+    `response.created`, the first `response.audio.delta` and `response.done`
+    with a monotonic clock. Each `response.done` closes a turn and yields its
+    time-to-first-audio (from the end of the caller's speech to the first
+    assistant audio), its total duration and the token usage the Realtime API
+    reports. Responses not preceded by caller speech, such as the opening
+    greeting, have no speech-relative timings.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self._speech_stopped_at = None
+        self._response_created_at = None
+        self._first_audio_at = None
+        self.turns: List[Dict] = []
+        self.token_counts: Dict = {field: 0 for field in _USAGE_FIELDS}
+
+    def on_speech_stopped(self) -> None:
+        self._speech_stopped_at = self._clock()
+        self._response_created_at = None
+        self._first_audio_at = None
+
+    def on_response_created(self) -> None:
+        self._response_created_at = self._clock()
+        self._first_audio_at = None
+
+    def on_audio_delta(self) -> None:
+        # Called for every delta on the hot path, so only the first one does any work
+        if self._first_audio_at is None:
+            self._first_audio_at = self._clock()
+
+    def on_response_done(self, response: Dict) -> Dict:
+        """Close the current turn from a `response.done` event's `response` object and return its record."""
+        done_at = self._clock()
+        usage = response.get("usage") or {}
+        turn = {
+            "turn": len(self.turns) + 1,
+            "response_id": response.get("id"),
+            "status": response.get("status"),
+            "ttfa_ms": _ms(self._speech_stopped_at, self._first_audio_at),
+            "total_ms": _ms(self._speech_stopped_at, done_at),
+            "response_ttfa_ms": _ms(self._response_created_at, self._first_audio_at),
+            "response_ms": _ms(self._response_created_at, done_at),
+            "usage": usage,
+            "timestamp": datetime.now(UTC).isoformat()
+        }
+        self.turns.append(turn)
+        self._add_usage(usage)
+        self._speech_stopped_at = None
+        self._response_created_at = None
+        self._first_audio_at = None
+        return turn
+
+    def stats(self) -> Dict:
+        ttfa = [t["ttfa_ms"] for t in self.turns if t["ttfa_ms"] is not None]
+        total = [t["total_ms"] for t in self.turns if t["total_ms"] is not None]
+        return {
+            "turns": len(self.turns),
+            "measured_turns": len(ttfa),
+            "avg_ttfa_ms": round(sum(ttfa) / len(ttfa), 2) if ttfa else None,
+            "min_ttfa_ms": min(ttfa) if ttfa else None,
+            "max_ttfa_ms": max(ttfa) if ttfa else None,
+            "p95_ttfa_ms": _percentile(ttfa, 0.95),
+            "avg_total_ms": round(sum(total) / len(total), 2) if total else None,
+            "p95_total_ms": _percentile(total, 0.95),
+            "total_tokens": self.token_counts["total_tokens"]
+        }
+
+    def _add_usage(self, usage: Dict) -> None:
+        for field in _USAGE_FIELDS:
+            self.token_counts[field] += usage.get(field) or 0
+        for details in ("input_token_details", "output_token_details"):
+            for name, count in (usage.get(details) or {}).items():
+                if isinstance(count, (int, float)):
+                    key = f"{details.split('_')[0]}_{name}"
+                    self.token_counts[key] = self.token_counts.get(key, 0) + count
@@ -1,16 +1,25 @@
 from twilio.rest import Client
 from twilio.base.exceptions import TwilioRestException
 import logging
-from app.config import TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN, TWILIO_PHONE_NUMBER, STRATIFY_BASE_URL
+from app.config import TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN, TWILIO_PHONE_NUMBER, STRATIFY_BASE_URL, TWILIO_MAX_CONNECTIONS, TWILIO_TIMEOUT_SECONDS
+from app.twilio_http import PooledTwilioHttpClient
 
 logger = logging.getLogger(__name__)
 
+# One Twilio REST client for the whole app; use its *_async methods so requests don't block the event loop
+twilio_http_client = PooledTwilioHttpClient(max_connections=TWILIO_MAX_CONNECTIONS, timeout=TWILIO_TIMEOUT_SECONDS)
+twilio_client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN, http_client=twilio_http_client)
+
+async def close_twilio():
+    """Close the pooled Twilio connections."""
+    await twilio_http_client.close()
+
 class TwilioService:
     def __init__(self):
         logger.info(f"Initializing TwilioService with account SID: {TWILIO_ACCOUNT_SID[:6]}...")
         logger.info(f"Using Twilio phone number: {TWILIO_PHONE_NUMBER}")
         logger.info(f"Using webhook base URL: {STRATIFY_BASE_URL}")
-        self.client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
+        self.client = twilio_client
 
     async def create_call(self, to: str, from_: str, url: str = None):
         """
@@ -38,12 +47,13 @@ class TwilioService:
                 'from_': from_,
                 'twiml': twiml,
                 'record': True,
-                'statusCallback': 'https://your-server/status-callback',
-                'statusCallbackEvent': ['initiated', 'ringing', 'answered', 'completed'],
-                'statusCallbackMethod': 'POST'
+                # Status callbacks feed the in-memory call status cache
+                'status_callback': f"{STRATIFY_BASE_URL}/call-status",
+                'status_callback_event': ['initiated', 'ringing', 'answered', 'completed'],
+                'status_callback_method': 'POST'
             }
             
-            call = self.client.calls.create(**call_params)
+            call = await self.client.calls.create_async(**call_params)
             
             logger.info(f"Successfully created streaming call with SID: {call.sid}")
             logger.info(f"Initial call status: {call.status}")
@@ -65,7 +75,7 @@ class TwilioService:
         """
         try:
             logger.info(f"Attempting to end call with SID: {call_sid}")
-            call = self.client.calls(call_sid).update(status="completed")
+            call = await self.client.calls(call_sid).update_async(status="completed")
             logger.info(f"Successfully ended call with SID: {call_sid}")
             return call
         except TwilioRestException as e:
@@ -83,7 +93,7 @@ class TwilioService:
         """
         try:
             logger.info(f"Fetching status for call SID: {call_sid}")
-            call = self.client.calls(call_sid).fetch()
+            call = await self.client.calls(call_sid).fetch_async()
             logger.info(f"Call status: {call.status}")
             return call.status
         except TwilioRestException as e:
@@ -0,0 +1,161 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CallPersister:
+    """
+    Write-behind persistence for one call.
+
+    The media bridge only enqueues: `update` merges fields into the pending
+    record update (later values win) and `append_turn` queues a conversation
+    turn row. A background task flushes whatever is pending every
+    `flush_interval` seconds with at most one write in flight, so any number
+    of enqueued changes collapse into one record update plus one batched turn
+    insert. Failed writes are put back in front of newer changes and retried
+    with backoff; `close` performs the final flush.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        write_updates: Callable[[Dict], Awaitable[bool]],
+        write_turns: Optional[Callable[[List[Dict]], Awaitable[bool]]] = None,
+        flush_interval: float = 1.0,
+        max_retries: int = 3,
+        retry_delay: float = 0.5,
+        clock=time.monotonic
+    ):
+        self.name = name
+        self._write_updates = write_updates
+        self._write_turns = write_turns
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self._clock = clock
+        self._updates: Dict = {}
+        self._turns: List[Dict] = []
+        self._oldest_pending_at = None
+        self._dirty = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._task = None
+        self.closed = False
+        self.updates_in = 0
+        self.turns_in = 0
+        self.flushes = 0
+        self.writes = 0
+        self.failures = 0
+        self.last_lag_ms = 0.0
+        self.max_lag_ms = 0.0
+
+    @property
+    def pending(self) -> bool:
+        return bool(self._updates or self._turns)
+
+    def update(self, fields: Dict) -> None:
+        """Merge fields into the pending record update."""
+        self.updates_in += 1
+        self._updates.update(fields)
+        self._mark_dirty()
+
+    def append_turn(self, turn: Dict) -> None:
+        """Queue a conversation turn row for the next batched insert."""
+        self.turns_in += 1
+        self._turns.append(turn)
+        self._mark_dirty()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> bool:
+        """Stop the flush task and write everything still pending. Returns False if data was lost."""
+        self.closed = True
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for attempt in range(self.max_retries):
+            if await self.flush() and not self.pending:
+                return True
+            await asyncio.sleep(self.retry_delay * 2 ** attempt)
+        if self.pending:
+            logger.error(f"Giving up on pending writes for {self.name}: fields {list(self._updates)}, {len(self._turns)} turns")
+            return False
+        return True
+
+    async def flush(self) -> bool:
+        """Write pending changes now. Returns False if the write failed and was re-queued."""
+        async with self._lock:
+            if not self.pending:
+                return True
+            updates, self._updates = self._updates, {}
+            turns, self._turns = self._turns, []
+            oldest_pending_at, self._oldest_pending_at = self._oldest_pending_at, None
+            self.flushes += 1
+            try:
+                # Turns first so a final transcript snapshot never lands before its turns
+                if turns and self._write_turns is not None:
+                    if not await self._write_turns(turns):
+                        raise RuntimeError("turn insert failed")
+                    self.writes += 1
+                    turns = []
+                if updates:
+                    if not await self._write_updates(dict(updates)):
+                        raise RuntimeError("record update matched no rows")
+                    self.writes += 1
+            except (Exception, asyncio.CancelledError) as e:
+                # Re-queue ahead of changes made during the write, which still take precedence
+                self._updates = {**updates, **self._updates}
+                self._turns = turns + self._turns
+                self._oldest_pending_at = oldest_pending_at
+                if isinstance(e, asyncio.CancelledError):
+                    raise
+                self.failures += 1
+                logger.error(f"Error flushing {self.name}: {str(e)}")
+                return False
+            lag_ms = (self._clock() - oldest_pending_at) * 1000
+            self.last_lag_ms = lag_ms
+            if lag_ms > self.max_lag_ms:
+                self.max_lag_ms = lag_ms
+            return True
+
+    def stats(self) -> Dict:
+        enqueued = self.updates_in + self.turns_in
+        return {
+            "updates_in": self.updates_in,
+            "turns_in": self.turns_in,
+            "flushes": self.flushes,
+            "writes": self.writes,
+            "failures": self.failures,
+            "coalescing_ratio": round(enqueued / self.flushes, 2) if self.flushes else None,
+            "pending_fields": len(self._updates),
+            "pending_turns": len(self._turns),
+            "last_lag_ms": round(self.last_lag_ms, 2),
+            "max_lag_ms": round(self.max_lag_ms, 2)
+        }
+
+    def _mark_dirty(self) -> None:
+        if self._oldest_pending_at is None:
+            self._oldest_pending_at = self._clock()
+        self._dirty.set()
+
+    async def _run(self) -> None:
+        failures = 0
+        while True:
+            await self._dirty.wait()
+            # Let changes accumulate for one interval so they share a write
+            await asyncio.sleep(self.flush_interval)
+            self._dirty.clear()
+            if await self.flush():
+                failures = 0
+                continue
+            failures += 1
+            self._dirty.set()
+            await asyncio.sleep(min(self.retry_delay * 2 ** failures, 30))
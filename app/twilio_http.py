@@ -0,0 +1,137 @@
+import logging
+import re
+import time
+from collections import deque
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+from twilio.http import AsyncHttpClient
+from twilio.http.response import Response
+
+logger = logging.getLogger(__name__)
+
+# Twilio resource SIDs: two letters followed by 32 hex digits (CA..., AC..., RE...)
+_SID = re.compile(r"\b[A-Z]{2}[0-9a-f]{32}\b")
+
+
+def endpoint_name(method: str, url: str) -> str:
+    """Group requests by endpoint: "POST /2010-04-01/Accounts/{sid}/Calls/{sid}.json"."""
+    return f"{method.upper()} {_SID.sub('{sid}', urlsplit(url).path)}"
+
+
+class EndpointStats:
+    def __init__(self, window: int = 200):
+        self.requests = 0
+        self.errors = 0
+        self.status_codes: Dict[int, int] = {}
+        self._latencies_ms = deque(maxlen=window)
+
+    def record(self, elapsed_ms: float, status_code: Optional[int]) -> None:
+        self.requests += 1
+        self._latencies_ms.append(elapsed_ms)
+        if status_code is None or status_code >= 400:
+            self.errors += 1
+        if status_code is not None:
+            self.status_codes[status_code] = self.status_codes.get(status_code, 0) + 1
+
+    def to_dict(self) -> Dict:
+        latencies = sorted(self._latencies_ms)
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "status_codes": self.status_codes,
+            "avg_ms": round(sum(latencies) / len(latencies), 2) if latencies else None,
+            "p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 2) if latencies else None,
+            "max_ms": round(latencies[-1], 2) if latencies else None
+        }
+
+
+class PooledTwilioHttpClient(AsyncHttpClient):
+    """
+    Async HTTP transport for the Twilio SDK over one pooled keep-alive connection pool.
+
+    Pass it as `http_client` to `twilio.rest.Client` and use the SDK's `*_async`
+    methods; requests then never block the event loop and reuse connections
+    instead of opening one per call. At most `max_connections` requests run
+    at once. Latency, errors and status codes are tracked per endpoint, with
+    resource SIDs folded out of the path. The HTTP client is created on first
+    use and closed by `close`.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 20,
+        timeout: float = 10.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        super().__init__(logging.getLogger("twilio.http_client"), True, timeout)
+        self.max_connections = max_connections
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self.endpoints: Dict[str, EndpointStats] = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        params: Optional[Dict[str, object]] = None,
+        data: Optional[Dict[str, object]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        auth: Optional[Tuple[str, str]] = None,
+        timeout: Optional[float] = None,
+        allow_redirects: bool = False,
+    ) -> Response:
+        client = self._get_client()
+        stats = self.endpoints.setdefault(endpoint_name(method, url), EndpointStats())
+        started = time.monotonic()
+        status_code = None
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            response = await client.request(
+                method.upper(),
+                url,
+                params=params,
+                data=data,
+                headers=headers,
+                auth=auth,
+                timeout=timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT,
+                follow_redirects=allow_redirects
+            )
+            status_code = response.status_code
+        finally:
+            self.in_flight -= 1
+            stats.record((time.monotonic() - started) * 1000, status_code)
+
+        twilio_response = Response(response.status_code, response.text, response.headers)
+        if response.status_code >= 400:
+            logger.warning(f"Twilio {endpoint_name(method, url)} returned {response.status_code}")
+        return twilio_response
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def stats(self) -> Dict:
+        return {
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "max_connections": self.max_connections,
+            "endpoints": {name: stats.to_dict() for name, stats in self.endpoints.items()}
+        }
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.timeout),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections
+                ),
+                transport=self._transport
+            )
+        return self._client
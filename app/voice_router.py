@@ -3,20 +3,32 @@ from fastapi.responses import HTMLResponse, JSONResponse
 from fastapi.websockets import WebSocketDisconnect
 from starlette.websockets import WebSocketState
 from twilio.twiml.voice_response import VoiceResponse, Connect
-from twilio.rest import Client
 import json
-import base64
 import asyncio
+import random
 import websockets
 import logging
-import random  # Add random import
 from typing import Optional, List, Dict
 from uuid import uuid4
-from app.database import create_call_record, update_call_record, supabase_client
-from app.config import OPENAI_API_KEY, DEFAULT_SYSTEM_MESSAGE, ssl_context, TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN, TWILIO_PHONE_NUMBER, SUPABASE_URL, SUPABASE_KEY
-from app.services.analysis_service import analyze_conversation
+from app.database import create_analysis_job, get_pending_analysis_jobs, update_analysis_jobs, claim_analysis_jobs, create_call_record, update_call_record_by_id, assign_call_sid, get_call_info, get_call_statuses, call_registry, get_test_configuration, invalidate_test_configurations, test_configuration_cache, db_client, append_conversation_turns, get_conversation_turns, rebuild_transcript, with_turn_transcripts
+from app.config import OPENAI_API_KEY, STRATIFY_BASE_URL, DEFAULT_SYSTEM_MESSAGE, ssl_context, TWILIO_PHONE_NUMBER, TWILIO_CALLS_PER_SECOND, DIAL_MAX_CONCURRENCY, DIAL_MAX_RETRIES, DIAL_RETRY_BASE_SECONDS, CALL_COMPLETION_TIMEOUT_SECONDS, CALL_COMPLETION_SWEEP_SECONDS, INSTANCE_ID, SIMULATION_LEASE_SECONDS, ANALYSIS_CONCURRENCY, ANALYSIS_BATCH_SIZE, ANALYSIS_BATCH_MAX_CHARS, ANALYSIS_MAX_RETRIES, ANALYSIS_RETRY_BASE_SECONDS, ANALYSIS_LEASE_SECONDS, MAX_CONCURRENT_CALLS, MAX_CALLS_PER_RUN, SUPABASE_URL, SUPABASE_KEY, AUDIO_PASSTHROUGH, INBOUND_AUDIO_COALESCE_MS, INBOUND_AUDIO_MAX_DELAY_MS, OPENAI_SEND_QUEUE_SIZE, OPENAI_SEND_QUEUE_POLICY, TWILIO_SEND_QUEUE_SIZE, TWILIO_SEND_QUEUE_POLICY, CALL_PERSIST_INTERVAL_SECONDS, OPENAI_REALTIME_URL, REALTIME_POOL_CALLS_PER_SECOND, REALTIME_POOL_MIN_SIZE, REALTIME_POOL_MAX_SIZE, REALTIME_POOL_MAX_IDLE_SECONDS, REALTIME_TEMPERATURE
+from app.services.analysis_service import run_analysis_batch, is_retryable_analysis_error, openai_retry_after, analysis_cache
+from app.services.analysis_queue import AnalysisQueue
+from app.services.twilio_service import twilio_client, twilio_http_client
+from app.services.media_frames import TwilioMediaFrame, passthrough_payload, input_audio_append, decode_twilio_frame, decode_openai_frame
+from app.services.audio_coalescer import InboundAudioCoalescer
+from app.services.leg_queue import LegSendQueue
+from app.services.barge_in import BargeInController
+from app.services.realtime_pool import RealtimeSessionPool
+from app.services.turn_metrics import TurnTimer
+from app.services.turn_aggregator import TurnAggregator
+from app.services.write_behind import CallPersister
+from app.services.personas import expand_persona_matrix, persona_label, render_instructions, sample_persona
+from app.services.dial_dispatcher import DialDispatcher, DialJob, DialRequest
+from app.services.call_completion import CompletionNotifier
+from app.services.call_window import SlidingWindow
+from app.services.simulation_engine import SimulationEngine
 import os
-from datetime import datetime
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -25,6 +37,187 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 job_counter = 0
 
+def realtime_session_update(instructions: str) -> str:
+    """Serialize the session.update that configures a realtime session for Twilio audio."""
+    return json.dumps({
+        "type": "session.update",
+        "session": {
+            "turn_detection": {"type": "server_vad"},
+            "input_audio_format": "g711_ulaw",
+            "output_audio_format": "g711_ulaw",
+            "voice": "sage",
+            "instructions": instructions,
+            "modalities": ["text", "audio"],
+            "temperature": REALTIME_TEMPERATURE,
+            "input_audio_transcription": {
+                "model": "whisper-1"
+            }
+        }
+    })
+
+def connect_realtime():
+    """Open a websocket to the OpenAI Realtime API."""
+    return websockets.connect(
+        OPENAI_REALTIME_URL,
+        extra_headers={
+            "Authorization": f"Bearer {OPENAI_API_KEY}",
+            "OpenAI-Beta": "realtime=v1"
+        },
+        ssl=ssl_context if OPENAI_REALTIME_URL.startswith("wss://") else None
+    )
+
+# Warm realtime sessions for new media streams; started from app startup
+realtime_pool = RealtimeSessionPool(
+    connect_realtime,
+    realtime_session_update(os.getenv("SYSTEM_MESSAGE", DEFAULT_SYSTEM_MESSAGE)),
+    calls_per_second=REALTIME_POOL_CALLS_PER_SECOND,
+    min_size=REALTIME_POOL_MIN_SIZE,
+    max_size=REALTIME_POOL_MAX_SIZE,
+    max_idle_seconds=REALTIME_POOL_MAX_IDLE_SECONDS
+)
+
+async def dial_call(request: DialRequest) -> str:
+    """Create the call record for a dial request (once, across retries) and place the call."""
+    if request.record_id is None:
+        persona = request.persona
+        request.record_id = await create_call_record(
+            simulation_id=request.simulation_id,
+            call_sid=f"pending_{request.call_number - 1}",  # Temporary call_sid
+            phone_number=request.to_number,
+            user_id=str(uuid4()),  # Generate random UUID for user_id
+            status="initiated",
+            persona=persona,
+            instructions=request.instructions or (render_instructions(persona) if persona else None)
+        )
+    
+    call = await twilio_client.calls.create_async(
+        to=request.to_number,
+        from_=TWILIO_PHONE_NUMBER,
+        url=f"{STRATIFY_BASE_URL}/incoming-call",
+        record=True,
+        status_callback=f"{STRATIFY_BASE_URL}/call-status",
+        status_callback_event=['initiated', 'ringing', 'answered', 'completed']
+    )
+    
+    # Update the call record with the actual call_sid
+    await assign_call_sid(
+        request.record_id,
+        call.sid,
+        updates={"transcript": []}  # Initialize empty transcript array
+    )
+    logger.info(f"Initiated call {request.call_number} with job ID: {request.job_id}, call_sid: {call.sid}")
+    return call.sid
+
+# Places outbound calls concurrently within the account's calls-per-second limit
+dial_dispatcher = DialDispatcher(
+    dial_call,
+    calls_per_second=TWILIO_CALLS_PER_SECOND,
+    max_concurrency=DIAL_MAX_CONCURRENCY,
+    max_retries=DIAL_MAX_RETRIES,
+    retry_base_delay=DIAL_RETRY_BASE_SECONDS
+)
+
+# Resolves waiters when calls end, from status callbacks and media stream shutdown; started from app startup
+completion_notifier = CompletionNotifier(get_call_statuses, sweep_interval=CALL_COMPLETION_SWEEP_SECONDS)
+
+# Calls in flight across all sliding-window runs, so concurrent runs share the deployment's capacity
+call_slots = asyncio.Semaphore(MAX_CONCURRENT_CALLS)
+
+async def wait_for_call_end(call_sid: str) -> str:
+    """Wait for a call to end; returns its final status, or "timeout"."""
+    statuses = await completion_notifier.wait([call_sid], timeout=CALL_COMPLETION_TIMEOUT_SECONDS)
+    return statuses[call_sid]
+
+async def hang_up_call(call_sid: str) -> None:
+    await twilio_client.calls(call_sid).update_async(status="completed")
+    logger.info(f"Call {call_sid} ended successfully")
+
+# Persisted simulations run by /simulations, leased to this process; resumed from app startup
+simulation_engine = SimulationEngine(
+    dial_dispatcher.dial,
+    wait_for_call_end,
+    hang_up_call,
+    slots=call_slots,
+    flush_interval=CALL_PERSIST_INTERVAL_SECONDS,
+    owner=INSTANCE_ID,
+    lease_seconds=SIMULATION_LEASE_SECONDS
+)
+
+# Post-call analyses, persisted and run by a background worker pool under leases held by this process; started from app startup
+analysis_queue = AnalysisQueue(
+    run_analysis_batch,
+    create_analysis_job,
+    get_pending_analysis_jobs,
+    update_analysis_jobs,
+    claim_analysis_jobs,
+    owner=INSTANCE_ID,
+    lease_seconds=ANALYSIS_LEASE_SECONDS,
+    concurrency=ANALYSIS_CONCURRENCY,
+    batch_size=ANALYSIS_BATCH_SIZE,
+    batch_max_chars=ANALYSIS_BATCH_MAX_CHARS,
+    max_retries=ANALYSIS_MAX_RETRIES,
+    retry_base_delay=ANALYSIS_RETRY_BASE_SECONDS,
+    is_retryable=is_retryable_analysis_error,
+    retry_after=openai_retry_after
+)
+
+def call_limit_error(num_calls: int, concurrency: Optional[int] = None) -> Optional[str]:
+    """Why a run of `num_calls` with `concurrency` in flight exceeds capacity, or None if it fits."""
+    if num_calls < 1:
+        return "At least one call is required"
+    if concurrency is None:
+        # Without a window every call may be in flight at once
+        concurrency = num_calls
+    elif num_calls > MAX_CALLS_PER_RUN:
+        return f"Maximum number of total calls is {MAX_CALLS_PER_RUN}"
+    if concurrency < 1:
+        return "Concurrency must be at least 1"
+    if concurrency > MAX_CONCURRENT_CALLS:
+        return f"Maximum number of concurrent calls is {MAX_CONCURRENT_CALLS}"
+    return None
+
+def new_job_id() -> str:
+    global job_counter
+    job_counter += 1
+    return f"job_{job_counter}"
+
+def submit_dial_job(to_number: str, personas: List[Optional[Dict]], simulation_prefix: Optional[str] = None) -> DialJob:
+    """Queue one call per persona under a new job ID; calls share the job's simulation ID unless a prefix numbers them."""
+    job_id = new_job_id()
+    requests = [
+        DialRequest(
+            job_id,
+            i + 1,
+            to_number,
+            f"{simulation_prefix}_{i}" if simulation_prefix else job_id,
+            persona
+        )
+        for i, persona in enumerate(personas)
+    ]
+    logger.info(f"Queued {len(requests)} calls to {to_number} as {job_id}")
+    return dial_dispatcher.submit(job_id, requests)
+
+def dial_job_response(job: DialJob, seed: int, message: str) -> Dict:
+    return {
+        "status": "success",
+        "message": message,
+        "job_id": job.job_id,
+        "seed": seed,
+        "calls": [
+            {
+                "job_id": job.job_id,
+                "call_number": request.call_number,
+                "to_number": request.to_number,
+                "status": request.status,
+                "persona_label": persona_label(request.persona) if request.persona else None
+            }
+            for request in job.requests
+        ]
+    }
+
+# Per-call components of live media streams, keyed by stream SID, for /media-stream/metrics
+active_media_streams: Dict[str, Dict] = {}
+
 @router.get("/", response_class=JSONResponse)
 async def index():
     return {"message": "Voice Call Platform is running"}
@@ -33,41 +226,17 @@ async def index():
 async def make_test_call(to_number: str):
     """Make a test call to a specified number."""
     try:
-        # Initialize Twilio client
-        client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
-        
-        # Create call record first with a temporary call_sid
-        call_record_id = await create_call_record(
-            simulation_id="test_simulation",
-            call_sid="pending",  # We'll update this with an incremental ID
-            phone_number=to_number,
-            user_id=str(uuid4()),  # Generate a random UUID for user_id
-            status="initiated"  # Add initial status
-        )
-        
-        # Make the call
-        call = client.calls.create(
-            to=to_number,
-            from_=TWILIO_PHONE_NUMBER,
-            url=f"https://swarm-backend-new.onrender.com/incoming-call",
-            record=True,
-            status_callback=f"https://swarm-backend-new.onrender.com/call-status",
-            status_callback_event=['initiated', 'ringing', 'answered', 'completed']
-        )
-        
-        # Update the call record with the actual call_sid
-        await update_call_record(
-            simulation_id="test_simulation",
-            call_sid="pending",
-            updates={
-                "call_sid": call.sid
-            }
-        )
+        # Dial through the dispatcher so single calls share the rate limit with batches
+        job_id = new_job_id()
+        job = dial_dispatcher.submit(job_id, [DialRequest(job_id, 1, to_number, "test_simulation")])
+        request = (await job.wait())[0]
+        if request.status != "initiated":
+            raise RuntimeError(request.error or "Call could not be placed")
         
         return {
             "status": "success",
             "message": "Test call initiated",
-            "call_sid": call.sid,
+            "call_sid": request.call_sid,
             "to_number": to_number
         }
     except Exception as e:
@@ -86,17 +255,15 @@ async def call_status(
     """Handle call status updates."""
     logger.info(f"Call {CallSid} status update: {CallStatus}, Duration: {Duration}")
     try:
-        # First, find the simulation_id for this call
-        result = supabase_client.table('voice_conversations')\
-            .select('simulation_id')\
-            .eq('call_sid', CallSid)\
-            .execute()
+        # Feed the status cache even for calls without a record yet
+        completion_notifier.notify(CallSid, CallStatus)
+
+        # Find the record for this call
+        call_info = await get_call_info(CallSid)
             
-        if not result.data:
+        if not call_info:
             logger.error(f"Could not find record for call {CallSid}")
             return HTMLResponse(content="", status_code=404)
-            
-        simulation_id = result.data[0]['simulation_id']
         
         updates = {
             "status": CallStatus
@@ -106,11 +273,7 @@ async def call_status(
         if Duration is not None:
             updates["duration"] = Duration
             
-        await update_call_record(
-            simulation_id=simulation_id,  # Use the found simulation_id
-            call_sid=CallSid,
-            updates=updates
-        )
+        await update_call_record_by_id(call_info.id, updates)
         
         # Log when call is completed
         if CallStatus == "completed":
@@ -148,12 +311,7 @@ async def handle_incoming_call(request: Request):
             to_number = form_data.get('To', 'unknown')
             if call_sid:
                 # Find the existing record for this call
-                result = supabase_client.table('voice_conversations')\
-                    .select('simulation_id')\
-                    .eq('call_sid', call_sid)\
-                    .execute()
-                
-                if not result.data:
+                if not await get_call_info(call_sid):
                     # If no record exists, create one with a default simulation_id
                     await create_call_record(
                         simulation_id="test_simulation",
@@ -170,87 +328,14 @@ async def handle_incoming_call(request: Request):
     logger.info(f"Returning TwiML: {str(response)}")
     return HTMLResponse(content=str(response), media_type="application/xml")
 
-async def get_latest_test_configuration(phone_number: str) -> Dict:
+async def get_latest_test_configuration(phone_number: str, test_id: Optional[str] = None) -> Dict:
     """Fetch the most recent test configuration for a phone number."""
-    try:
-        result = supabase_client.table('test_configurations')\
-            .select('*')\
-            .order('created_at', desc=True)\
-            .limit(1)\
-            .execute()
-            
-        if result.data:
-            config = result.data[0]
-            logger.info(f"Found test configuration for {phone_number}: {json.dumps(config, indent=2)}")
-            return config
-        else:
-            logger.warning(f"No test configuration found for {phone_number}, using default")
-            return None
-    except Exception as e:
-        logger.error(f"Error fetching test configuration: {str(e)}")
-        return None
-
-def build_system_message(config: Optional[Dict]) -> str:
-    """Build system message from test configuration."""
-    if not config:
-        default_message = os.getenv("SYSTEM_MESSAGE", DEFAULT_SYSTEM_MESSAGE)
-        logger.info(f"Using default system message: {default_message}")
-        return default_message
-        
-    try:
-        # Build a comprehensive system message using all relevant configuration fields
-        message_parts = []
-        
-        # Helper function to safely get a value from config
-        def get_config_value(key: str, default_value: any) -> any:
-            value = config.get(key, default_value)
-            if isinstance(value, list) and value:
-                return random.choice(value)
-            return value
-        
-        # Basic role and context
-        message_parts.append(f"You are a {get_config_value('accent_types', 'neutral')} speaking customer service agent")
-        message_parts.append(f"in the {get_config_value('industry', 'general service')} industry")
-        
-        # Speaking characteristics
-        speaking_pace = get_config_value('speaking_pace', None)
-        if speaking_pace:
-            message_parts.append(f"Speak at a {speaking_pace} pace")
-            
-        emotion_types = get_config_value('emotion_types', None)
-        if emotion_types:
-            message_parts.append(f"Express {emotion_types} emotions")
-            
-        # Background conditions
-        background_noise = get_config_value('background_noise', None)
-        if background_noise:
-            message_parts.append(f"You are in an environment with {background_noise} background noise")
-            
-        # Conversation parameters
-        max_turns = get_config_value('max_turns', None)
-        if max_turns:
-            message_parts.append(f"Limit the conversation to approximately {max_turns} turns")
-            
-        complexity_level = get_config_value('complexity_level', None)
-        if complexity_level:
-            message_parts.append(f"Maintain a complexity level of {complexity_level} in your responses")
-            
-        # Template and specific instructions
-        prompt_template = get_config_value('prompt_template', None)
-        if prompt_template:
-            message_parts.append(prompt_template)
-        
-        # Always end with goodbye instruction
-        message_parts.append("IMPORTANT: End the conversation by saying ONLY 'Goodbye!' or 'Bye!' as your last message.")
-        
-        final_message = " ".join(message_parts)
-        logger.info(f"Built custom system message from config with random choices: {final_message}")
-        return final_message
-    except Exception as e:
-        logger.error(f"Error building system message from config: {str(e)}")
-        default_message = os.getenv("SYSTEM_MESSAGE", DEFAULT_SYSTEM_MESSAGE)
-        logger.info(f"Falling back to default system message: {default_message}")
-        return default_message
+    config = await get_test_configuration(phone_number, test_id)
+    if config:
+        logger.info(f"Using test configuration {config.get('id')} for {phone_number}")
+    else:
+        logger.warning(f"No test configuration found for {phone_number}, using default")
+    return config
 
 @router.websocket("/media-stream")
 async def handle_media_stream(websocket: WebSocket):
@@ -261,91 +346,182 @@ async def handle_media_stream(websocket: WebSocket):
     stream_sid = None
     current_call_sid = None
     current_simulation_id = None
+    current_conversation_id = None
     latest_media_timestamp = 0
     conversation_history = []
     message_timestamps = []  # Track message timestamps
     websocket_connected = True
     current_phone_number = None
+    media_frame = None  # Pre-serialized outbound media frame for this stream
+    inbound_audio = InboundAudioCoalescer(INBOUND_AUDIO_COALESCE_MS, INBOUND_AUDIO_MAX_DELAY_MS)
+    barge_in = BargeInController()
+    turn_timer = TurnTimer()
+    turns = TurnAggregator()
+    call_completed = False
+
+    async def write_call_updates(updates: Dict) -> bool:
+        if not current_conversation_id:
+            # Nothing to attach the update to; the call was never registered
+            return True
+        return await update_call_record_by_id(current_conversation_id, updates)
+
+    # Database writes go through the write-behind persister so the audio loops never await them
+    persister = CallPersister(
+        "call record",
+        write_call_updates,
+        append_conversation_turns,
+        flush_interval=CALL_PERSIST_INTERVAL_SECONDS
+    )
+    persister.start()
     
     try:
-        async with websockets.connect(
-            'wss://api.openai.com/v1/realtime?model=gpt-4o-realtime-preview-2024-10-01',
-            extra_headers={
-                "Authorization": f"Bearer {OPENAI_API_KEY}",
-                "OpenAI-Beta": "realtime=v1"
-            },
-            ssl=ssl_context
-        ) as openai_ws:
-            # Initialize OpenAI session with default message first
+        # Sessions come from the warm pool already initialized with the default system message;
+        # we'll update the session once we get the phone number from the start event
+        openai_ws = await realtime_pool.acquire()
+        try:
             current_system_message = os.getenv("SYSTEM_MESSAGE", DEFAULT_SYSTEM_MESSAGE)
             logger.info(f"Initial system message: {current_system_message}")
-            
-            # We'll update the session once we get the phone number from the start event
-            await openai_ws.send(json.dumps({
-                "type": "session.update",
-                "session": {
-                    "turn_detection": {"type": "server_vad"},
-                    "input_audio_format": "g711_ulaw",
-                    "output_audio_format": "g711_ulaw",
-                    "voice": "sage",
-                    "instructions": current_system_message,
-                    "modalities": ["text", "audio"],
-                    "temperature": 0.7,
-                    "input_audio_transcription": {
-                        "model": "whisper-1"
-                    }
+
+            def render_twilio_media(payload: str) -> str:
+                nonlocal media_frame
+                if media_frame is None or media_frame.stream_sid != stream_sid:
+                    media_frame = TwilioMediaFrame(stream_sid)
+                return media_frame.render(passthrough_payload(payload, AUDIO_PASSTHROUGH))
+
+            # Each leg is written by its own sender task, so a slow peer fills its
+            # queue instead of stalling the opposite leg's read loop
+            openai_queue = LegSendQueue(
+                "OpenAI",
+                openai_ws.send,
+                input_audio_append,
+                maxsize=OPENAI_SEND_QUEUE_SIZE,
+                policy=OPENAI_SEND_QUEUE_POLICY
+            )
+            twilio_queue = LegSendQueue(
+                "Twilio",
+                websocket.send_text,
+                render_twilio_media,
+                maxsize=TWILIO_SEND_QUEUE_SIZE,
+                policy=TWILIO_SEND_QUEUE_POLICY
+            )
+
+            async def end_call():
+                """Hang up the Twilio call; the record is completed and analyzed once the stream closes."""
+                nonlocal websocket_connected, call_completed
+                websocket_connected = False
+                if current_call_sid:
+                    try:
+                        # End the call
+                        await twilio_client.calls(current_call_sid).update_async(status="completed")
+                        logger.info(f"Call {current_call_sid} ended successfully")
+                        call_completed = True
+                        persister.update({"status": "completed"})
+                    except Exception as e:
+                        logger.error(f"Error ending call: {str(e)}")
+
+            async def on_twilio_start(data: Dict):
+                nonlocal stream_sid, current_call_sid, current_simulation_id, current_conversation_id, current_phone_number, current_system_message, media_frame
+                stream_sid = data['start']['streamSid']
+                media_frame = TwilioMediaFrame(stream_sid)
+                current_call_sid = data['start'].get('callSid')
+                logger.info(f"Stream started: {stream_sid}, Call SID: {current_call_sid}")
+                active_media_streams[stream_sid] = {
+                    "call_sid": current_call_sid,
+                    "inbound_audio": inbound_audio,
+                    "openai_queue": openai_queue,
+                    "twilio_queue": twilio_queue,
+                    "barge_in": barge_in,
+                    "turns": turn_timer,
+                    "persister": persister
                 }
-            }))
+                
+                # Fetch call details including phone number
+                if current_call_sid:
+                    try:
+                        call_info = await get_call_info(current_call_sid)
+                        
+                        if call_info:
+                            current_conversation_id = call_info.id
+                            current_simulation_id = call_info.simulation_id
+                            current_phone_number = call_info.phone_number
+                            # Only a call that has streamed before can have turns to resume from
+                            if call_info.streamed:
+                                turns = (await get_conversation_turns([current_conversation_id]))[current_conversation_id]
+                                if turns:
+                                    transcript, timestamps = rebuild_transcript(turns)
+                                    conversation_history.extend(transcript)
+                                    message_timestamps.extend(timestamps)
+                            call_info.streamed = True
+                                
+                            # Calls placed in a batch carry pre-rendered instructions; others pick a persona now
+                            if call_info.instructions is None and current_phone_number:
+                                config = await get_latest_test_configuration(current_phone_number)
+                                if config:
+                                    call_info.persona = sample_persona(config)
+                                    call_info.instructions = render_instructions(call_info.persona)
+                                    persister.update({
+                                        "persona": call_info.persona,
+                                        "persona_label": persona_label(call_info.persona),
+                                        "instructions": call_info.instructions
+                                    })
+                            if call_info.instructions:
+                                current_system_message = call_info.instructions
+                                # Update OpenAI session with new system message
+                                openai_queue.put_control(json.dumps({
+                                    "type": "session.update",
+                                    "session": {
+                                        "instructions": current_system_message
+                                    }
+                                }))
+                                logger.info(f"Updated system message for {current_phone_number}")
+                            
+                            logger.info(f"Found existing record with simulation_id: {current_simulation_id}")
+                    except Exception as e:
+                        logger.error(f"Error fetching existing transcript: {str(e)}")
+
+            def flush_inbound_audio(expired_only: bool = False):
+                payload = inbound_audio.flush_expired() if expired_only else inbound_audio.flush()
+                if payload is not None and openai_ws.open:
+                    openai_queue.put_audio(payload)
+
+            async def on_twilio_stop(data: Dict):
+                flush_inbound_audio()
+
+            async def on_twilio_mark(data: Dict):
+                barge_in.on_mark(data.get('mark', {}).get('name'))
+                flush_inbound_audio()
+
+            # Control events are rare, so only they pay for a full JSON parse
+            twilio_handlers = {
+                'start': on_twilio_start,
+                'stop': on_twilio_stop,
+                'mark': on_twilio_mark,
+            }
+
+            async def flush_inbound_audio_on_deadline():
+                # Frames normally trigger their own flushes; this covers gaps in the inbound stream
+                interval = max(INBOUND_AUDIO_MAX_DELAY_MS, 20) / 2000
+                while websocket_connected and INBOUND_AUDIO_COALESCE_MS:
+                    await asyncio.sleep(interval)
+                    flush_inbound_audio(expired_only=True)
 
             async def handle_twilio_messages():
-                nonlocal stream_sid, current_call_sid, current_simulation_id, latest_media_timestamp, websocket_connected, current_phone_number, current_system_message
+                nonlocal latest_media_timestamp, websocket_connected
                 try:
                     while websocket_connected:
                         try:
                             message = await websocket.receive_text()
-                            data = json.loads(message)
-                            if data['event'] == 'media' and openai_ws.open:
-                                latest_media_timestamp = int(data['media']['timestamp'])
-                                await openai_ws.send(json.dumps({
-                                    "type": "input_audio_buffer.append",
-                                    "audio": data['media']['payload']
-                                }))
-                            elif data['event'] == 'start':
-                                stream_sid = data['start']['streamSid']
-                                current_call_sid = data['start'].get('callSid')
-                                logger.info(f"Stream started: {stream_sid}, Call SID: {current_call_sid}")
-                                
-                                # Fetch call details including phone number
-                                if current_call_sid:
-                                    try:
-                                        result = supabase_client.table('voice_conversations')\
-                                            .select('simulation_id, transcript, phone_number')\
-                                            .eq('call_sid', current_call_sid)\
-                                            .execute()
-                                        
-                                        if result.data:
-                                            current_simulation_id = result.data[0]['simulation_id']
-                                            current_phone_number = result.data[0]['phone_number']
-                                            if result.data[0].get('transcript'):
-                                                conversation_history = result.data[0]['transcript']
-                                                
-                                            # Get test configuration and update system message
-                                            if current_phone_number:
-                                                config = await get_latest_test_configuration(current_phone_number)
-                                                if config:
-                                                    current_system_message = build_system_message(config)
-                                                    # Update OpenAI session with new system message
-                                                    await openai_ws.send(json.dumps({
-                                                        "type": "session.update",
-                                                        "session": {
-                                                            "instructions": current_system_message
-                                                        }
-                                                    }))
-                                                    logger.info(f"Updated system message for {current_phone_number}")
-                                            
-                                            logger.info(f"Found existing record with simulation_id: {current_simulation_id}")
-                                    except Exception as e:
-                                        logger.error(f"Error fetching existing transcript: {str(e)}")
+                            frame = decode_twilio_frame(message)
+                            if frame.kind == 'media':
+                                if openai_ws.open:
+                                    latest_media_timestamp = frame.timestamp
+                                    payload = inbound_audio.add(frame.payload)
+                                    if payload is not None:
+                                        openai_queue.put_audio(payload)
+                                continue
+                            handler = twilio_handlers.get(frame.kind)
+                            if handler:
+                                await handler(frame.data)
                         except WebSocketDisconnect:
                             logger.info("WebSocket disconnected in Twilio message handler")
                             websocket_connected = False
@@ -357,122 +533,104 @@ async def handle_media_stream(websocket: WebSocket):
                 except Exception as e:
                     logger.error(f"Error in Twilio message handler: {str(e)}")
                     websocket_connected = False
-            
+
+            async def record_turn(turn: Dict):
+                """Add a finished utterance to the in-memory transcript and append it to conversation_turns."""
+                role = turn["role"]
+                message = f"{role.capitalize()}: {turn['text']}"
+                conversation_history.append(message)
+                message_timestamps.append({
+                    "message": message,
+                    "timestamp": turn["ended_at"],
+                    "type": role,
+                    "duration_ms": turn["duration_ms"]
+                })
+                # Only the new turn is written; the full transcript is stored once when the stream ends
+                if current_conversation_id:
+                    persister.append_turn({
+                        "conversation_id": current_conversation_id,
+                        "call_sid": current_call_sid,
+                        "seq": len(conversation_history) - 1,
+                        "role": role,
+                        "content": turn["text"],
+                        "spoken_at": turn["ended_at"]
+                    })
+
+            async def record_turns(finished: List[Dict]):
+                for turn in finished:
+                    logger.info(f"{turn['role'].capitalize()} said: {turn['text']}")
+                    await record_turn(turn)
+                    
+                    # Check for goodbye keywords in either side's message
+                    if any(word in turn["text"].lower() for word in ["goodbye", "bye"]):
+                        logger.info(f"Goodbye detected in {turn['role']} message, ending call...")
+                        await end_call()
+                        return
+
+            async def on_turn_event(response: Dict):
+                # Transcript deltas only build up turns; nothing is written until a turn completes
+                await record_turns(turns.feed(response))
+
+            async def on_response_done(response: Dict):
+                # Handle completed assistant responses
+                response_data = response.get('response', {})
+                turn = turn_timer.on_response_done(response_data)
+                logger.info(f"Turn {turn['turn']} for call {current_call_sid}: ttfa {turn['ttfa_ms']} ms, total {turn['total_ms']} ms")
+                await record_turns(turns.feed(response))
+
+            async def on_speech_started(response: Dict):
+                turns.feed(response)
+                # Handle speech interruption while assistant audio is still playing
+                truncate_event = barge_in.on_speech_started(latest_media_timestamp)
+                if truncate_event:
+                    logger.info(f"Interrupting response with id: {truncate_event['item_id']}")
+                    barge_in.discard_unsent_marks(twilio_queue.clear_audio())
+                    openai_queue.put_control(json.dumps(truncate_event))
+                    twilio_queue.put_control(media_frame.clear())
+
+            async def on_speech_stopped(response: Dict):
+                turn_timer.on_speech_stopped()
+
+            async def on_response_created(response: Dict):
+                turn_timer.on_response_created()
+
+            openai_handlers = {
+                'conversation.item.input_audio_transcription.delta': on_turn_event,
+                'conversation.item.input_audio_transcription.completed': on_turn_event,
+                'conversation.item.input_audio_transcription.failed': on_turn_event,
+                'response.audio_transcript.delta': on_turn_event,
+                'response.audio_transcript.done': on_turn_event,
+                'response.text.delta': on_turn_event,
+                'response.text.done': on_turn_event,
+                'response.done': on_response_done,
+                'input_audio_buffer.speech_started': on_speech_started,
+                'input_audio_buffer.speech_stopped': on_speech_stopped,
+                'response.created': on_response_created,
+            }
+
             async def handle_openai_messages():
                 nonlocal websocket_connected
                 try:
                     while websocket_connected and openai_ws.open:
                         try:
                             message = await openai_ws.recv()
-                            response = json.loads(message)
-                            
-                            # Handle transcription
-                            if response.get('type') == 'conversation.item.input_audio_transcription.completed':
-                                transcript = response.get('transcript', '')
-                                logger.info(f"User said: {transcript}")
-                                if transcript.strip():  # Only add non-empty transcripts
-                                    current_time = datetime.now().isoformat()
-                                    conversation_history.append(f"User: {transcript}")
-                                    message_timestamps.append({
-                                        "message": f"User: {transcript}",
-                                        "timestamp": current_time,
-                                        "type": "user"
-                                    })
-                                    
-                                    # Check for goodbye keywords in user's message
-                                    if any(word.lower() in transcript.lower() for word in ["goodbye", "bye"]):
-                                        logger.info("Goodbye detected in user message, ending call...")
-                                        websocket_connected = False
-                                        # Initialize Twilio client
-                                        client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
-                                        if current_call_sid:
-                                            try:
-                                                # End the call
-                                                client.calls(current_call_sid).update(status="completed")
-                                                logger.info(f"Call {current_call_sid} ended successfully")
-                                                # Handle call completion
-                                                await handle_call_completion(
-                                                    current_call_sid,
-                                                    current_simulation_id,
-                                                    conversation_history,
-                                                    message_timestamps
-                                                )
-                                            except Exception as e:
-                                                logger.error(f"Error ending call: {str(e)}")
-                                        break
-                                    
-                                    if current_call_sid and current_simulation_id:
-                                        await update_call_record(
-                                            simulation_id=current_simulation_id,
-                                            call_sid=current_call_sid,
-                                            updates={
-                                                "transcript": conversation_history,
-                                                "message_timestamps": message_timestamps
-                                            }
-                                        )
+                            frame = decode_openai_frame(message)
                             
                             # Handle audio responses
-                            elif response.get('type') == 'response.audio.delta' and 'delta' in response:
-                                audio_payload = base64.b64encode(
-                                    base64.b64decode(response['delta'])).decode('utf-8')
-                                if websocket_connected:
-                                    await websocket.send_json({
-                                        "event": "media",
-                                        "streamSid": stream_sid,
-                                        "media": {
-                                            "payload": audio_payload
-                                        }
-                                    })
-                            
-                            # Handle completed assistant responses
-                            elif response.get('type') == 'response.done':
-                                response_data = response.get('response', {})
-                                output = response_data.get('output', [])
-                                for item in output:
-                                    if item.get('role') == 'assistant' and item.get('content'):
-                                        for content in item['content']:
-                                            if content.get('type') == 'audio' and content.get('transcript'):
-                                                assistant_text = content['transcript']
-                                                current_time = datetime.now().isoformat()
-                                                logger.info(f"Assistant response: {assistant_text}")
-                                                conversation_history.append(f"Assistant: {assistant_text}")
-                                                message_timestamps.append({
-                                                    "message": f"Assistant: {assistant_text}",
-                                                    "timestamp": current_time,
-                                                    "type": "assistant"
-                                                })
-                                                
-                                                # Check for goodbye keywords in assistant's message
-                                                if any(word.lower() in assistant_text.lower() for word in ["goodbye", "bye"]):
-                                                    logger.info("Goodbye detected in assistant message, ending call...")
-                                                    websocket_connected = False
-                                                    # Initialize Twilio client
-                                                    client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
-                                                    if current_call_sid:
-                                                        try:
-                                                            # End the call
-                                                            client.calls(current_call_sid).update(status="completed")
-                                                            logger.info(f"Call {current_call_sid} ended successfully")
-                                                            # Handle call completion
-                                                            await handle_call_completion(
-                                                                current_call_sid,
-                                                                current_simulation_id,
-                                                                conversation_history,
-                                                                message_timestamps
-                                                            )
-                                                        except Exception as e:
-                                                            logger.error(f"Error ending call: {str(e)}")
-                                                    break
-                                                
-                                                if current_call_sid and current_simulation_id:
-                                                    await update_call_record(
-                                                        simulation_id=current_simulation_id,
-                                                        call_sid=current_call_sid,
-                                                        updates={
-                                                            "transcript": conversation_history,
-                                                            "message_timestamps": message_timestamps
-                                                        }
-                                                    )
+                            if frame.kind == 'response.audio.delta':
+                                turn_timer.on_audio_delta()
+                                if frame.payload is not None and websocket_connected:
+                                    if media_frame is None:
+                                        twilio_queue.put_audio(frame.payload)
+                                        continue
+                                    mark_name = barge_in.on_audio_delta(frame.item_id, latest_media_timestamp)
+                                    if mark_name is not None:
+                                        twilio_queue.put_audio(frame.payload)
+                                        twilio_queue.put_control(media_frame.mark(mark_name), droppable=True)
+                                continue
+                            handler = openai_handlers.get(frame.kind)
+                            if handler:
+                                await handler(frame.data)
                         except WebSocketDisconnect:
                             logger.info("WebSocket disconnected in OpenAI message handler")
                             websocket_connected = False
@@ -485,13 +643,83 @@ async def handle_media_stream(websocket: WebSocket):
                     logger.error(f"Error in OpenAI message handler: {str(e)}")
                     websocket_connected = False
             
-            await asyncio.gather(handle_twilio_messages(), handle_openai_messages())
+            background_tasks = [
+                asyncio.create_task(openai_queue.run()),
+                asyncio.create_task(twilio_queue.run()),
+                asyncio.create_task(flush_inbound_audio_on_deadline())
+            ]
+            try:
+                await asyncio.gather(handle_twilio_messages(), handle_openai_messages())
+            finally:
+                for task in background_tasks:
+                    task.cancel()
+                # Utterances cut off by the stream closing still belong in the transcript
+                await record_turns(turns.flush())
+                logger.info(f"Send queues for call {current_call_sid}: OpenAI {openai_queue.stats()}, Twilio {twilio_queue.stats()}")
+        finally:
+            await openai_ws.close()
     except Exception as e:
         logger.error(f"Error in WebSocket connection: {str(e)}")
     finally:
+        active_media_streams.pop(stream_sid, None)
+        logger.info(f"Inbound audio for call {current_call_sid}: {inbound_audio.stats()}")
+        logger.info(f"Turn latency for call {current_call_sid}: {turn_timer.stats()}")
+        if (conversation_history or barge_in.interruptions or turn_timer.turns) and current_call_sid and current_simulation_id:
+            conversation_metrics = {"latency": turn_timer.stats()}
+            if barge_in.interruptions:
+                logger.info(f"Barge-in for call {current_call_sid}: {barge_in.stats()}")
+                conversation_metrics["barge_in"] = barge_in.stats()
+            # Final snapshot of the legacy transcript columns for readers that don't use conversation_turns
+            persister.update({
+                "transcript": conversation_history,
+                "message_timestamps": message_timestamps,
+                "response_times": turn_timer.turns,
+                "token_counts": turn_timer.token_counts,
+                "conversation_metrics": conversation_metrics
+            })
         if websocket.client_state != WebSocketState.DISCONNECTED:
             await websocket.close()
         logger.info("WebSocket connection closed")
+        await persister.close()
+        logger.info(f"Persistence for call {current_call_sid}: {persister.stats()}")
+        if call_completed:
+            completion_notifier.notify(current_call_sid, "completed")
+        # The caller may hang up first, so any call with a transcript is analyzed
+        if message_timestamps and current_call_sid:
+            await enqueue_call_analysis(current_call_sid, message_timestamps, turn_timer.turns)
+
+@router.get("/media-stream/metrics", response_class=JSONResponse)
+async def get_media_stream_metrics():
+    """Get per-call counters for all live media streams."""
+    return {
+        "active_streams": len(active_media_streams),
+        "realtime_pool": realtime_pool.stats(),
+        "call_registry": call_registry.stats(),
+        "test_configuration_cache": test_configuration_cache.stats(),
+        "dial_dispatcher": dial_dispatcher.stats(),
+        "twilio": twilio_http_client.stats(),
+        "call_completion": completion_notifier.stats(),
+        "simulations": simulation_engine.stats(),
+        "analysis": analysis_queue.stats(),
+        "analysis_cache": analysis_cache.stats(),
+        "streams": {
+            sid: {
+                name: component.stats() if hasattr(component, "stats") else component
+                for name, component in stream.items()
+            }
+            for sid, stream in active_media_streams.items()
+        }
+    }
+
+@router.post("/test-configurations/invalidate")
+async def invalidate_test_configuration_cache(phone_number: Optional[str] = None, test_id: Optional[str] = None):
+    """Drop cached test configurations; call after writing to test_configurations."""
+    invalidated = invalidate_test_configurations(phone_number, test_id)
+    logger.info(f"Invalidated {invalidated} cached test configurations (phone_number={phone_number}, test_id={test_id})")
+    return {
+        "status": "success",
+        "invalidated": invalidated
+    }
 
 @router.get("/transcript", response_class=JSONResponse)
 async def get_transcript(
@@ -500,16 +728,17 @@ async def get_transcript(
 ):
     """Get transcript for a specific call or latest transcript."""
     try:
-        query = supabase_client.table('voice_conversations').select('*')
+        query = db_client.table('voice_conversations').select('*')
         
         if simulation_id:
             query = query.eq('simulation_id', simulation_id)
         if call_sid:
             query = query.eq('call_sid', call_sid)
             
-        result = query.order('created_at', desc=True).limit(1).execute()
+        result = await query.order('created_at', desc=True).limit(1).execute()
         
         if result.data:
+            await with_turn_transcripts(result.data)
             return {
                 "simulation_id": result.data[0]["simulation_id"],
                 "call_sid": result.data[0]["call_sid"],
@@ -525,7 +754,7 @@ async def get_transcript(
 async def test_db():
     try:
         # Try to query the table
-        result = supabase_client.table('voice_conversations').select('*').limit(1).execute()
+        result = await db_client.table('voice_conversations').select('*').limit(1).execute()
         return {"status": "success", "data": result.data}
     except Exception as e:
         return {
@@ -535,76 +764,29 @@ async def test_db():
             "key_prefix": SUPABASE_KEY[:6] if SUPABASE_KEY else None
         }
 
+async def plan_personas(to_number: str, num_calls: int, seed: Optional[int] = None):
+    """Expand the persona matrix for a batch once; returns the seed used and one persona per call (None without a config)."""
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+    config = await get_latest_test_configuration(to_number)
+    if not config:
+        return seed, [None] * num_calls
+    return seed, expand_persona_matrix(config, num_calls, seed)
+
 @router.post("/batch-test-calls")
-async def make_batch_test_calls(to_number: str, num_calls: int = 1):
-    """Make multiple test calls to a specified number."""
-    if num_calls > 10:
+async def make_batch_test_calls(to_number: str, num_calls: int = 1, seed: Optional[int] = None):
+    """Queue multiple test calls to a specified number; returns a dial job ID without waiting for the calls to be placed."""
+    limit_error = call_limit_error(num_calls)
+    if limit_error:
         return {
             "status": "error",
-            "message": "Maximum number of concurrent calls is 10"
+            "message": limit_error
         }
     
     try:
-        calls = []
-        # Create multiple calls
-        for i in range(num_calls):
-            try:
-                # Initialize Twilio client
-                client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
-                
-                # Create call record first
-                call_record_id = await create_call_record(
-                    simulation_id=f"test_simulation_{i}",
-                    call_sid="pending",
-                    phone_number=to_number,
-                    user_id=str(uuid4()),  # Generate a random UUID for user_id
-                    status="initiated"  # Add initial status
-                )
-                
-                # Add a small delay between calls to prevent overwhelming the system
-                if i > 0:
-                    await asyncio.sleep(10)
-                
-                # Make the call
-                call = client.calls.create(
-                    to=to_number,
-                    from_=TWILIO_PHONE_NUMBER,
-                    url=f"https://swarm-backend-new.onrender.com/incoming-call",
-                    record=True,
-                    status_callback=f"https://swarm-backend-new.onrender.com/call-status",
-                    status_callback_event=['initiated', 'ringing', 'answered', 'completed']
-                )
-                
-                # Update the call record with the actual call_sid
-                await update_call_record(
-                    simulation_id=f"test_simulation_{i}",
-                    call_sid="pending",
-                    updates={
-                        "call_sid": call.sid
-                    }
-                )
-                
-                calls.append({
-                    "call_number": i + 1,
-                    "call_sid": call.sid,
-                    "to_number": to_number,
-                    "status": "initiated"
-                })
-                
-                logger.info(f"Initiated call {i + 1} with SID: {call.sid}")
-                
-            except Exception as e:
-                logger.error(f"Error making call {i + 1}: {str(e)}")
-                calls.append({
-                    "call_number": i + 1,
-                    "error": str(e)
-                })
-        
-        return {
-            "status": "success",
-            "message": f"Initiated {num_calls} test calls",
-            "calls": calls
-        }
+        seed, personas = await plan_personas(to_number, num_calls, seed)
+        job = submit_dial_job(to_number, personas, simulation_prefix="test_simulation")
+        return dial_job_response(job, seed, f"Queued {num_calls} test calls")
         
     except Exception as e:
         logger.error(f"Error in batch call creation: {str(e)}")
@@ -617,19 +799,21 @@ async def make_batch_test_calls(to_number: str, num_calls: int = 1):
 async def get_batch_status():
     """Get the status of all active test calls."""
     try:
-        result = supabase_client.table('voice_conversations')\
+        result = await db_client.table('voice_conversations')\
             .select('*')\
             .order('created_at', desc=True)\
             .limit(10)\
             .execute()
         
         calls = []
-        for record in result.data:
+        for record in await with_turn_transcripts(result.data):
             calls.append({
                 "simulation_id": record["simulation_id"],
                 "call_sid": record["call_sid"],
                 "status": record["status"],
                 "phone_number": record["phone_number"],
+                "persona": record.get("persona"),
+                "persona_label": record.get("persona_label"),
                 "transcript": record.get("transcript", [])
             })
         
@@ -645,83 +829,19 @@ async def get_batch_status():
         }
 
 @router.post("/multi-call")
-async def make_multiple_calls(to_number: str, num_calls: int = 1):
-    """Make multiple calls by invoking /test-call endpoint multiple times."""
-    if num_calls > 10:
+async def make_multiple_calls(to_number: str, num_calls: int = 1, seed: Optional[int] = None):
+    """Queue multiple calls under one job ID; returns without waiting for the calls to be placed."""
+    limit_error = call_limit_error(num_calls)
+    if limit_error:
         return {
             "status": "error",
-            "message": "Maximum number of concurrent calls is 10"
+            "message": limit_error
         }
     
     try:
-        global job_counter
-        job_counter += 1
-        current_job_id = f"job_{job_counter}"
-        
-        calls = []
-        for i in range(num_calls):
-            try:
-                # Initialize Twilio client
-                client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
-                
-                # Create call record first with the job ID
-                call_record = await create_call_record(
-                    simulation_id=current_job_id,
-                    call_sid=f"pending_{i}",  # Temporary call_sid
-                    phone_number=to_number,
-                    user_id=str(uuid4()),  # Generate random UUID for user_id
-                    status="initiated"
-                )
-                
-                # Add a delay between calls
-                if i > 0:
-                    await asyncio.sleep(10)
-                
-                # Make the call
-                call = client.calls.create(
-                    to=to_number,
-                    from_=TWILIO_PHONE_NUMBER,
-                    url=f"https://swarm-backend-new.onrender.com/incoming-call",
-                    record=True,
-                    status_callback=f"https://swarm-backend-new.onrender.com/call-status",
-                    status_callback_event=['initiated', 'ringing', 'answered', 'completed']
-                )
-                
-                # Update the call record with the actual call_sid
-                await update_call_record(
-                    simulation_id=current_job_id,
-                    call_sid=f"pending_{i}",
-                    updates={
-                        "call_sid": call.sid,
-                        "transcript": []  # Initialize empty transcript array
-                    }
-                )
-                
-                calls.append({
-                    "job_id": current_job_id,
-                    "call_number": i + 1,
-                    "call_sid": call.sid,
-                    "to_number": to_number,
-                    "status": "initiated"
-                })
-                
-                logger.info(f"Initiated call {i + 1} with job ID: {current_job_id}, call_sid: {call.sid}")
-                
-            except Exception as e:
-                logger.error(f"Error making call {i + 1}: {str(e)}")
-                calls.append({
-                    "job_id": current_job_id,
-                    "call_number": i + 1,
-                    "status": "error",
-                    "message": str(e)
-                })
-        
-        return {
-            "status": "success",
-            "message": f"Initiated {num_calls} test calls",
-            "job_id": current_job_id,
-            "calls": calls
-        }
+        seed, personas = await plan_personas(to_number, num_calls, seed)
+        job = submit_dial_job(to_number, personas)
+        return dial_job_response(job, seed, f"Queued {num_calls} test calls")
         
     except Exception as e:
         logger.error(f"Error in multiple call creation: {str(e)}")
@@ -730,114 +850,99 @@ async def make_multiple_calls(to_number: str, num_calls: int = 1):
             "message": str(e)
         }
 
-async def handle_call_completion(current_call_sid: str, current_simulation_id: str, conversation_history: List[str], message_timestamps: List[Dict]):
-    """Handle call completion and trigger analysis."""
+@router.get("/dial-jobs/{job_id}")
+async def get_dial_job(job_id: str):
+    """Get the dialing progress of a job queued by /batch-test-calls or /multi-call."""
+    job = dial_dispatcher.get_job(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"status": "error", "message": f"Unknown job {job_id}"})
+    return {"status": "success", **job.to_dict()}
+
+@router.get("/dial-jobs")
+async def get_dial_dispatcher_stats():
+    """Get dial dispatcher counters."""
+    return dial_dispatcher.stats()
+
+@router.get("/analysis-jobs")
+async def get_analysis_queue_stats():
+    """Get analysis queue depth, throughput and latency, and analysis cache hit rate."""
+    return {**analysis_queue.stats(), "cache": analysis_cache.stats()}
+
+@router.post("/analysis-cache/invalidate")
+async def invalidate_analysis_cache(prompt_version: Optional[str] = None, all_versions: bool = False):
+    """
+    Drop cached conversation analyses so their transcripts are analyzed again.
+
+    Defaults to the current prompt version, e.g. after changing how results are
+    judged without changing the prompt text; pass `prompt_version` to purge an
+    old version or `all_versions` to empty the cache.
+    """
+    version = None if all_versions else prompt_version or analysis_cache.prompt_version
+    invalidated = await analysis_cache.invalidate(version)
+    logger.info(f"Invalidated cached analyses (prompt_version={version}): {invalidated}")
+    return {
+        "status": "success",
+        "prompt_version": version,
+        "invalidated": invalidated
+    }
+
+async def enqueue_call_analysis(current_call_sid: str, message_timestamps: List[Dict], response_times: Optional[List[Dict]] = None):
+    """Queue conversation analysis for a completed call whose record is already up to date."""
     try:
-        logger.info(f"Starting call completion handling for call {current_call_sid}")
-        
-        # Update call record
-        await update_call_record(
-            simulation_id=current_simulation_id,
-            call_sid=current_call_sid,
-            updates={
-                "status": "completed",
-                "transcript": conversation_history,
-                "message_timestamps": message_timestamps
-            }
-        )
-        logger.info(f"Updated call record with final transcript for call {current_call_sid}")
-        
-        # Get the conversation ID from the database
-        result = supabase_client.table('voice_conversations')\
-            .select('id')\
-            .eq('call_sid', current_call_sid)\
-            .execute()
+        # Get the conversation ID
+        call_info = await get_call_info(current_call_sid)
             
-        if result.data:
-            conversation_id = result.data[0]['id']
-            logger.info(f"Starting conversation analysis for call {current_call_sid} (conversation_id: {conversation_id})")
-            # Trigger analysis
-            await analyze_conversation(conversation_id, message_timestamps)
-            logger.info(f"Completed conversation analysis for call {current_call_sid}")
+        if call_info:
+            conversation_id = call_info.id
+            # Analysis runs in the background worker pool, outside the call teardown path
+            job_id = await analysis_queue.submit(conversation_id, current_call_sid, message_timestamps, response_times)
+            logger.info(f"Queued conversation analysis {job_id} for call {current_call_sid} (conversation_id: {conversation_id})")
         else:
             logger.error(f"Could not find conversation ID for call {current_call_sid}")
             
     except Exception as e:
-        logger.error(f"Error in call completion handling: {str(e)}")
+        logger.error(f"Error in call analysis: {str(e)}")
 
 @router.post("/execute_large_calls")
-async def execute_large_calls(to_number: str, total_calls: int = 2):
-    """Execute multiple calls in batches of 2, waiting for each batch to complete before starting the next."""
-    if total_calls > 10:
+async def execute_large_calls(to_number: str, total_calls: int = 2, concurrency: int = 2, seed: Optional[int] = None):
+    """Execute multiple calls keeping `concurrency` of them in flight, dialing the next call as soon as one ends."""
+    limit_error = call_limit_error(total_calls, concurrency)
+    if limit_error:
         return {
             "status": "error",
-            "message": "Maximum number of total calls is 10"
+            "message": limit_error
         }
     
+    requests = []
     try:
-        all_calls = []
-        batch_size = 2
-        num_batches = (total_calls + batch_size - 1) // batch_size  # Ceiling division
+        # Assign personas across the whole run so coverage is stratified over all calls
+        seed, personas = await plan_personas(to_number, total_calls, seed)
+        job_id = new_job_id()
+        requests = [DialRequest(job_id, i + 1, to_number, job_id, persona) for i, persona in enumerate(personas)]
         
-        for batch in range(num_batches):
-            remaining_calls = total_calls - (batch * batch_size)
-            current_batch_size = min(batch_size, remaining_calls)
-            
-            logger.info(f"Starting batch {batch + 1} with {current_batch_size} calls")
-            
-            # Make the batch of calls
-            batch_response = await make_multiple_calls(to_number, current_batch_size)
-            
-            if batch_response["status"] == "error":
-                return {
-                    "status": "error",
-                    "message": f"Error in batch {batch + 1}: {batch_response['message']}",
-                    "completed_calls": all_calls
-                }
-            
-            # Track the calls from this batch
-            current_batch_calls = batch_response["calls"]
-            all_calls.extend(current_batch_calls)
-            
-            # Wait for all calls in this batch to complete
-            for call in current_batch_calls:
-                call_sid = call["call_sid"]
-                job_id = call["job_id"]
-                
-                # Poll until the call is completed
-                while True:
-                    result = supabase_client.table('voice_conversations')\
-                        .select('status, transcript')\
-                        .eq('call_sid', call_sid)\
-                        .execute()
-                    
-                    if not result.data:
-                        logger.error(f"Could not find record for call {call_sid}")
-                        break
-                        
-                    status = result.data[0]['status']
-                    if status == "completed":
-                        # Ensure we have a transcript and the analysis is done
-                        transcript = result.data[0].get('transcript', [])
-                        if transcript:
-                            logger.info(f"Call {call_sid} completed with transcript")
-                            break
-                    elif status in ["failed", "busy", "no-answer", "canceled"]:
-                        logger.warning(f"Call {call_sid} ended with status: {status}")
-                        break
-                        
-                    # Wait before checking again
-                    await asyncio.sleep(5)
-            
-            # Add a delay between batches
-            if batch < num_batches - 1:
-                logger.info(f"Batch {batch + 1} completed, waiting before starting next batch")
-                await asyncio.sleep(10)
+        async def place(index: int) -> Optional[str]:
+            request = await dial_dispatcher.dial(requests[index])
+            return request.call_sid if request.status == "initiated" else None
+        
+        logger.info(f"Starting {total_calls} calls as {job_id} with {concurrency} in flight")
+        window = SlidingWindow(place, wait_for_call_end, concurrency, slots=call_slots)
+        results = await window.run(total_calls)
+        concurrency_report = window.timeline.summary()
+        logger.info(f"Completed {job_id}: average concurrency {concurrency_report['average']} of {concurrency_report['target']}, peak {concurrency_report['peak']}")
+        
+        calls = []
+        for request, result in zip(requests, results):
+            if result["status"] not in ("completed", "failed"):
+                logger.warning(f"Call {result['call_sid']} ended with status: {result['status']}")
+            calls.append({**request.to_dict(), "status": result["status"]})
         
         return {
             "status": "success",
-            "message": f"Completed {total_calls} calls in {num_batches} batches",
-            "calls": all_calls
+            "message": f"Completed {total_calls} calls with up to {concurrency} in flight",
+            "job_id": job_id,
+            "seed": seed,
+            "concurrency": concurrency_report,
+            "calls": calls
         }
         
     except Exception as e:
@@ -845,5 +950,5 @@ async def execute_large_calls(to_number: str, total_calls: int = 2):
         return {
             "status": "error",
             "message": str(e),
-            "completed_calls": all_calls
-        } 
\ No newline at end of file
+            "completed_calls": [request.to_dict() for request in requests if request.status != "queued"]
+        }
@@ -7,7 +7,8 @@ from fastapi.websockets import WebSocketDisconnect
 from app.config import OPENAI_API_KEY, ssl_context, LOG_EVENT_TYPES, VOICE, SYSTEM_MESSAGE, SHOW_TIMING_MATH
 from app.utils import initialize_session, send_mark
 from app.database import update_call_record, update_call_transcript
-from app.database import supabase_client
+from app.database import db_client
+from app.services.turn_aggregator import TurnAggregator
 
 async def handle_media_stream(websocket: WebSocket, transcript):
     print("Client connected")
@@ -34,6 +35,7 @@ async def handle_media_stream(websocket: WebSocket, transcript):
         mark_queue = []
         response_start_timestamp_twilio = None
         conversation_transcript = []  # Local transcript for this specific call
+        turns = TurnAggregator()  # Builds whole utterances from the transcript deltas
 
         async def receive_from_twilio():
             nonlocal stream_sid, latest_media_timestamp, current_call_sid, current_twilio_call_sid, current_simulation_id
@@ -56,7 +58,7 @@ async def handle_media_stream(websocket: WebSocket, transcript):
                         if current_twilio_call_sid:
                             try:
                                 # First try to find by twilio_call_sid
-                                result = supabase_client.table('voice_conversations')\
+                                result = await db_client.table('voice_conversations')\
                                     .select('*')\
                                     .eq('twilio_call_sid', current_twilio_call_sid)\
                                     .execute()
@@ -88,28 +90,8 @@ async def handle_media_stream(websocket: WebSocket, transcript):
                 async for openai_message in openai_ws:
                     response = json.loads(openai_message)
 
-                    # Handle transcription completion
-                    if response.get('type') == 'conversation.item.input_audio_transcription.completed':
-                        user_transcript = response.get('transcript', '')
-                        print(f"User input transcript: {user_transcript}")
-                        if user_transcript.strip():  # Only add non-empty transcripts
-                            transcript_entry = f"User: {user_transcript}"
-                            conversation_transcript.append(transcript_entry)
-                            
-                            # Update database with new transcript
-                            if current_call_sid and current_simulation_id:
-                                try:
-                                    await update_call_record(
-                                        simulation_id=current_simulation_id,
-                                        call_sid=current_call_sid,
-                                        updates={"transcript": conversation_transcript}
-                                    )
-                                    print(f"Updated transcript for call {current_call_sid} in simulation {current_simulation_id}")
-                                except Exception as e:
-                                    print(f"Error updating transcript in database: {e}")
-
                     # Handle audio responses
-                    elif response.get('type') == 'response.audio.delta' and 'delta' in response:
+                    if response.get('type') == 'response.audio.delta' and 'delta' in response:
                         audio_payload = base64.b64encode(
                             base64.b64decode(response['delta'])).decode('utf-8')
                         audio_delta = {
@@ -129,20 +111,22 @@ async def handle_media_stream(websocket: WebSocket, transcript):
 
                         await send_mark(websocket, stream_sid)
 
-                    # Handle assistant responses
-                    elif response.get('type') == 'response.text.delta' and 'text' in response:
-                        assistant_text = response['text']
-                        transcript_entry = f"Assistant: {assistant_text}"
-                        conversation_transcript.append(transcript_entry)
+                    # Handle transcripts: deltas build up turns, and each finished turn is written once
+                    else:
+                        finished = turns.feed(response)
+                        for turn in finished:
+                            print(f"{turn['role'].capitalize()} said: {turn['text']}")
+                            conversation_transcript.append(f"{turn['role'].capitalize()}: {turn['text']}")
                         
-                        # Update database with assistant response
-                        if current_call_sid and current_simulation_id:
+                        # Update database with the new turns
+                        if finished and current_call_sid and current_simulation_id:
                             try:
                                 await update_call_record(
                                     simulation_id=current_simulation_id,
                                     call_sid=current_call_sid,
                                     updates={"transcript": conversation_transcript}
                                 )
+                                print(f"Updated transcript for call {current_call_sid} in simulation {current_simulation_id}")
                             except Exception as e:
                                 print(f"Error updating transcript in database: {e}")
 
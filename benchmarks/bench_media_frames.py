@@ -0,0 +1,115 @@
+"""
+Microbenchmark for the per-frame audio work of /media-stream.
+
+Outbound (OpenAI -> Twilio) compares the legacy path (full `json.loads`, base64
+decode + re-encode, dict construction and `json.dumps` as done by
+`WebSocket.send_json`) with event peeking plus passthrough from a pre-serialized
+per-stream template. Inbound (Twilio -> OpenAI) compares a full parse of each
+`media` frame with peeking out the payload.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_media_frames --frames 200000 --payload-bytes 800
+"""
+import argparse
+import base64
+import json
+import os
+import time
+
+from app.services.media_frames import (
+    TwilioMediaFrame,
+    decode_openai_frame,
+    decode_twilio_frame,
+    input_audio_append,
+    passthrough_payload
+)
+
+
+def legacy_frame(stream_sid: str, message: str) -> str:
+    response = json.loads(message)
+    audio_payload = base64.b64encode(base64.b64decode(response['delta'])).decode('utf-8')
+    # Starlette's send_json serializes with these options
+    return json.dumps({
+        "event": "media",
+        "streamSid": stream_sid,
+        "media": {
+            "payload": audio_payload
+        }
+    }, separators=(",", ":"), ensure_ascii=False)
+
+
+def passthrough_frame(frame: TwilioMediaFrame, message: str) -> str:
+    return frame.render(passthrough_payload(decode_openai_frame(message).payload))
+
+
+def legacy_append(message: str) -> str:
+    data = json.loads(message)
+    return json.dumps({
+        "type": "input_audio_buffer.append",
+        "audio": data['media']['payload']
+    })
+
+
+def peeked_append(message: str) -> str:
+    return input_audio_append(decode_twilio_frame(message).payload)
+
+
+def run(label: str, fn, frames: int) -> float:
+    start = time.perf_counter()
+    for _ in range(frames):
+        fn()
+    elapsed = time.perf_counter() - start
+    rate = frames / elapsed
+    print(f"{label:<20} {rate:>14,.0f} frames/sec/core  ({elapsed * 1e6 / frames:.2f} us/frame)")
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--frames", type=int, default=200_000)
+    parser.add_argument("--payload-bytes", type=int, default=800, help="μ-law bytes per delta (8 bytes = 1 ms)")
+    args = parser.parse_args()
+
+    stream_sid = "MZ" + "0" * 32
+    delta = base64.b64encode(os.urandom(args.payload_bytes)).decode('utf-8')
+    openai_message = json.dumps({
+        "type": "response.audio.delta",
+        "event_id": "event_" + "0" * 20,
+        "response_id": "resp_" + "0" * 20,
+        "item_id": "item_" + "0" * 20,
+        "output_index": 0,
+        "content_index": 0,
+        "delta": delta
+    })
+    # Twilio sends 20 ms (160 byte) frames regardless of the outbound delta size
+    twilio_message = json.dumps({
+        "event": "media",
+        "sequenceNumber": "42",
+        "media": {
+            "track": "inbound",
+            "chunk": "41",
+            "timestamp": "820",
+            "payload": base64.b64encode(os.urandom(160)).decode('utf-8')
+        },
+        "streamSid": stream_sid
+    })
+    frame = TwilioMediaFrame(stream_sid)
+
+    # Both paths must put identical bytes on the wire
+    assert json.loads(legacy_frame(stream_sid, openai_message)) == json.loads(passthrough_frame(frame, openai_message))
+    assert json.loads(legacy_append(twilio_message)) == json.loads(peeked_append(twilio_message))
+
+    print(f"Outbound: {args.frames:,} frames, {args.payload_bytes} byte μ-law payload")
+    before = run("legacy", lambda: legacy_frame(stream_sid, openai_message), args.frames)
+    after = run("peek + passthrough", lambda: passthrough_frame(frame, openai_message), args.frames)
+    print(f"{'speedup':<20} {after / before:>14.1f}x")
+
+    print(f"Inbound: {args.frames:,} frames, 160 byte μ-law payload")
+    before = run("legacy", lambda: legacy_append(twilio_message), args.frames)
+    after = run("peek", lambda: peeked_append(twilio_message), args.frames)
+    print(f"{'speedup':<20} {after / before:>14.1f}x")
+
+
+if __name__ == "__main__":
+    main()
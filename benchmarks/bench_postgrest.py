@@ -0,0 +1,73 @@
+"""
+Blocking vs. pooled async database access under concurrent load.
+
+Serves the fake PostgREST app over HTTP with an artificial per-request latency
+and runs the same burst of concurrent lookups two ways: through a synchronous
+HTTP client called from coroutines (how the Supabase client behaved), and
+through the pooled async `PostgrestClient`. A ticker task measures how long
+the event loop was stalled, which is what live media streams feel.
+
+    python -m benchmarks.bench_postgrest --queries 50 --latency-ms 20
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from app.postgrest import PostgrestClient
+from benchmarks.fake_postgrest_server import FakePostgrest, serve_fake_postgrest
+
+
+async def loop_stall_monitor(stalls, interval=0.005):
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        stalls.append((time.perf_counter() - started - interval) * 1000)
+
+
+async def run(label: str, lookup, queries: int):
+    stalls = []
+    monitor = asyncio.create_task(loop_stall_monitor(stalls))
+    await asyncio.sleep(0.02)
+    started = time.perf_counter()
+    await asyncio.gather(*(lookup(i) for i in range(queries)))
+    elapsed = (time.perf_counter() - started) * 1000
+    # Give the monitor a tick to observe a stall that lasted until the end of the burst
+    await asyncio.sleep(0.02)
+    monitor.cancel()
+    print(f"{label:<9} total {elapsed:8.1f} ms  {queries / elapsed * 1000:7.1f} queries/s  "
+          f"max loop stall {max(stalls):7.1f} ms")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--connections", type=int, default=20)
+    args = parser.parse_args()
+
+    fake = FakePostgrest(latency=args.latency_ms / 1000)
+    fake.tables["voice_conversations"] = [{"id": str(i), "call_sid": f"CA{i}", "simulation_id": "bench"} for i in range(args.queries)]
+    server = await serve_fake_postgrest(fake)
+    url = f"http://127.0.0.1:{server.port}/rest/v1"
+
+    with httpx.Client(base_url=url) as sync_client:
+        async def blocking_lookup(i):
+            sync_client.get("/voice_conversations", params={"select": "simulation_id", "call_sid": f"eq.CA{i}"})
+
+        await run("blocking", blocking_lookup, args.queries)
+
+    client = PostgrestClient(url, "key", max_connections=args.connections)
+
+    async def pooled_lookup(i):
+        await client.table("voice_conversations").select("simulation_id").eq("call_sid", f"CA{i}").execute()
+
+    await run("pooled", pooled_lookup, args.queries)
+    print(f"pooled client: {client.stats()}")
+    await client.close()
+    await server.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
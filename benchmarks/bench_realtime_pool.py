@@ -0,0 +1,74 @@
+"""
+Time-to-session for new media streams with and without the realtime session pool.
+
+Starts a local fake realtime server with an artificial handshake delay, then
+simulates a burst of call starts arriving at a fixed rate and reports how long
+each stream waited for an initialized session.
+
+    python -m benchmarks.bench_realtime_pool --calls 20 --rate 2 --handshake-ms 300
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import websockets
+
+from app.services.realtime_pool import RealtimeSessionPool
+from benchmarks.fake_realtime_server import serve_fake_realtime
+
+SESSION_UPDATE = json.dumps({"type": "session.update", "session": {"instructions": "benchmark"}})
+
+
+async def burst(pool: RealtimeSessionPool, calls: int, rate: float):
+    waits = []
+
+    async def start_call():
+        started = time.perf_counter()
+        websocket = await pool.acquire()
+        waits.append((time.perf_counter() - started) * 1000)
+        await websocket.close()
+
+    tasks = []
+    for _ in range(calls):
+        tasks.append(asyncio.create_task(start_call()))
+        await asyncio.sleep(1 / rate)
+    await asyncio.gather(*tasks)
+    return sorted(waits)
+
+
+def report(label: str, waits, pool: RealtimeSessionPool):
+    p95 = waits[min(len(waits) - 1, int(len(waits) * 0.95))]
+    stats = pool.stats()
+    print(f"{label:<8} avg {sum(waits) / len(waits):8.1f} ms  p95 {p95:8.1f} ms  "
+          f"hits {stats['hits']:>3}  misses {stats['misses']:>3}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=20)
+    parser.add_argument("--rate", type=float, default=2.0, help="call starts per second")
+    parser.add_argument("--handshake-ms", type=float, default=300)
+    args = parser.parse_args()
+
+    server = await serve_fake_realtime(handshake_delay=args.handshake_ms / 1000)
+    url = f"ws://127.0.0.1:{server.port}/v1/realtime"
+
+    def connect():
+        return websockets.connect(url)
+
+    cold = RealtimeSessionPool(connect, SESSION_UPDATE, calls_per_second=args.rate)
+    report("cold", await burst(cold, args.calls, args.rate), cold)
+
+    warm = RealtimeSessionPool(connect, SESSION_UPDATE, calls_per_second=args.rate, refill_interval=0.25)
+    await warm.start()
+    # Let the pool fill before the burst arrives
+    while warm.stats()["idle"] < warm.target_size:
+        await asyncio.sleep(0.05)
+    report("pooled", await burst(warm, args.calls, args.rate), warm)
+    await warm.close()
+    await server.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,83 @@
+"""
+A new blocking Twilio client per call vs. one shared pooled async client.
+
+Serves the fake Twilio API over HTTP with an artificial per-request latency
+and places the same burst of concurrent calls two ways: constructing
+`twilio.rest.Client` per call and calling the blocking `calls.create` from a
+coroutine (what the endpoints used to do), and through one `Client` backed by
+`PooledTwilioHttpClient` with `create_async`. Reports wall time, how long
+the event loop was stalled, connections opened and per-endpoint metrics.
+
+    python -m benchmarks.bench_twilio_client --calls 20 --latency-ms 50
+"""
+import argparse
+import asyncio
+import time
+
+from twilio.http.http_client import TwilioHttpClient
+from twilio.rest import Client
+
+from app.twilio_http import PooledTwilioHttpClient
+from benchmarks.bench_postgrest import loop_stall_monitor
+from benchmarks.fake_twilio_server import FakeTwilio, RedirectTransport, serve_fake_twilio
+
+ACCOUNT_SID = "AC" + "0" * 32
+
+
+class RedirectingTwilioHttpClient(TwilioHttpClient):
+    """The SDK's default blocking HTTP client, pointed at the fake server."""
+
+    def __init__(self, base_url: str):
+        super().__init__()
+        self.base_url = base_url
+
+    def request(self, method, url, *args, **kwargs):
+        return super().request(method, url.replace("https://api.twilio.com", self.base_url), *args, **kwargs)
+
+
+async def run(label: str, place_call, calls: int, fake: FakeTwilio):
+    fake.connections.clear()
+    stalls = []
+    monitor = asyncio.create_task(loop_stall_monitor(stalls))
+    await asyncio.sleep(0.02)
+    started = time.perf_counter()
+    await asyncio.gather(*(place_call(i) for i in range(calls)))
+    elapsed = (time.perf_counter() - started) * 1000
+    await asyncio.sleep(0.02)
+    monitor.cancel()
+    print(f"{label:<9} total {elapsed:8.1f} ms  max loop stall {max(stalls):7.1f} ms  connections {len(fake.connections)}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--connections", type=int, default=20)
+    args = parser.parse_args()
+
+    fake = FakeTwilio(latency=args.latency_ms / 1000)
+    server = await serve_fake_twilio(fake)
+    base_url = f"http://127.0.0.1:{server.port}"
+
+    async def per_call_client(i):
+        client = Client(ACCOUNT_SID, "token", http_client=RedirectingTwilioHttpClient(base_url))
+        client.calls.create(to=f"+1555000{i:04d}", from_="+15550000000", url="https://example.com/incoming-call")
+
+    await run("per-call", per_call_client, args.calls, fake)
+
+    http_client = PooledTwilioHttpClient(max_connections=args.connections, transport=RedirectTransport(base_url))
+    shared = Client(ACCOUNT_SID, "token", http_client=http_client)
+
+    async def pooled(i):
+        await shared.calls.create_async(to=f"+1555000{i:04d}", from_="+15550000000", url="https://example.com/incoming-call")
+
+    await run("pooled", pooled, args.calls, fake)
+    # A second burst reuses the kept-alive connections
+    await run("pooled", pooled, args.calls, fake)
+    print(f"pooled client: {http_client.stats()}")
+    await http_client.close()
+    await server.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
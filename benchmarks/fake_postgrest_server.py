@@ -0,0 +1,182 @@
+"""
+Minimal in-memory stand-in for Supabase's PostgREST API.
+
+Serves `/rest/v1/<table>` with select, insert, upsert, update and delete, the
+eq/neq/gt/gte/lt/lte/is/in filters, `order`, `limit` and `Prefer: count=exact`,
+plus an optional artificial per-request latency. Tests mount the ASGI app
+directly; benchmarks serve it over HTTP:
+
+    fake = FakePostgrest(latency=0.02)
+    client = PostgrestClient("http://fake/rest/v1", "key", transport=httpx.ASGITransport(app=fake.app))
+
+    server = await serve_fake_postgrest(fake, port=0)
+    url = f"http://127.0.0.1:{server.port}/rest/v1"
+"""
+import asyncio
+import json
+import re
+import threading
+import uuid
+from typing import Dict, List, Optional
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+_RESERVED_PARAMS = {"select", "order", "limit", "on_conflict"}
+_QUOTED = re.compile(r'"((?:[^"\\]|\\.)*)"|([^,]+)')
+
+
+def _coerce(value: str):
+    if value == "null":
+        return None
+    if value in ("true", "false"):
+        return value == "true"
+    return value
+
+
+def _compare(row_value, value: str, operator: str) -> bool:
+    if operator == "is":
+        return row_value is _coerce(value) if value in ("null", "true", "false") else False
+    if operator == "in":
+        options = [m.group(1).replace('\\"', '"').replace("\\\\", "\\") if m.group(1) is not None else m.group(2)
+                   for m in _QUOTED.finditer(value.strip("()"))]
+        return str(row_value) in options
+    if operator in ("eq", "neq"):
+        matches = str(row_value).lower() == value if isinstance(row_value, bool) else str(row_value) == value
+        return matches if operator == "eq" else not matches
+    if row_value is None:
+        return False
+    try:
+        left, right = float(row_value), float(value)
+    except (TypeError, ValueError):
+        left, right = str(row_value), value
+    return {"gt": left > right, "gte": left >= right, "lt": left < right, "lte": left <= right}[operator]
+
+
+class FakePostgrest:
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.tables: Dict[str, List[Dict]] = {}
+        self.requests = 0
+        self.app = Starlette(routes=[
+            Route("/rest/v1/{table}", self._handle, methods=["GET", "POST", "PATCH", "DELETE"])
+        ])
+
+    async def _handle(self, request: Request) -> Response:
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        table = self.tables.setdefault(request.path_params["table"], [])
+        params = list(request.query_params.multi_items())
+        prefer = request.headers.get("prefer", "")
+        matching = [row for row in table if self._matches(row, params)]
+
+        if request.method == "GET":
+            rows = self._order_and_limit(matching, params)
+            headers = {}
+            if "count=exact" in prefer:
+                headers["Content-Range"] = f"0-{max(len(rows) - 1, 0)}/{len(matching)}"
+            return JSONResponse(self._project(rows, params), headers=headers)
+
+        if request.method == "POST":
+            body = json.loads(await request.body())
+            rows = body if isinstance(body, list) else [body]
+            conflict = dict(params).get("on_conflict")
+            if "ignore-duplicates" in prefer:
+                # Like PostgREST, only the rows actually inserted are returned
+                written = [self._insert(table, row) for row in rows if self._find(table, row, conflict) is None]
+            elif "merge-duplicates" in prefer:
+                written = [self._upsert(table, row, conflict) for row in rows]
+            else:
+                written = [self._insert(table, row) for row in rows]
+            return JSONResponse(written, status_code=201)
+
+        if request.method == "PATCH":
+            values = json.loads(await request.body())
+            for row in matching:
+                row.update(values)
+            return JSONResponse(matching)
+
+        for row in matching:
+            table.remove(row)
+        return JSONResponse(matching)
+
+    @staticmethod
+    def _matches(row: Dict, params) -> bool:
+        for column, expression in params:
+            if column in _RESERVED_PARAMS:
+                continue
+            operator, _, value = expression.partition(".")
+            if not _compare(row.get(column), value, operator):
+                return False
+        return True
+
+    @staticmethod
+    def _order_and_limit(rows: List[Dict], params) -> List[Dict]:
+        rows = list(rows)
+        for column, expression in params:
+            if column == "order":
+                name, _, direction = expression.partition(".")
+                rows.sort(key=lambda row: (row.get(name) is None, row.get(name)), reverse=direction == "desc")
+            elif column == "limit":
+                rows = rows[:int(expression)]
+        return rows
+
+    @staticmethod
+    def _project(rows: List[Dict], params) -> List[Dict]:
+        columns = dict(params).get("select", "*")
+        if columns == "*":
+            return rows
+        names = columns.split(",")
+        return [{name: row.get(name) for name in names} for row in rows]
+
+    @staticmethod
+    def _insert(table: List[Dict], row: Dict) -> Dict:
+        row = {"id": str(uuid.uuid4()), **row}
+        table.append(row)
+        return row
+
+    @staticmethod
+    def _find(table: List[Dict], row: Dict, conflict: str) -> Optional[Dict]:
+        keys = (conflict or "id").split(",")
+        for existing in table:
+            if all(existing.get(key) == row.get(key) for key in keys):
+                return existing
+        return None
+
+    def _upsert(self, table: List[Dict], row: Dict, conflict: str) -> Dict:
+        existing = self._find(table, row, conflict)
+        if existing is not None:
+            existing.update(row)
+            return existing
+        return self._insert(table, row)
+
+
+class _Server:
+    """Runs the app in its own thread and event loop, so clients that block their own loop still get answers."""
+
+    def __init__(self, fake: FakePostgrest, port: int):
+        self._server = uvicorn.Server(uvicorn.Config(fake.app, host="127.0.0.1", port=port, log_level="warning"))
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    @property
+    def port(self) -> int:
+        return self._server.servers[0].sockets[0].getsockname()[1]
+
+    async def start(self) -> None:
+        self._thread.start()
+        while not self._server.started:
+            await asyncio.sleep(0.01)
+
+    async def close(self) -> None:
+        self._server.should_exit = True
+        await asyncio.to_thread(self._thread.join)
+
+
+async def serve_fake_postgrest(fake: FakePostgrest, port: int = 0) -> _Server:
+    server = _Server(fake, port)
+    await server.start()
+    return server
@@ -0,0 +1,68 @@
+"""
+Minimal stand-in for the OpenAI Realtime websocket API.
+
+Accepts connections after an optional artificial handshake delay, records
+every client event and answers `session.update` with `session.updated`.
+`send_audio_response` pushes assistant audio deltas to a connection. Used by
+the benchmarks and local end-to-end checks:
+
+    server = await serve_fake_realtime(port=0, handshake_delay=0.3)
+    url = f"ws://127.0.0.1:{server.port}/v1/realtime"
+"""
+import asyncio
+import base64
+import json
+import os
+
+import websockets
+
+
+class FakeRealtimeServer:
+    def __init__(self, handshake_delay: float = 0.0):
+        self.handshake_delay = handshake_delay
+        self.connections = 0
+        self.received = []
+        self._server = None
+
+    @property
+    def port(self) -> int:
+        return self._server.sockets[0].getsockname()[1]
+
+    async def _process_request(self, path, headers):
+        if self.handshake_delay:
+            await asyncio.sleep(self.handshake_delay)
+        return None
+
+    async def _handler(self, websocket, path):
+        self.connections += 1
+        try:
+            await websocket.send(json.dumps({"type": "session.created", "session": {}}))
+            async for message in websocket:
+                event = json.loads(message)
+                self.received.append(event)
+                if event["type"] == "session.update":
+                    await websocket.send(json.dumps({"type": "session.updated", "session": event["session"]}))
+        except websockets.ConnectionClosed:
+            pass
+
+    async def send_audio_response(self, websocket, item_id: str = "item_1", deltas: int = 5):
+        for _ in range(deltas):
+            await websocket.send(json.dumps({
+                "type": "response.audio.delta",
+                "item_id": item_id,
+                "delta": base64.b64encode(os.urandom(800)).decode('utf-8')
+            }))
+
+    async def start(self, port: int = 0):
+        self._server = await websockets.serve(
+            self._handler, "127.0.0.1", port, process_request=self._process_request
+        )
+        return self
+
+    async def close(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+
+async def serve_fake_realtime(port: int = 0, handshake_delay: float = 0.0) -> FakeRealtimeServer:
+    return await FakeRealtimeServer(handshake_delay).start(port)
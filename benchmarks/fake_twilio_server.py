@@ -0,0 +1,90 @@
+"""
+Minimal stand-in for the Twilio Calls REST API.
+
+Serves create (`POST .../Calls.json`), update (`POST .../Calls/{sid}.json`)
+and fetch (`GET .../Calls/{sid}.json`) with an optional artificial latency,
+and can answer a share of creates with 429. Point a Twilio client at it
+with a transport that rewrites api.twilio.com:
+
+    fake = FakeTwilio(latency=0.05)
+    server = await serve_fake_twilio(fake, port=0)
+    http_client = PooledTwilioHttpClient(transport=RedirectTransport(f"http://127.0.0.1:{server.port}"))
+"""
+import asyncio
+import uuid
+from typing import Dict
+
+import httpx
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from benchmarks.fake_postgrest_server import _Server
+
+
+class FakeTwilio:
+    def __init__(self, latency: float = 0.0, rate_limit_every: int = 0):
+        self.latency = latency
+        # Answer every Nth create with 429 (0 disables)
+        self.rate_limit_every = rate_limit_every
+        self.calls: Dict[str, Dict] = {}
+        self.requests = 0
+        self.connections = set()
+        self.app = Starlette(routes=[
+            Route("/2010-04-01/Accounts/{account}/Calls.json", self._create, methods=["POST"]),
+            Route("/2010-04-01/Accounts/{account}/Calls/{sid}.json", self._call, methods=["GET", "POST"])
+        ])
+
+    async def _delay(self, request: Request) -> None:
+        self.requests += 1
+        self.connections.add((request.client.host, request.client.port))
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    async def _create(self, request: Request) -> JSONResponse:
+        await self._delay(request)
+        if self.rate_limit_every and self.requests % self.rate_limit_every == 0:
+            return JSONResponse({"code": 20429, "message": "Too Many Requests", "status": 429}, status_code=429)
+        form = await request.form()
+        sid = "CA" + uuid.uuid4().hex
+        self.calls[sid] = {
+            "sid": sid,
+            "account_sid": request.path_params["account"],
+            "to": form.get("To"),
+            "from": form.get("From"),
+            "status": "queued"
+        }
+        return JSONResponse(self.calls[sid], status_code=201)
+
+    async def _call(self, request: Request) -> JSONResponse:
+        await self._delay(request)
+        call = self.calls.get(request.path_params["sid"])
+        if call is None:
+            return JSONResponse({"code": 20404, "message": "Not found", "status": 404}, status_code=404)
+        if request.method == "POST":
+            form = await request.form()
+            call["status"] = form.get("Status", call["status"])
+        return JSONResponse(call)
+
+
+class RedirectTransport(httpx.AsyncBaseTransport):
+    """Sends every request to `base_url` instead of the host in its URL."""
+
+    def __init__(self, base_url: str):
+        target = httpx.URL(base_url)
+        self._scheme, self._host, self._port = target.scheme, target.host, target.port
+        self._transport = httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        request.url = request.url.copy_with(scheme=self._scheme, host=self._host, port=self._port)
+        return await self._transport.handle_async_request(request)
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+async def serve_fake_twilio(fake: FakeTwilio, port: int = 0) -> _Server:
+    server = _Server(fake, port)
+    await server.start()
+    return server
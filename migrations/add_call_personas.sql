@@ -0,0 +1,7 @@
+-- Persona variant assigned to each call and its pre-rendered instructions
+ALTER TABLE voice_conversations
+    ADD COLUMN IF NOT EXISTS persona JSONB,
+    ADD COLUMN IF NOT EXISTS persona_label TEXT,
+    ADD COLUMN IF NOT EXISTS instructions TEXT;
+
+CREATE INDEX IF NOT EXISTS idx_voice_conversations_persona_label ON voice_conversations(simulation_id, persona_label);
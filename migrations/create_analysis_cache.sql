@@ -0,0 +1,10 @@
+-- Conversation analyses by normalized-transcript hash, so duplicate conversations skip GPT-4
+-- cache_key already includes prompt_version; the column lets one version be invalidated
+CREATE TABLE IF NOT EXISTS analysis_cache (
+    cache_key TEXT PRIMARY KEY,
+    prompt_version TEXT NOT NULL,
+    analysis JSONB NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_analysis_cache_prompt_version ON analysis_cache(prompt_version);
@@ -0,0 +1,25 @@
+-- Conversation analyses waiting for or run by the analysis worker pool; queued and running jobs resume on startup
+-- queued -> running -> completed | failed (running jobs go back to queued between retries)
+CREATE TABLE IF NOT EXISTS analysis_jobs (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    conversation_id UUID NOT NULL REFERENCES voice_conversations(id) ON DELETE CASCADE,
+    call_sid TEXT,
+    message_timestamps JSONB NOT NULL DEFAULT '[]'::jsonb,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    started_at TIMESTAMP WITH TIME ZONE,
+    finished_at TIMESTAMP WITH TIME ZONE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_analysis_jobs_status ON analysis_jobs(status, created_at);
+
+-- Per-turn timings and token usage measured during the call, for locally computed technical metrics
+ALTER TABLE analysis_jobs ADD COLUMN IF NOT EXISTS response_times JSONB NOT NULL DEFAULT '[]'::jsonb;
+
+-- Lease of the process running a job; running jobs are only queued again once it has expired
+ALTER TABLE analysis_jobs
+    ADD COLUMN IF NOT EXISTS owner TEXT,
+    ADD COLUMN IF NOT EXISTS lease_expires_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT '1970-01-01T00:00:00Z';
@@ -0,0 +1,14 @@
+-- Append-only conversation turns; one row per user or assistant utterance
+CREATE TABLE IF NOT EXISTS conversation_turns (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    conversation_id UUID NOT NULL REFERENCES voice_conversations(id) ON DELETE CASCADE,
+    call_sid TEXT,
+    seq INTEGER NOT NULL CHECK (seq >= 0),
+    role TEXT NOT NULL CHECK (role IN ('user', 'assistant')),
+    content TEXT NOT NULL,
+    spoken_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(conversation_id, seq)
+);
+
+CREATE INDEX IF NOT EXISTS idx_conversation_turns_call_sid ON conversation_turns(call_sid);
@@ -0,0 +1,40 @@
+-- Durable simulation jobs: progress counters on simulations and one row per call to place
+ALTER TABLE simulations
+    ADD COLUMN IF NOT EXISTS total_calls INTEGER NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS seed BIGINT,
+    ADD COLUMN IF NOT EXISTS queued_calls INTEGER NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS active_calls INTEGER NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS completed_calls INTEGER NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS failed_calls INTEGER NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS stopped_calls INTEGER NOT NULL DEFAULT 0;
+
+CREATE INDEX IF NOT EXISTS idx_simulations_status ON simulations(status);
+
+-- queued -> dialing -> in_progress -> completed | failed | busy | no-answer | canceled | timeout, or stopped
+CREATE TABLE IF NOT EXISTS simulation_call_slots (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    simulation_id UUID NOT NULL REFERENCES simulations(id) ON DELETE CASCADE,
+    slot INTEGER NOT NULL CHECK (slot >= 0),
+    status TEXT NOT NULL DEFAULT 'queued',
+    persona JSONB,
+    persona_label TEXT,
+    instructions TEXT,
+    record_id UUID REFERENCES voice_conversations(id) ON DELETE SET NULL,
+    call_sid TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    started_at TIMESTAMP WITH TIME ZONE,
+    ended_at TIMESTAMP WITH TIME ZONE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(simulation_id, slot)
+);
+
+CREATE INDEX IF NOT EXISTS idx_simulation_call_slots_status ON simulation_call_slots(simulation_id, status);
+
+-- Lease of the process running a simulation, renewed by its heartbeat; another process may resume it once expired
+ALTER TABLE simulations
+    ADD COLUMN IF NOT EXISTS owner TEXT,
+    ADD COLUMN IF NOT EXISTS lease_expires_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT '1970-01-01T00:00:00Z';
+
+CREATE INDEX IF NOT EXISTS idx_simulations_lease ON simulations(status, lease_expires_at);
@@ -0,0 +1,12 @@
+-- One row of each analysis table per conversation, so a retried or repeated analysis overwrites its rows
+-- Keep the newest row of conversations analyzed more than once before this constraint existed
+DELETE FROM quality_metrics a USING quality_metrics b
+    WHERE a.conversation_id = b.conversation_id AND a.ctid < b.ctid;
+DELETE FROM technical_metrics a USING technical_metrics b
+    WHERE a.conversation_id = b.conversation_id AND a.ctid < b.ctid;
+DELETE FROM analysis_results a USING analysis_results b
+    WHERE a.conversation_id = b.conversation_id AND a.ctid < b.ctid;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_quality_metrics_conversation ON quality_metrics(conversation_id);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_technical_metrics_conversation ON technical_metrics(conversation_id);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_analysis_results_conversation ON analysis_results(conversation_id);
@@ -7,7 +7,7 @@ setup(
     install_requires=[
         "fastapi>=0.109.2",
         "uvicorn>=0.27.1",
-        "supabase>=1.2.0",
+        "httpx>=0.24.1",
         "python-multipart>=0.0.7",
         "pydantic>=2.6.1",
         "pytest>=8.0.0",
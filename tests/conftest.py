@@ -1,6 +1,6 @@
 import pytest
 import asyncio
-from app.database import supabase_client
+from app.database import db_client
 
 # Mark all tests as async
 def pytest_collection_modifyitems(items):
@@ -20,25 +20,25 @@ async def setup_database():
     try:
         # Clean up any existing test data
         # First delete call records for test simulations
-        test_simulations = supabase_client.table("simulations").select("id").eq("user_id", "test_user").execute()
+        test_simulations = await db_client.table("simulations").select("id").eq("user_id", "test_user").execute()
         if test_simulations.data:
             for sim in test_simulations.data:
-                supabase_client.table("call_records").delete().eq("simulation_id", sim["id"]).execute()
+                await db_client.table("call_records").delete().eq("simulation_id", sim["id"]).execute()
         
         # Then delete test simulations
-        supabase_client.table("simulations").delete().eq("user_id", "test_user").execute()
+        await db_client.table("simulations").delete().eq("user_id", "test_user").execute()
         
         yield
         
         # Clean up after the test
         # First delete call records for test simulations
-        test_simulations = supabase_client.table("simulations").select("id").eq("user_id", "test_user").execute()
+        test_simulations = await db_client.table("simulations").select("id").eq("user_id", "test_user").execute()
         if test_simulations.data:
             for sim in test_simulations.data:
-                supabase_client.table("call_records").delete().eq("simulation_id", sim["id"]).execute()
+                await db_client.table("call_records").delete().eq("simulation_id", sim["id"]).execute()
         
         # Then delete test simulations
-        supabase_client.table("simulations").delete().eq("user_id", "test_user").execute()
+        await db_client.table("simulations").delete().eq("user_id", "test_user").execute()
     
     except Exception as e:
         print(f"Error in database cleanup: {str(e)}")
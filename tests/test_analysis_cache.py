@@ -0,0 +1,86 @@
+import pytest
+
+from app.services.analysis_cache import AnalysisCache, analysis_cache_key, normalize_transcript
+
+
+class FakeCacheTable:
+    """In-memory stand-in for the analysis_cache table."""
+
+    def __init__(self):
+        self.rows = {}
+        self.loads = []
+
+    async def load(self, keys):
+        self.loads.append(list(keys))
+        return {key: self.rows[key]["analysis"] for key in keys if key in self.rows}
+
+    async def store(self, entries):
+        for entry in entries:
+            self.rows[entry["cache_key"]] = entry
+        return True
+
+    async def delete(self, prompt_version):
+        keys = [key for key, row in self.rows.items() if prompt_version is None or row["prompt_version"] == prompt_version]
+        for key in keys:
+            del self.rows[key]
+        return len(keys)
+
+
+def make_cache(table, prompt_version="v1", **kwargs):
+    return AnalysisCache(table.load, table.store, table.delete, prompt_version, **kwargs)
+
+
+def test_transcripts_differing_in_case_spacing_and_punctuation_share_a_key():
+    first = "Assistant: Thanks for calling!  Press 1 for orders.\nUser: Hello?"
+    second = "assistant: thanks for calling press 1 for orders\n\nuser:   hello"
+    assert normalize_transcript(first) == normalize_transcript(second)
+    assert analysis_cache_key(first, "v1") == analysis_cache_key(second, "v1")
+    assert analysis_cache_key(first, "v1") != analysis_cache_key(first, "v2")
+    assert analysis_cache_key(first, "v1") != analysis_cache_key("User: Goodbye", "v1")
+
+
+@pytest.mark.asyncio
+async def test_misses_are_stored_and_later_lookups_hit_memory():
+    table = FakeCacheTable()
+    cache = make_cache(table)
+    key = cache.key("User: One large pizza.")
+
+    assert await cache.get_many([key]) == {}
+    await cache.put_many({key: {"overall_quality_score": 0.9}})
+    assert table.rows[key]["prompt_version"] == "v1"
+
+    found = await cache.get_many([key])
+    found[key]["avg_latency_ms"] = 500
+    assert await cache.get_many([key]) == {key: {"overall_quality_score": 0.9}}
+    assert table.loads == [[key]]
+    stats = cache.stats()
+    assert (stats["memory_hits"], stats["misses"], stats["writes"]) == (2, 1, 1)
+    assert stats["hit_rate"] == 0.667
+
+
+@pytest.mark.asyncio
+async def test_evicted_entries_are_loaded_from_the_table():
+    table = FakeCacheTable()
+    cache = make_cache(table, max_entries=2)
+    keys = [cache.key(f"User: order {index}") for index in range(3)]
+    await cache.put_many({key: {"order": index} for index, key in enumerate(keys)})
+    assert cache.stats()["entries"] == 2
+
+    assert await cache.get_many(keys) == {key: {"order": index} for index, key in enumerate(keys)}
+    assert table.loads == [[keys[0]]]
+    assert cache.stats()["stored_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_invalidate_drops_one_prompt_version():
+    table = FakeCacheTable()
+    old = make_cache(table, prompt_version="v1")
+    await old.put_many({old.key("User: hi"): {"score": 1}})
+    cache = make_cache(table, prompt_version="v2")
+    key = cache.key("User: hi")
+    await cache.put_many({key: {"score": 2}})
+
+    assert await cache.invalidate("v1") == {"memory": 0, "stored": 1}
+    assert list(table.rows) == [key]
+    assert await cache.invalidate("v2") == {"memory": 1, "stored": 1}
+    assert await cache.get_many([key]) == {}
@@ -0,0 +1,252 @@
+import asyncio
+import random
+from datetime import datetime, timedelta, UTC
+
+import pytest
+
+from app.services.analysis_queue import AnalysisQueue
+
+
+class RateLimited(Exception):
+    status_code = 429
+
+
+class FakeJobStore:
+    """In-memory stand-in for the analysis_jobs table."""
+
+    def __init__(self, rows=None):
+        self.rows = {row["id"]: row for row in rows or []}
+        self.updates = []
+
+    async def create(self, conversation_id, call_sid, message_timestamps, response_times=None):
+        job = {
+            "id": f"job-{len(self.rows) + 1}",
+            "conversation_id": conversation_id,
+            "call_sid": call_sid,
+            "message_timestamps": message_timestamps,
+            "status": "queued",
+            "attempts": 0
+        }
+        self.rows[job["id"]] = dict(job)
+        return job
+
+    async def load_pending(self):
+        now = datetime.now(UTC).isoformat()
+        for row in self.rows.values():
+            if row["status"] == "running" and (row.get("lease_expires_at") or "") < now:
+                row["status"] = "queued"
+        return [dict(row) for row in self.rows.values() if row["status"] == "queued"]
+
+    async def claim(self, job_ids, updates):
+        claimed = [job_id for job_id in job_ids if self.rows[job_id]["status"] == "queued"]
+        if claimed:
+            await self.update(claimed, updates)
+        return claimed
+
+    async def update(self, job_ids, updates):
+        self.updates.append((list(job_ids), updates["status"]))
+        for job_id in job_ids:
+            self.rows[job_id].update(updates)
+        return True
+
+
+def make_queue(store, analyze, **kwargs):
+    return AnalysisQueue(
+        analyze,
+        store.create,
+        store.load_pending,
+        store.update,
+        store.claim,
+        owner="process-a",
+        is_retryable=lambda error: getattr(error, "status_code", None) == 429,
+        rng=random.Random(0),
+        **kwargs
+    )
+
+
+async def wait_until(condition, timeout=1.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline
+        await asyncio.sleep(0.005)
+
+
+@pytest.mark.asyncio
+async def test_jobs_run_with_bounded_concurrency():
+    store = FakeJobStore()
+    running = peak = 0
+
+    async def analyze(jobs):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return {}
+
+    queue = make_queue(store, analyze, concurrency=2)
+    await queue.start()
+    for index in range(6):
+        await queue.submit(f"conversation-{index}", f"CA{index}", [])
+    await wait_until(lambda: queue.completed == 6)
+    await queue.close()
+
+    assert peak == 2
+    assert all(row["status"] == "completed" for row in store.rows.values())
+    stats = queue.stats()
+    assert stats["queued"] == 0
+    assert stats["finished_last_minute"] == 6
+    assert stats["total"]["avg_ms"] is not None
+
+
+@pytest.mark.asyncio
+async def test_rate_limited_job_is_retried_after_retry_after():
+    store = FakeJobStore()
+    attempts = []
+
+    async def analyze(jobs):
+        attempts.append(jobs[0]["attempts"])
+        if len(attempts) == 1:
+            raise RateLimited("slow down")
+        return {}
+
+    queue = make_queue(store, analyze, retry_base_delay=0.001, retry_after=lambda error: 0.02)
+    await queue.start()
+    await queue.submit("conversation-1", "CA1", [])
+    await wait_until(lambda: queue.retries == 1)
+    assert store.rows["job-1"]["status"] == "queued"
+    assert queue.stats()["waiting_to_retry"] == 1
+
+    await wait_until(lambda: queue.completed == 1)
+    await queue.close()
+    assert attempts == [1, 2]
+    assert store.rows["job-1"]["status"] == "completed"
+
+
+@pytest.mark.asyncio
+async def test_non_retryable_and_exhausted_jobs_fail():
+    store = FakeJobStore()
+
+    async def analyze(jobs):
+        if jobs[0]["conversation_id"] == "bad-output":
+            raise ValueError("missing fields")
+        raise RateLimited("slow down")
+
+    queue = make_queue(store, analyze, max_retries=1, retry_base_delay=0.001)
+    await queue.start()
+    await queue.submit("bad-output", "CA1", [])
+    await queue.submit("rate-limited", "CA2", [])
+    await wait_until(lambda: queue.failed == 2)
+    await queue.close()
+
+    assert store.rows["job-1"]["attempts"] == 1
+    assert store.rows["job-2"]["attempts"] == 2
+    assert all(row["status"] == "failed" for row in store.rows.values())
+
+
+@pytest.mark.asyncio
+async def test_unfinished_jobs_resume_on_start():
+    lease_expired = (datetime.now(UTC) - timedelta(seconds=1)).isoformat()
+    leased = (datetime.now(UTC) + timedelta(seconds=60)).isoformat()
+    store = FakeJobStore([
+        {"id": "job-1", "conversation_id": "c1", "status": "running", "attempts": 1, "message_timestamps": [], "lease_expires_at": lease_expired},
+        {"id": "job-2", "conversation_id": "c2", "status": "queued", "attempts": 0, "message_timestamps": []},
+        {"id": "job-3", "conversation_id": "c3", "status": "completed", "attempts": 1, "message_timestamps": []},
+        # Still running in a live process
+        {"id": "job-4", "conversation_id": "c4", "status": "running", "attempts": 1, "message_timestamps": [], "lease_expires_at": leased}
+    ])
+    analyzed = []
+
+    async def analyze(jobs):
+        analyzed.extend(job["id"] for job in jobs)
+        return {}
+
+    queue = make_queue(store, analyze)
+    await queue.start()
+    await wait_until(lambda: queue.completed == 2)
+    await queue.close()
+
+    assert analyzed == ["job-1", "job-2"]
+    assert queue.stats()["resumed"] == 2
+    assert store.rows["job-1"]["owner"] == "process-a"
+    assert store.rows["job-4"]["status"] == "running"
+
+
+@pytest.mark.asyncio
+async def test_a_job_claimed_by_another_process_is_dropped():
+    store = FakeJobStore([
+        {"id": "job-1", "conversation_id": "c1", "status": "queued", "attempts": 0, "message_timestamps": []},
+        {"id": "job-2", "conversation_id": "c2", "status": "queued", "attempts": 0, "message_timestamps": []}
+    ])
+    analyzed = []
+
+    async def analyze(jobs):
+        analyzed.extend(job["id"] for job in jobs)
+        return {}
+
+    queue = make_queue(store, analyze, batch_size=2)
+    pending = await store.load_pending()
+    # Both processes queued the jobs on start; the other one claimed job-1 first
+    store.rows["job-1"].update({
+        "status": "running",
+        "owner": "process-b",
+        "lease_expires_at": (datetime.now(UTC) + timedelta(seconds=60)).isoformat()
+    })
+    for job in pending:
+        queue._enqueue(job)
+    await queue.start()
+    await wait_until(lambda: queue.completed == 1)
+    await queue.close()
+
+    assert analyzed == ["job-2"]
+    assert store.rows["job-1"]["owner"] == "process-b"
+    assert queue.stats()["claimed_elsewhere"] == 1
+
+
+def conversation(length):
+    return [{"message": "x" * length}]
+
+
+@pytest.mark.asyncio
+async def test_jobs_are_batched_up_to_size_and_length():
+    store = FakeJobStore()
+    batches = []
+
+    async def analyze(jobs):
+        batches.append([job["conversation_id"] for job in jobs])
+        return {}
+
+    queue = make_queue(store, analyze, batch_size=3, batch_max_chars=100)
+    for index, length in enumerate([10, 10, 10, 10, 95, 5]):
+        await queue.submit(f"c{index}", None, conversation(length))
+    await queue.start()
+    await wait_until(lambda: queue.completed == 6)
+    await queue.close()
+
+    assert batches == [["c0", "c1", "c2"], ["c3"], ["c4", "c5"]]
+    # One status update per batch for running and for completed
+    assert [status for _, status in store.updates] == ["running", "completed"] * 3
+    assert queue.stats()["avg_batch_size"] == 2.0
+
+
+@pytest.mark.asyncio
+async def test_failed_item_is_retried_without_the_rest_of_its_batch():
+    store = FakeJobStore()
+    batches = []
+
+    async def analyze(jobs):
+        batches.append([job["conversation_id"] for job in jobs])
+        if len(batches) == 1:
+            return {jobs[1]["id"]: RateLimited("conversation missing from answer")}
+        return {}
+
+    queue = make_queue(store, analyze, batch_size=3, retry_base_delay=0.001)
+    for index in range(3):
+        await queue.submit(f"c{index}", None, conversation(10))
+    await queue.start()
+    await wait_until(lambda: queue.completed == 3)
+    await queue.close()
+
+    assert batches == [["c0", "c1", "c2"], ["c1"]]
+    assert store.rows["job-2"]["attempts"] == 2
+    assert store.rows["job-1"]["attempts"] == 1
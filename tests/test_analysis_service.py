@@ -0,0 +1,35 @@
+import httpx
+import pytest
+
+from app.postgrest import PostgrestClient
+from app.services import analysis_service
+from benchmarks.fake_postgrest_server import FakePostgrest
+
+TABLES = ("quality_metrics", "technical_metrics", "analysis_results")
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    fake = FakePostgrest()
+    client = PostgrestClient("http://fake/rest/v1", "key", transport=httpx.ASGITransport(app=fake.app))
+    monkeypatch.setattr(analysis_service, "db_client", client)
+    return fake
+
+
+@pytest.mark.asyncio
+async def test_storing_a_batch_again_replaces_its_rows(fake):
+    await analysis_service.store_analysis_batch([
+        ("c1", {"coherence_score": 0.5, "avg_latency_ms": 900}),
+        ("c2", {"coherence_score": 0.8})
+    ])
+
+    # A retry of the batch, after one of its writes failed, with a changed result
+    await analysis_service.store_analysis_batch([
+        ("c1", {"coherence_score": 0.9, "avg_latency_ms": 900}),
+        ("c2", {"coherence_score": 0.8})
+    ])
+
+    for table in TABLES:
+        assert sorted(row["conversation_id"] for row in fake.tables[table]) == ["c1", "c2"]
+    scores = {row["conversation_id"]: row["coherence_score"] for row in fake.tables["quality_metrics"]}
+    assert scores == {"c1": 0.9, "c2": 0.8}
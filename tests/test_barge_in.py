@@ -0,0 +1,125 @@
+import json
+
+import pytest
+
+from app.services.barge_in import BargeInController
+from app.services.leg_queue import LegSendQueue
+from app.services.media_frames import TwilioMediaFrame
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class Bridge:
+    """The barge-in path of the media stream handler, with the legs' send queues."""
+
+    def __init__(self, clock):
+        self.barge_in = BargeInController(clock=clock)
+        self.media_frame = TwilioMediaFrame("MZ123")
+        self.to_openai = []
+        self.to_twilio = []
+        self.openai_queue = LegSendQueue("OpenAI", self._send_openai, lambda payload: payload, maxsize=10)
+        self.twilio_queue = LegSendQueue("Twilio", self._send_twilio, self.media_frame.render, maxsize=10)
+
+    async def _send_openai(self, message):
+        self.to_openai.append(json.loads(message))
+
+    async def _send_twilio(self, message):
+        self.to_twilio.append(json.loads(message))
+
+    def audio_delta(self, item_id, media_timestamp):
+        mark_name = self.barge_in.on_audio_delta(item_id, media_timestamp)
+        if mark_name is not None:
+            self.twilio_queue.put_audio("AAAA")
+            self.twilio_queue.put_control(self.media_frame.mark(mark_name), droppable=True)
+        return mark_name
+
+    def speech_started(self, media_timestamp):
+        truncate_event = self.barge_in.on_speech_started(media_timestamp)
+        if truncate_event:
+            self.barge_in.discard_unsent_marks(self.twilio_queue.clear_audio())
+            self.openai_queue.put_control(json.dumps(truncate_event))
+            self.twilio_queue.put_control(self.media_frame.clear())
+        return truncate_event
+
+    async def drain(self):
+        for queue in (self.openai_queue, self.twilio_queue):
+            queue.close()
+            await queue.run()
+
+
+def test_mark_acks_clear_pending_audio():
+    barge_in = BargeInController()
+    names = [barge_in.on_audio_delta("item_1", timestamp) for timestamp in (1000, 1020, 1040)]
+    assert list(barge_in.pending_marks) == names
+
+    # Marks are acknowledged in order, so acknowledging the second covers the first
+    barge_in.on_mark(names[1])
+    assert list(barge_in.pending_marks) == names[2:]
+    barge_in.on_mark("unknown")
+    barge_in.on_mark(names[2])
+    assert not barge_in.pending_marks
+
+    # Once everything has played there is nothing to interrupt
+    assert barge_in.on_speech_started(1500) is None
+
+
+@pytest.mark.asyncio
+async def test_barge_in_truncates_at_the_played_position_and_clears_twilio():
+    clock = FakeClock()
+    bridge = Bridge(clock)
+    bridge.audio_delta("item_1", 1000)
+    bridge.audio_delta("item_1", 1020)
+    # Twilio has played the first chunk
+    bridge.barge_in.on_mark("audio-1")
+
+    truncate_event = bridge.speech_started(1750)
+    assert truncate_event == {
+        "type": "conversation.item.truncate",
+        "item_id": "item_1",
+        "content_index": 0,
+        "audio_end_ms": 750
+    }
+    # Audio of the interrupted item that arrives afterwards is dropped
+    assert bridge.audio_delta("item_1", 1760) is None
+
+    await bridge.drain()
+    assert bridge.to_openai == [truncate_event]
+    assert bridge.to_twilio == [{"event": "clear", "streamSid": "MZ123"}]
+
+    # The cleared mark never reached Twilio, so the interruption counts as cleared at once
+    assert bridge.barge_in.stats()["interruptions"] == 1
+    assert bridge.barge_in.stats()["cleared_latencies_ms"] == [0.0]
+
+
+def test_clear_latency_waits_for_marks_already_sent():
+    clock = FakeClock()
+    barge_in = BargeInController(clock=clock)
+    # This chunk and its mark already went out to Twilio
+    barge_in.on_audio_delta("item_1", 1000)
+
+    assert barge_in.on_speech_started(1200)["audio_end_ms"] == 200
+    barge_in.discard_unsent_marks(0)
+    clock.now = 0.08
+    assert barge_in.stats()["unconfirmed"] == 1
+
+    # Twilio acknowledges the marks of cleared audio
+    barge_in.on_mark("audio-1")
+    assert barge_in.stats()["cleared_latencies_ms"] == [80.0]
+    assert barge_in.stats()["unconfirmed"] == 0
+
+
+@pytest.mark.asyncio
+async def test_nothing_is_sent_without_assistant_audio_in_flight():
+    bridge = Bridge(FakeClock())
+    assert bridge.speech_started(500) is None
+
+    await bridge.drain()
+    assert bridge.to_openai == []
+    assert bridge.to_twilio == []
+    assert bridge.barge_in.stats()["interruptions"] == 0
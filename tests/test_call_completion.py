@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+from app.services.call_completion import CompletionNotifier
+
+
+async def no_statuses(call_sids):
+    return {}
+
+
+@pytest.mark.asyncio
+async def test_wait_resolves_on_notify():
+    notifier = CompletionNotifier(no_statuses)
+    waiting = asyncio.create_task(notifier.wait(["CA1", "CA2"], timeout=1))
+    await asyncio.sleep(0)
+    assert not notifier.notify("CA1", "in-progress")
+    assert notifier.notify("CA1", "completed")
+    assert notifier.notify("CA2", "busy")
+    assert not notifier.notify("CA2", "completed")
+
+    assert await waiting == {"CA1": "completed", "CA2": "busy"}
+    assert notifier.stats()["waiting"] == 0
+
+
+@pytest.mark.asyncio
+async def test_wait_on_ended_call_returns_immediately():
+    notifier = CompletionNotifier(no_statuses)
+    notifier.notify("CA1", "completed")
+    assert await notifier.wait(["CA1"], timeout=0) == {"CA1": "completed"}
+
+
+@pytest.mark.asyncio
+async def test_status_caches_latest_callback():
+    notifier = CompletionNotifier(no_statuses)
+    assert notifier.status("CA1") is None
+    notifier.notify("CA1", "ringing")
+    notifier.notify("CA1", "in-progress")
+    assert notifier.status("CA1") == "in-progress"
+    assert not notifier.watch("CA1").done()
+
+    notifier.notify("CA1", "completed")
+    notifier.notify("CA1", "in-progress")
+    assert notifier.status("CA1") == "completed"
+
+
+@pytest.mark.asyncio
+async def test_timeout_stops_watching():
+    notifier = CompletionNotifier(no_statuses)
+    assert await notifier.wait(["CA1"], timeout=0.01) == {"CA1": "timeout"}
+    assert notifier.stats()["waiting"] == 0
+    assert notifier.stats()["timeouts"] == 1
+
+
+@pytest.mark.asyncio
+async def test_sweep_reconciles_overdue_calls():
+    now = 0.0
+    queried = []
+
+    async def reconcile(call_sids):
+        queried.append(sorted(call_sids))
+        return {"CA1": "completed", "CA2": "in-progress"}
+
+    notifier = CompletionNotifier(reconcile, sweep_interval=30, clock=lambda: now)
+    waiting = asyncio.create_task(notifier.wait(["CA1", "CA2"], timeout=1))
+    await asyncio.sleep(0)
+
+    assert await notifier.sweep() == 0
+    assert queried == []
+
+    now = 31.0
+    assert await notifier.sweep() == 1
+    assert queried == [["CA1", "CA2"]]
+    notifier.notify("CA2", "no-answer")
+
+    assert await waiting == {"CA1": "completed", "CA2": "no-answer"}
+    assert notifier.stats()["reconciled"] == 1
+
+
+@pytest.mark.asyncio
+async def test_a_timed_out_waiter_leaves_the_call_watched_for_the_others():
+    notifier = CompletionNotifier(no_statuses)
+    patient = asyncio.create_task(notifier.wait(["CA1"], timeout=1))
+    await asyncio.sleep(0)
+
+    assert await notifier.wait(["CA1"], timeout=0.01) == {"CA1": "timeout"}
+    assert notifier.stats()["waiting"] == 1
+
+    notifier.notify("CA1", "completed")
+    assert await patient == {"CA1": "completed"}
+    assert notifier.stats()["waiting"] == 0
+
+
+@pytest.mark.asyncio
+async def test_the_last_cancelled_waiter_stops_the_watch():
+    notifier = CompletionNotifier(no_statuses)
+    waiting = asyncio.create_task(notifier.wait(["CA1"]))
+    await asyncio.sleep(0)
+    assert notifier.stats()["waiting"] == 1
+
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+    assert notifier.stats()["waiting"] == 0
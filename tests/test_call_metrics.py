@@ -0,0 +1,56 @@
+from app.services.call_metrics import compute_technical_metrics, response_latencies_ms
+
+
+MESSAGES = [
+    {"message": "Assistant: Hi, what can I get you?", "timestamp": "2024-01-01T12:00:02", "type": "assistant", "duration_ms": 2000},
+    {"message": "User: A large pizza.", "timestamp": "2024-01-01T12:00:05", "type": "user", "duration_ms": 1500},
+    {"message": "Assistant: Anything else?", "timestamp": "2024-01-01T12:00:07", "type": "assistant", "duration_ms": 1200},
+    {"message": "User: No, thanks.", "timestamp": "2024-01-01T12:00:10", "type": "user", "duration_ms": 1000},
+    {"message": "Assistant: Goodbye!", "timestamp": "2024-01-01T12:00:12", "type": "assistant", "duration_ms": 1000}
+]
+
+
+def test_latency_and_tokens_come_from_measured_turns():
+    response_times = [
+        {"ttfa_ms": None, "usage": {"total_tokens": 100}},  # greeting, not preceded by speech
+        {"ttfa_ms": 400.0, "usage": {"total_tokens": 150}},
+        {"ttfa_ms": 800.0, "usage": {"total_tokens": 250}},
+        {"ttfa_ms": 600.0, "usage": {}}
+    ]
+
+    metrics = compute_technical_metrics(MESSAGES, response_times)
+
+    assert metrics["avg_latency_ms"] == 600
+    assert metrics["min_latency_ms"] == 400
+    assert metrics["max_latency_ms"] == 800
+    assert metrics["p95_latency_ms"] == 800
+    assert metrics["total_tokens"] == 500
+    assert metrics["tokens_per_message"] == 100.0
+    assert metrics["completion_time"] == 12
+    assert metrics["memory_usage_mb"] is None
+
+
+def test_latency_falls_back_to_message_gaps():
+    # 12:00:05 -> 12:00:05.8 and 12:00:10 -> 12:00:11
+    assert response_latencies_ms(MESSAGES) == [800.0, 1000.0]
+
+    metrics = compute_technical_metrics(MESSAGES)
+    assert metrics["avg_latency_ms"] == 900
+    assert metrics["total_tokens"] is None
+    assert metrics["tokens_per_message"] is None
+
+
+def test_empty_call_has_no_metrics():
+    metrics = compute_technical_metrics([], [])
+    assert set(metrics.values()) == {None}
+
+
+def test_mixed_naive_and_aware_timestamps_are_compared_in_utc():
+    messages = [
+        dict(MESSAGES[0]),
+        {**MESSAGES[-1], "timestamp": "2024-01-01T12:00:12+00:00"}
+    ]
+    metrics = compute_technical_metrics(messages, model_temperature=0.7)
+    assert metrics["completion_time"] == 12
+    assert metrics["model_temperature"] == 0.7
+    assert metrics["token_efficiency"] is None
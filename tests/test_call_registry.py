@@ -0,0 +1,119 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app import database
+from app.postgrest import PostgrestClient
+from app.services.call_registry import CallInfo, CallRegistry
+from benchmarks.fake_postgrest_server import FakePostgrest
+
+
+class FakeLoader:
+    def __init__(self, records=None):
+        self.records = records or {}
+        self.calls = []
+
+    async def __call__(self, call_sid):
+        self.calls.append(call_sid)
+        return self.records.get(call_sid)
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    fake = FakePostgrest()
+    client = PostgrestClient("http://fake/rest/v1", "key", transport=httpx.ASGITransport(app=fake.app))
+    monkeypatch.setattr(database, "db_client", client)
+    monkeypatch.setattr(database, "call_registry", CallRegistry(database._load_call_info, claim_timeout=1.0))
+    return fake
+
+
+def test_claim_moves_a_pending_record_under_its_sid():
+    registry = CallRegistry(FakeLoader())
+    info = registry.register_pending(CallInfo("row-1", "pending_0", "sim-1", instructions="Order a pizza."))
+    assert registry.get("pending_0") is None
+    assert registry.stats()["pending"] == 1
+
+    assert registry.claim("row-1", "CA1") is info
+    assert info.call_sid == "CA1"
+    assert registry.get("CA1") is info
+    assert (registry.stats()["pending"], registry.stats()["entries"]) == (0, 1)
+
+    # A record is claimed once
+    assert registry.claim("row-1", "CA2") is None
+    assert registry.claim("unknown", "CA3") is None
+    assert registry.get("CA3") is None
+
+
+@pytest.mark.asyncio
+async def test_resolve_loads_unknown_calls_once():
+    loader = FakeLoader({"CA9": CallInfo("row-9", "CA9", "sim-1", streamed=True)})
+    registry = CallRegistry(loader)
+
+    first = await registry.resolve("CA9")
+    assert first.id == "row-9"
+    assert await registry.resolve("CA9") is first
+    assert loader.calls == ["CA9"]
+    assert (registry.hits, registry.misses) == (1, 1)
+
+    # Nothing pending, so an unknown SID returns at once
+    assert await registry.resolve("CA0") is None
+
+
+@pytest.mark.asyncio
+async def test_stream_start_waits_for_the_claim_of_its_call():
+    registry = CallRegistry(FakeLoader())
+    info = registry.register_pending(CallInfo("row-1", "pending_0", "sim-1", instructions="Order a pizza."))
+
+    # The media stream starts before the dialer has claimed the SID
+    stream_start = asyncio.create_task(registry.resolve("CA1"))
+    await asyncio.sleep(0.01)
+    assert not stream_start.done()
+
+    registry.claim("row-1", "CA1")
+    assert await asyncio.wait_for(stream_start, 1.0) is info
+
+
+@pytest.mark.asyncio
+async def test_claim_during_load_wins_over_the_loaded_record():
+    registry = CallRegistry(FakeLoader())
+    info = registry.register_pending(CallInfo("row-1", "pending_0", "sim-1", instructions="Order a pizza."))
+
+    async def load(call_sid):
+        # The claim and its DB update land while the lookup is in flight
+        registry.claim("row-1", call_sid)
+        return CallInfo("row-1", call_sid, "sim-1", streamed=True)
+
+    registry._load = load
+    resolved = await registry.resolve("CA1")
+    assert resolved is info
+    assert resolved.instructions == "Order a pizza."
+
+
+@pytest.mark.asyncio
+async def test_unclaimed_sid_gives_up_after_the_claim_timeout():
+    registry = CallRegistry(FakeLoader(), claim_timeout=0.05)
+    registry.register_pending(CallInfo("row-1", "pending_0", "sim-1"))
+
+    assert await registry.resolve("CA1") is None
+    assert not registry._claims
+    # A late claim is still found by the next lookup
+    registry.claim("row-1", "CA1")
+    assert (await registry.resolve("CA1")).id == "row-1"
+
+
+@pytest.mark.asyncio
+async def test_get_call_info_racing_assign_call_sid(fake):
+    record_id = await database.create_call_record(
+        "sim-1", "pending_0", "+15550100", "user-1", instructions="Order a pizza."
+    )
+
+    stream_start = asyncio.create_task(database.get_call_info("CA1"))
+    await asyncio.sleep(0.05)
+    assert await database.assign_call_sid(record_id, "CA1")
+
+    info = await asyncio.wait_for(stream_start, 1.0)
+    assert info.id == record_id
+    assert info.instructions == "Order a pizza."
+    assert not info.streamed
+    assert fake.tables["voice_conversations"][0]["call_sid"] == "CA1"
@@ -0,0 +1,52 @@
+import asyncio
+
+import pytest
+
+from app.services.call_window import SlidingWindow
+
+
+@pytest.mark.asyncio
+async def test_next_call_starts_when_any_call_ends():
+    durations = [0.2, 0.02, 0.02, 0.02, 0.02]
+    started = []
+
+    async def place(index):
+        started.append(index)
+        return f"CA{index}" if index != 3 else None
+
+    async def wait_for_end(call_sid):
+        await asyncio.sleep(durations[int(call_sid[2:])])
+        return "completed"
+
+    window = SlidingWindow(place, wait_for_end, concurrency=2)
+    results = await window.run(5)
+
+    assert [r["status"] for r in results] == ["completed", "completed", "completed", "failed", "completed"]
+    # The long first call never blocks the second slot
+    assert started == [0, 1, 2, 3, 4]
+    report = window.timeline.summary()
+    assert report["peak"] == 2
+    assert report["elapsed_seconds"] < 0.3
+    assert report["timeline"][-1][1] == 0
+
+
+@pytest.mark.asyncio
+async def test_shared_slots_cap_concurrent_windows():
+    slots = asyncio.Semaphore(3)
+    in_flight, peak = 0, 0
+
+    async def place(index):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        return "CA"
+
+    async def wait_for_end(call_sid):
+        nonlocal in_flight
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return "completed"
+
+    windows = [SlidingWindow(place, wait_for_end, concurrency=2, slots=slots) for _ in range(2)]
+    await asyncio.gather(*(window.run(4) for window in windows))
+    assert peak == 3
@@ -0,0 +1,141 @@
+import asyncio
+
+import pytest
+
+from app.services.config_cache import ConfigCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class GatedLoader:
+    """Loads `key:version`, each call held until `release` lets it finish."""
+
+    def __init__(self):
+        self.calls = []
+        self.version = 1
+        self._gates = []
+
+    async def __call__(self, key):
+        self.calls.append(key)
+        version = self.version
+        gate = asyncio.Event()
+        self._gates.append(gate)
+        await gate.wait()
+        return f"{key}:{version}"
+
+    def release(self):
+        for gate in self._gates:
+            gate.set()
+        self._gates = []
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_load():
+    loader = GatedLoader()
+    cache = ConfigCache(loader)
+
+    gets = [asyncio.create_task(cache.get("+15550100")) for _ in range(5)]
+    await asyncio.sleep(0)
+    loader.release()
+
+    assert await asyncio.gather(*gets) == ["+15550100:1"] * 5
+    assert loader.calls == ["+15550100"]
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["coalesced"] == 4
+
+
+@pytest.mark.asyncio
+async def test_a_failed_load_reaches_every_waiter_and_is_not_cached():
+    calls = []
+
+    async def load(key):
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        raise RuntimeError("database unavailable")
+
+    cache = ConfigCache(load)
+    results = await asyncio.gather(cache.get("a"), cache.get("a"), return_exceptions=True)
+    assert [str(result) for result in results] == ["database unavailable"] * 2
+
+    with pytest.raises(RuntimeError):
+        await cache.get("a")
+    assert calls == ["a", "a"]
+
+
+@pytest.mark.asyncio
+async def test_entries_expire_after_the_ttl():
+    clock = FakeClock()
+    calls = []
+
+    async def load(key):
+        calls.append(key)
+        return None  # "not found" is cached too
+
+    cache = ConfigCache(load, ttl_seconds=60, clock=clock)
+    assert await cache.get("a") is None
+    clock.now = 59
+    assert await cache.get("a") is None
+    assert calls == ["a"]
+
+    clock.now = 60
+    assert await cache.get("a") is None
+    assert calls == ["a", "a"]
+    assert cache.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_invalidate_drops_matching_entries():
+    async def load(key):
+        return key
+
+    cache = ConfigCache(load)
+    for key in [("+1", None), ("+1", "t1"), ("+2", None)]:
+        await cache.get(key)
+
+    assert cache.invalidate(lambda key: key[0] == "+1") == 2
+    assert cache.stats()["entries"] == 1
+    assert cache.invalidate() == 1
+
+
+@pytest.mark.asyncio
+async def test_a_load_overtaken_by_an_invalidation_is_not_cached():
+    loader = GatedLoader()
+    cache = ConfigCache(loader)
+
+    stale = asyncio.create_task(cache.get("a"))
+    await asyncio.sleep(0)
+    # The configuration is written while the first load is in flight
+    loader.version = 2
+    cache.invalidate()
+
+    # A get after the write doesn't join the stale load
+    fresh = asyncio.create_task(cache.get("a"))
+    await asyncio.sleep(0)
+    loader.release()
+
+    assert await stale == "a:1"
+    assert await fresh == "a:2"
+    assert loader.calls == ["a", "a"]
+    # Only the fresh result was cached
+    assert await cache.get("a") == "a:2"
+    assert len(loader.calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_a_load_after_the_invalidation_is_cached():
+    loader = GatedLoader()
+    cache = ConfigCache(loader)
+    cache.invalidate()
+
+    task = asyncio.create_task(cache.get("a"))
+    await asyncio.sleep(0)
+    loader.release()
+    assert await task == "a:1"
+    assert await cache.get("a") == "a:1"
+    assert loader.calls == ["a"]
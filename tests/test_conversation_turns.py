@@ -0,0 +1,86 @@
+import httpx
+import pytest
+
+from app import database
+from app.postgrest import PostgrestClient
+from benchmarks.fake_postgrest_server import FakePostgrest
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    fake = FakePostgrest()
+    client = PostgrestClient("http://fake/rest/v1", "key", transport=httpx.ASGITransport(app=fake.app))
+    monkeypatch.setattr(database, "db_client", client)
+    return fake
+
+
+def turn(conversation_id, seq, role, content):
+    return {
+        "conversation_id": conversation_id,
+        "call_sid": "CA1",
+        "seq": seq,
+        "role": role,
+        "content": content,
+        "spoken_at": f"2024-01-01T12:00:{seq:02d}+00:00"
+    }
+
+
+def test_rebuild_transcript_keeps_the_legacy_shapes():
+    transcript, message_timestamps = database.rebuild_transcript([
+        turn("c1", 0, "assistant", "Hi, what can I get you?"),
+        turn("c1", 1, "user", "A large pizza.")
+    ])
+
+    assert transcript == ["Assistant: Hi, what can I get you?", "User: A large pizza."]
+    assert message_timestamps == [
+        {"message": "Assistant: Hi, what can I get you?", "timestamp": "2024-01-01T12:00:00+00:00", "type": "assistant"},
+        {"message": "User: A large pizza.", "timestamp": "2024-01-01T12:00:01+00:00", "type": "user"}
+    ]
+
+
+@pytest.mark.asyncio
+async def test_records_get_their_turns_in_seq_order(fake):
+    # Written by separate flushes, so not stored in order
+    assert await database.append_conversation_turns([turn("c1", 2, "assistant", "Anything else?")])
+    assert await database.append_conversation_turns([
+        turn("c1", 0, "assistant", "Hi, what can I get you?"),
+        turn("c2", 0, "user", "Hello?"),
+        turn("c1", 1, "user", "A large pizza.")
+    ])
+
+    requests = fake.requests
+    records = await database.with_turn_transcripts([
+        {"id": "c1", "transcript": []},
+        {"id": "c2", "transcript": []}
+    ])
+    # One query for all records
+    assert fake.requests == requests + 1
+
+    assert records[0]["transcript"] == ["Assistant: Hi, what can I get you?", "User: A large pizza.", "Assistant: Anything else?"]
+    assert [message["timestamp"] for message in records[0]["message_timestamps"]] == [
+        "2024-01-01T12:00:00+00:00", "2024-01-01T12:00:01+00:00", "2024-01-01T12:00:02+00:00"
+    ]
+    assert records[1]["transcript"] == ["User: Hello?"]
+
+
+@pytest.mark.asyncio
+async def test_records_without_turns_keep_their_stored_transcript(fake):
+    legacy = {"id": "old", "transcript": ["User: stored before turns"], "message_timestamps": [{"message": "User: stored before turns"}]}
+    no_id = {"transcript": ["User: no id"]}
+
+    records = await database.with_turn_transcripts([dict(legacy), dict(no_id)])
+    assert records == [legacy, no_id]
+
+
+@pytest.mark.asyncio
+async def test_retried_turn_insert_skips_turns_already_stored(fake):
+    turns = [turn("c1", 0, "assistant", "Hi"), turn("c1", 1, "user", "Hello")]
+    assert await database.append_conversation_turns(turns)
+
+    # The first insert committed but its response was lost; the retry carries one new turn
+    assert await database.append_conversation_turns(turns + [turn("c1", 2, "assistant", "What can I get you?")])
+    assert [row["seq"] for row in fake.tables["conversation_turns"]] == [0, 1, 2]
+
+    # A retry of nothing but stored turns succeeds too
+    assert await database.append_conversation_turns(turns)
+    assert len(fake.tables["conversation_turns"]) == 3
@@ -0,0 +1,113 @@
+import asyncio
+import random
+
+import httpx
+import pytest
+
+from app.services.dial_dispatcher import DialDispatcher, DialRequest, TokenBucket
+
+
+class TwilioError(Exception):
+    def __init__(self, status):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+
+
+def make_requests(job_id, count):
+    return [DialRequest(job_id, i + 1, "+15550000000", job_id) for i in range(count)]
+
+
+@pytest.mark.asyncio
+async def test_dials_run_concurrently():
+    in_flight, peak = 0, 0
+
+    async def dial(request):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.05)
+        in_flight -= 1
+        return f"CA{request.call_number}"
+
+    dispatcher = DialDispatcher(dial, calls_per_second=1000, burst=10)
+    job = dispatcher.submit("job_1", make_requests("job_1", 5))
+    requests = await job.wait()
+
+    assert [r.call_sid for r in requests] == ["CA1", "CA2", "CA3", "CA4", "CA5"]
+    assert peak == 5
+    assert job.to_dict()["counts"] == {"initiated": 5}
+    assert dispatcher.get_job("job_1") is job
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_paces_acquisitions():
+    bucket = TokenBucket(rate=50, capacity=1)
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    for _ in range(5):
+        await bucket.acquire()
+    # The first token is available immediately, the other four arrive 20 ms apart
+    assert loop.time() - started >= 0.075
+
+
+@pytest.mark.asyncio
+async def test_retries_only_dials_that_cannot_have_placed_a_call():
+    failures = {
+        1: [TwilioError(429), httpx.ConnectError("connection refused")],
+        2: [TwilioError(400)],
+        3: [TwilioError(503)],
+        4: [httpx.ReadTimeout("timed out")]
+    }
+
+    async def dial(request):
+        pending = failures.get(request.call_number)
+        if pending:
+            raise pending.pop(0)
+        return f"CA{request.call_number}"
+
+    dispatcher = DialDispatcher(dial, calls_per_second=1000, burst=10, retry_base_delay=0.01, rng=random.Random(1))
+    retried, rejected, server_error, timed_out = await dispatcher.submit("job_1", make_requests("job_1", 4)).wait()
+
+    assert retried.status == "initiated" and retried.attempts == 3 and retried.error is None
+    assert rejected.status == "failed" and rejected.attempts == 1 and rejected.error == "HTTP 400"
+    # Twilio may have placed these calls, so they aren't placed again
+    assert server_error.status == "failed" and server_error.attempts == 1
+    assert timed_out.status == "failed" and timed_out.attempts == 1
+    assert dispatcher.stats()["retries"] == 2
+
+
+@pytest.mark.asyncio
+async def test_gives_up_after_max_retries():
+    async def dial(request):
+        raise TwilioError(429)
+
+    dispatcher = DialDispatcher(dial, calls_per_second=1000, burst=10, max_retries=2, retry_base_delay=0.001)
+    (request,) = await dispatcher.submit("job_1", make_requests("job_1", 1)).wait()
+
+    assert request.status == "failed"
+    assert request.attempts == 3
+
+
+@pytest.mark.asyncio
+async def test_backoff_does_not_hold_a_concurrency_slot():
+    attempts = []
+
+    async def dial(request):
+        attempts.append(request.call_number)
+        if request.call_number == 1 and request.attempts == 1:
+            raise TwilioError(429)
+        return f"CA{request.call_number}"
+
+    dispatcher = DialDispatcher(dial, calls_per_second=1000, burst=10, max_concurrency=1, retry_base_delay=10, rng=random.Random(1))
+    first, second = make_requests("job_1", 2)
+    dispatcher.submit("job_1", [first, second])
+
+    # The second call is placed while the first waits out its backoff
+    for _ in range(50):
+        if second.status == "initiated":
+            break
+        await asyncio.sleep(0.01)
+    assert second.status == "initiated"
+    assert first.status == "queued"
+    assert dispatcher.stats()["in_flight"] == 0
+    await dispatcher.close()
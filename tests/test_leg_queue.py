@@ -0,0 +1,113 @@
+import base64
+
+import pytest
+
+from app.services.leg_queue import COALESCE, DROP_NEWEST, DROP_OLDEST, LegSendQueue
+
+
+def make_queue(policy, maxsize=3):
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    queue = LegSendQueue("test", send, lambda payload: f"audio:{payload}", maxsize=maxsize, policy=policy)
+    return queue, sent
+
+
+async def drain(queue):
+    queue.close()
+    await queue.run()
+
+
+@pytest.mark.asyncio
+async def test_drop_oldest_discards_the_stalest_audio():
+    queue, sent = make_queue(DROP_OLDEST)
+    for payload in ["AAAA", "BBBB", "CCCC", "DDDD"]:
+        assert queue.put_audio(payload)
+
+    await drain(queue)
+    assert sent == ["audio:BBBB", "audio:CCCC", "audio:DDDD"]
+    assert queue.stats()["dropped"] == 1
+
+
+@pytest.mark.asyncio
+async def test_drop_newest_refuses_incoming_audio():
+    queue, sent = make_queue(DROP_NEWEST)
+    results = [queue.put_audio(payload) for payload in ["AAAA", "BBBB", "CCCC", "DDDD"]]
+
+    assert results == [True, True, True, False]
+    await drain(queue)
+    assert sent == ["audio:AAAA", "audio:BBBB", "audio:CCCC"]
+
+
+@pytest.mark.asyncio
+async def test_coalesce_appends_to_the_last_audio_item():
+    queue, sent = make_queue(COALESCE, maxsize=2)
+    for payload in ["AAAA", "BBBB", "CCCC"]:
+        assert queue.put_audio(payload)
+
+    await drain(queue)
+    assert sent == ["audio:AAAA", "audio:BBBBCCCC"]
+    assert queue.stats()["coalesced"] == 1
+
+
+@pytest.mark.asyncio
+async def test_coalesce_reencodes_padded_audio():
+    queue, sent = make_queue(COALESCE, maxsize=1)
+    first, second = base64.b64encode(b"ab").decode(), base64.b64encode(b"cd").decode()
+    queue.put_audio(first)
+    queue.put_audio(second)
+
+    await drain(queue)
+    assert sent == ["audio:" + base64.b64encode(b"abcd").decode()]
+
+
+@pytest.mark.asyncio
+async def test_coalesce_never_merges_audio_across_a_mark():
+    queue, sent = make_queue(COALESCE, maxsize=4)
+    queue.put_audio("AAAA")
+    queue.put_control("mark-1", droppable=True)
+    queue.put_audio("BBBB")
+    queue.put_control("mark-2", droppable=True)
+
+    # The tail is a mark, so the stalest audio is dropped instead; its mark stays
+    assert queue.put_audio("CCCC")
+    await drain(queue)
+    assert sent == ["mark-1", "audio:BBBB", "mark-2", "audio:CCCC"]
+    assert queue.stats()["coalesced"] == 0
+    assert queue.stats()["dropped"] == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("policy", [DROP_OLDEST, DROP_NEWEST, COALESCE])
+async def test_control_messages_count_toward_the_bound(policy):
+    queue, sent = make_queue(policy, maxsize=2)
+    queue.put_audio("AAAA")
+    queue.put_audio("BBBB")
+    queue.put_control("clear")
+    assert len(queue) == 2
+
+    # Only control messages queued: audio is refused, control is still accepted
+    queue.put_control("mark-1", droppable=True)
+    assert not queue.put_audio("CCCC")
+    queue.put_control("mark-2", droppable=True)
+    assert queue.stats()["max_depth"] == 3
+
+    await drain(queue)
+    assert sent == ["clear", "mark-1", "mark-2"]
+
+
+@pytest.mark.asyncio
+async def test_clear_audio_keeps_control_messages():
+    queue, sent = make_queue(DROP_OLDEST, maxsize=10)
+    queue.put_control("session.update")
+    queue.put_audio("AAAA")
+    queue.put_control("mark-1", droppable=True)
+    queue.put_audio("BBBB")
+    queue.put_control("mark-2", droppable=True)
+
+    assert queue.clear_audio() == 2
+    await drain(queue)
+    assert sent == ["session.update"]
+    assert queue.stats()["cleared"] == 2
@@ -0,0 +1,127 @@
+import base64
+import json
+import os
+
+from app.services.audio_coalescer import InboundAudioCoalescer
+from app.services.media_frames import (
+    TwilioMediaFrame,
+    decode_openai_frame,
+    decode_twilio_frame,
+    input_audio_append,
+    passthrough_payload
+)
+
+
+def test_passthrough_payload_is_unchanged():
+    delta = base64.b64encode(os.urandom(160)).decode('utf-8')
+    assert passthrough_payload(delta) is delta
+    assert passthrough_payload(delta, passthrough=False) == delta
+
+
+def test_media_frame_matches_send_json_output():
+    delta = base64.b64encode(os.urandom(800)).decode('utf-8')
+    frame = TwilioMediaFrame("MZ123")
+    assert json.loads(frame.render(delta)) == {
+        "event": "media",
+        "streamSid": "MZ123",
+        "media": {"payload": delta}
+    }
+
+
+def test_media_frame_before_stream_start():
+    frame = TwilioMediaFrame(None)
+    assert json.loads(frame.render("AAAA"))["streamSid"] is None
+
+
+def test_decode_twilio_media_frame_without_parsing():
+    message = ('{"event":"media","sequenceNumber":"3","media":{"track":"inbound","chunk":"1",'
+               '"timestamp":"5","payload":"no+4/w=="},"streamSid":"MZ123"}')
+    frame = decode_twilio_frame(message)
+    assert frame.kind == "media"
+    assert frame.payload == "no+4/w=="
+    assert frame.timestamp == 5
+    assert frame._data is None
+
+
+def test_decode_twilio_control_frame_parses_on_demand():
+    message = json.dumps({"event": "start", "start": {"streamSid": "MZ123", "callSid": "CA123"}})
+    frame = decode_twilio_frame(message)
+    assert frame.kind == "start"
+    assert frame.data["start"]["callSid"] == "CA123"
+
+
+def test_decode_twilio_frame_with_event_not_first():
+    message = json.dumps({"streamSid": "MZ123", "event": "media", "media": {"timestamp": "40", "payload": "AAAA"}})
+    frame = decode_twilio_frame(message)
+    assert (frame.kind, frame.payload, frame.timestamp) == ("media", "AAAA", 40)
+
+
+def test_decode_openai_audio_delta_without_parsing():
+    message = ('{"type": "response.audio.delta", "event_id": "event_1", "response_id": "resp_1", '
+               '"item_id": "item_1", "output_index": 0, "content_index": 0, "delta": "AAAA"}')
+    frame = decode_openai_frame(message)
+    assert frame.kind == "response.audio.delta"
+    assert frame.payload == "AAAA"
+    assert frame.item_id == "item_1"
+    assert frame._data is None
+
+
+def test_decode_openai_control_frame():
+    message = json.dumps({"type": "response.done", "response": {"output": []}})
+    frame = decode_openai_frame(message)
+    assert frame.kind == "response.done"
+    assert frame.data["response"] == {"output": []}
+
+
+def test_input_audio_append_is_valid_json():
+    assert json.loads(input_audio_append("AAAA")) == {"type": "input_audio_buffer.append", "audio": "AAAA"}
+
+
+def twilio_frame_payload(fill: int = 0) -> str:
+    """20 ms of μ-law, as Twilio sends per media frame."""
+    return base64.b64encode(bytes([fill]) * 160).decode('utf-8')
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_coalescer_sends_one_append_per_window():
+    coalescer = InboundAudioCoalescer(window_ms=100, max_delay_ms=150, clock=FakeClock())
+
+    payloads = [coalescer.add(twilio_frame_payload(index)) for index in range(5)]
+    assert payloads[:4] == [None] * 4
+    assert base64.b64decode(payloads[4]) == b"".join(bytes([index]) * 160 for index in range(5))
+    assert coalescer.stats()["frames_per_append"] == 5.0
+
+
+def test_coalescer_flushes_audio_past_the_deadline():
+    clock = FakeClock()
+    coalescer = InboundAudioCoalescer(window_ms=100, max_delay_ms=150, clock=clock)
+
+    assert coalescer.add(twilio_frame_payload()) is None
+    clock.now = 0.1
+    assert coalescer.flush_expired() is None
+    clock.now = 0.15
+    assert len(base64.b64decode(coalescer.flush_expired())) == 160
+
+    # A frame arriving after the deadline flushes everything buffered with it
+    assert coalescer.add(twilio_frame_payload()) is None
+    clock.now = 0.4
+    assert len(base64.b64decode(coalescer.add(twilio_frame_payload()))) == 320
+    assert coalescer.stats()["deadline_flushes"] == 2
+    assert coalescer.stats()["buffered_ms"] == 0
+
+
+def test_zero_window_disables_coalescing():
+    coalescer = InboundAudioCoalescer(window_ms=0, clock=FakeClock())
+    payload = twilio_frame_payload()
+
+    assert coalescer.add(payload) is payload
+    assert coalescer.flush() is None
+    assert coalescer.flush_expired() is None
+    assert coalescer.stats()["frames_per_append"] == 1.0
@@ -0,0 +1,35 @@
+from collections import Counter
+
+from app.services.personas import expand_persona_matrix, persona_label, render_instructions
+
+CONFIG = {
+    "accent_types": ["neutral", "British", "American"],
+    "industry": ["restaurant", "retail"],
+    "speaking_pace": ["slow", "medium", "fast"],
+    "emotion_types": "friendly",
+}
+
+
+def test_small_matrix_covers_every_combination():
+    personas = expand_persona_matrix(CONFIG, 20, seed=7)
+    labels = [persona_label(p) for p in personas]
+    assert len(set(labels)) == 18
+    assert max(Counter(labels).values()) == 2
+
+
+def test_large_matrix_is_balanced_per_field():
+    personas = expand_persona_matrix(CONFIG, 10, seed=7)
+    assert len(personas) == 10
+    assert sorted(Counter(p["accent_types"] for p in personas).values()) == [3, 3, 4]
+    assert sorted(Counter(p["industry"] for p in personas).values()) == [5, 5]
+    assert all(p["emotion_types"] == "friendly" for p in personas)
+
+
+def test_same_seed_gives_same_assignment():
+    assert expand_persona_matrix(CONFIG, 10, seed=3) == expand_persona_matrix(CONFIG, 10, seed=3)
+
+
+def test_render_instructions():
+    message = render_instructions({"accent_types": "British", "industry": "retail", "speaking_pace": "fast"})
+    assert message.startswith("You are a British speaking customer service agent in the retail industry Speak at a fast pace")
+    assert message.endswith("'Goodbye!' or 'Bye!' as your last message.")
@@ -0,0 +1,54 @@
+import httpx
+import pytest
+
+from app.postgrest import PostgrestClient, PostgrestError
+from benchmarks.fake_postgrest_server import FakePostgrest
+
+
+def make_client(fake: FakePostgrest) -> PostgrestClient:
+    return PostgrestClient("http://fake/rest/v1", "key", transport=httpx.ASGITransport(app=fake.app))
+
+
+@pytest.mark.asyncio
+async def test_insert_select_update_delete_round_trip():
+    fake = FakePostgrest()
+    client = make_client(fake)
+
+    inserted = await client.table("voice_conversations").insert([
+        {"call_sid": "CA1", "simulation_id": "sim", "status": "initiated", "created_at": "2024-01-01"},
+        {"call_sid": "CA2", "simulation_id": "sim", "status": "initiated", "created_at": "2024-01-02"}
+    ]).execute()
+    assert len(inserted.data) == 2 and all(row["id"] for row in inserted.data)
+
+    result = await client.table("voice_conversations")\
+        .select("call_sid, status", count="exact")\
+        .eq("simulation_id", "sim")\
+        .order("created_at", desc=True)\
+        .limit(1)\
+        .execute()
+    assert result.data == [{"call_sid": "CA2", "status": "initiated"}]
+    assert result.count == 2
+
+    updated = await client.table("voice_conversations").update({"status": "completed"}).eq("call_sid", "CA1").execute()
+    assert [row["status"] for row in updated.data] == ["completed"]
+
+    result = await client.table("voice_conversations").select("call_sid").in_("call_sid", ["CA1", "CA3,x"]).execute()
+    assert result.data == [{"call_sid": "CA1"}]
+
+    await client.table("voice_conversations").delete().eq("call_sid", "CA2").execute()
+    assert [row["call_sid"] for row in fake.tables["voice_conversations"]] == ["CA1"]
+    assert client.stats()["requests"] == 5
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_error_responses_raise():
+    async def handler(request):
+        return httpx.Response(409, json={"message": "duplicate key value", "code": "23505"})
+
+    client = PostgrestClient("http://fake/rest/v1", "key", transport=httpx.MockTransport(handler))
+    with pytest.raises(PostgrestError) as error:
+        await client.table("voice_conversations").insert({"id": "1"}).execute()
+    assert error.value.status_code == 409
+    assert client.stats()["errors"] == 1
+    await client.close()
@@ -0,0 +1,110 @@
+import asyncio
+import json
+
+import pytest
+import websockets
+
+from app.services.realtime_pool import RealtimeSessionPool
+from benchmarks.fake_realtime_server import serve_fake_realtime
+
+SESSION_UPDATE = json.dumps({"type": "session.update", "session": {"instructions": "test"}})
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+async def wait_until(condition, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline
+        await asyncio.sleep(0.01)
+
+
+@pytest.fixture
+async def server():
+    server = await serve_fake_realtime()
+    yield server
+    await server.close()
+
+
+def make_pool(server, **kwargs):
+    url = f"ws://127.0.0.1:{server.port}/v1/realtime"
+    return RealtimeSessionPool(lambda: websockets.connect(url), SESSION_UPDATE, refill_interval=0.05, **kwargs)
+
+
+def session_updates(server):
+    return [event for event in server.received if event["type"] == "session.update"]
+
+
+@pytest.mark.asyncio
+async def test_acquire_takes_a_warm_session_and_the_pool_refills(server):
+    pool = make_pool(server, min_size=2, max_size=2)
+    await pool.start()
+    await wait_until(lambda: pool.stats()["idle"] == 2)
+    await wait_until(lambda: len(session_updates(server)) == 2)
+
+    websocket = await pool.acquire()
+    assert websocket.open
+    assert (pool.hits, pool.misses) == (1, 0)
+
+    # The taken session is replaced in the background
+    await wait_until(lambda: pool.stats()["idle"] == 2)
+    assert server.connections == 3
+    await websocket.close()
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_sessions_idle_too_long_are_replaced(server):
+    clock = FakeClock()
+    pool = make_pool(server, min_size=1, max_size=1, max_idle_seconds=300, clock=clock)
+    await pool.start()
+    await wait_until(lambda: pool.stats()["idle"] == 1)
+    [(stale, _)] = pool._idle
+
+    clock.now = 301
+    await wait_until(lambda: pool.recycled == 1 and pool.stats()["idle"] == 1)
+    await wait_until(lambda: not stale.open)
+
+    websocket = await pool.acquire()
+    assert websocket is not stale
+    assert pool.hits == 1
+    await websocket.close()
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_acquire_skips_stale_sessions_it_finds(server):
+    clock = FakeClock()
+    pool = make_pool(server, min_size=1, max_size=1, max_idle_seconds=300, clock=clock)
+    await pool.start()
+    await wait_until(lambda: pool.stats()["idle"] == 1)
+    # Stop refilling so acquire sees the stale session itself
+    pool._refill_task.cancel()
+    clock.now = 301
+
+    websocket = await pool.acquire()
+    assert websocket.open
+    assert (pool.hits, pool.misses, pool.recycled) == (0, 1, 1)
+    await websocket.close()
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_empty_pool_falls_back_to_a_fresh_connection(server):
+    # Not started, so nothing is pre-connected
+    pool = make_pool(server)
+    assert pool.target_size == 0
+
+    websocket = await pool.acquire()
+    assert websocket.open
+    assert (pool.hits, pool.misses) == (0, 1)
+    await wait_until(lambda: len(session_updates(server)) == 1)
+    assert pool.stats()["avg_handshake_ms"] is not None
+    await websocket.close()
+    await pool.close()
@@ -0,0 +1,247 @@
+import asyncio
+from collections import Counter
+from datetime import datetime, timedelta, UTC
+
+import httpx
+import pytest
+
+from app import database
+from app.postgrest import PostgrestClient
+from app.services.simulation_engine import SimulationEngine, progress_counters
+from benchmarks.fake_postgrest_server import FakePostgrest
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    fake = FakePostgrest()
+    client = PostgrestClient("http://fake/rest/v1", "key", transport=httpx.ASGITransport(app=fake.app))
+    monkeypatch.setattr(database, "db_client", client)
+    return fake
+
+
+def timestamp(seconds):
+    return (datetime.now(UTC) + timedelta(seconds=seconds)).isoformat()
+
+
+class FakeCalls:
+    """Places calls instantly; each call ends when `end` is called for it."""
+
+    def __init__(self):
+        self.dialed = []
+        self.hung_up = []
+        self._ended = {}
+
+    async def dial(self, request):
+        request.attempts += 1
+        request.call_sid = f"CA{request.call_number}"
+        request.status = "initiated"
+        self.dialed.append(request.call_number)
+        return request
+
+    async def wait_for_end(self, call_sid):
+        return await self._ended.setdefault(call_sid, asyncio.get_running_loop().create_future())
+
+    async def hang_up(self, call_sid):
+        self.hung_up.append(call_sid)
+        self.end(call_sid, "completed")
+
+    def end(self, call_sid, status="completed"):
+        future = self._ended.setdefault(call_sid, asyncio.get_running_loop().create_future())
+        if not future.done():
+            future.set_result(status)
+
+    def end_all(self, status="completed"):
+        for call_sid in list(self._ended):
+            self.end(call_sid, status)
+
+
+def make_engine(calls, owner="process-b"):
+    return SimulationEngine(calls.dial, calls.wait_for_end, calls.hang_up, flush_interval=0.01, owner=owner, lease_seconds=60)
+
+
+def seed_simulation(fake, owner="process-a", lease_expires_at=None, slots=()):
+    fake.tables["simulations"] = [{
+        "id": "sim-1",
+        "status": "running",
+        "target_phone": "+15550100",
+        "concurrent_calls": 2,
+        "owner": owner,
+        "lease_expires_at": lease_expires_at or timestamp(-1),
+        "created_at": timestamp(-600)
+    }]
+    fake.tables["simulation_call_slots"] = [
+        {"id": f"slot-{index}", "simulation_id": "sim-1", "slot": index, **slot}
+        for index, slot in enumerate(slots)
+    ]
+
+
+def slot_statuses(fake):
+    return [slot["status"] for slot in sorted(fake.tables["simulation_call_slots"], key=lambda slot: slot["slot"])]
+
+
+async def wait_until(condition, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline
+        await asyncio.sleep(0.01)
+
+
+def test_progress_counters_group_final_statuses():
+    counts = Counter({"queued": 3, "dialing": 1, "in_progress": 2, "completed": 4, "stopped": 1, "busy": 1, "timeout": 1})
+    assert progress_counters(counts) == {
+        "queued_calls": 3,
+        "active_calls": 3,
+        "completed_calls": 4,
+        "stopped_calls": 1,
+        "failed_calls": 2
+    }
+
+
+@pytest.mark.asyncio
+async def test_resume_after_restart_waits_on_placed_calls_and_dials_queued_slots(fake):
+    # The previous process stopped with one call in flight and one dial interrupted before its SID was stored
+    seed_simulation(fake, slots=[
+        {"status": "completed", "call_sid": "CA1"},
+        {"status": "in_progress", "call_sid": "CA2"},
+        {"status": "dialing"},
+        {"status": "queued"}
+    ])
+    calls = FakeCalls()
+    engine = make_engine(calls)
+
+    assert await engine.resume() == 1
+    simulation = fake.tables["simulations"][0]
+    assert simulation["owner"] == "process-b"
+    assert simulation["lease_expires_at"] > timestamp(30)
+
+    run = engine._runs["sim-1"]
+    # The interrupted dial may have placed a call, so only the queued slot is dialed
+    await wait_until(lambda: calls.dialed == [4])
+    assert engine.progress("sim-1")["active_calls"] == 2
+    calls.end_all()
+    await run.task
+
+    assert calls.dialed == [4]
+    assert slot_statuses(fake) == ["completed", "completed", "failed", "completed"]
+    assert fake.tables["simulation_call_slots"][2]["error"].startswith("Dial interrupted")
+    assert simulation["status"] == "completed"
+    assert (simulation["completed_calls"], simulation["failed_calls"], simulation["active_calls"]) == (3, 1, 0)
+
+
+@pytest.mark.asyncio
+async def test_a_simulation_leased_to_a_live_process_is_not_resumed(fake):
+    seed_simulation(fake, lease_expires_at=timestamp(30), slots=[{"status": "queued"}])
+    calls = FakeCalls()
+    engine = make_engine(calls)
+
+    assert await engine.resume() == 0
+    assert calls.dialed == []
+    assert fake.tables["simulations"][0]["owner"] == "process-a"
+
+
+@pytest.mark.asyncio
+async def test_a_slot_is_only_dialed_if_it_is_still_queued(fake):
+    seed_simulation(fake, slots=[{"status": "queued"}, {"status": "queued"}])
+    fake.tables["simulations"][0]["concurrent_calls"] = 1
+    calls = FakeCalls()
+    engine = make_engine(calls)
+
+    original_dial = calls.dial
+
+    async def dial(request):
+        # The other slot is stopped elsewhere while this call is placed
+        fake.tables["simulation_call_slots"][1]["status"] = "stopped"
+        return await original_dial(request)
+
+    engine._dial = dial
+    await engine.resume()
+    run = engine._runs["sim-1"]
+    await wait_until(lambda: calls.dialed == [1])
+    calls.end_all()
+    await run.task
+
+    assert calls.dialed == [1]
+    assert slot_statuses(fake) == ["completed", "stopped"]
+    assert fake.tables["simulations"][0]["stopped_calls"] == 1
+
+
+@pytest.mark.asyncio
+async def test_stop_hangs_up_calls_in_flight_and_stops_queued_slots(fake):
+    calls = FakeCalls()
+    engine = make_engine(calls)
+    simulation_id = await engine.create("+15550100", 1, 3, {}, [None, None, None])
+    assert fake.tables["simulations"][0]["owner"] == "process-b"
+
+    run = engine._runs[simulation_id]
+    await wait_until(lambda: calls.dialed == [1])
+    assert await engine.stop(simulation_id)
+    await run.task
+
+    assert calls.hung_up == ["CA1"]
+    assert calls.dialed == [1]
+    assert slot_statuses(fake) == ["completed", "stopped", "stopped"]
+    simulation = fake.tables["simulations"][0]
+    assert simulation["status"] == "stopped"
+    assert (simulation["completed_calls"], simulation["stopped_calls"], simulation["active_calls"]) == (1, 2, 0)
+
+
+@pytest.mark.asyncio
+async def test_heartbeat_halts_a_simulation_stopped_by_another_process(fake):
+    seed_simulation(fake, slots=[{"status": "queued"}, {"status": "queued"}, {"status": "queued"}])
+    fake.tables["simulations"][0]["concurrent_calls"] = 1
+    calls = FakeCalls()
+    engine = make_engine(calls)
+    await engine.resume()
+    run = engine._runs["sim-1"]
+    await wait_until(lambda: calls.dialed == [1])
+
+    # Another process handles /stop: the queued slots and the simulation are stopped in the database
+    other = make_engine(FakeCalls(), owner="process-c")
+    assert await other.stop("sim-1")
+
+    await engine.heartbeat()
+    await run.task
+    assert calls.hung_up == ["CA1"]
+    assert slot_statuses(fake) == ["completed", "stopped", "stopped"]
+    assert fake.tables["simulations"][0]["status"] == "stopped"
+
+
+@pytest.mark.asyncio
+async def test_heartbeat_gives_up_a_simulation_taken_over_by_another_process(fake):
+    seed_simulation(fake, slots=[{"status": "queued"}])
+    calls = FakeCalls()
+    engine = make_engine(calls)
+    await engine.resume()
+    run = engine._runs["sim-1"]
+    await wait_until(lambda: calls.dialed == [1])
+
+    # The lease expired while this process was unresponsive and another process claimed it
+    fake.tables["simulations"][0]["owner"] = "process-c"
+    await engine.heartbeat()
+    with pytest.raises(asyncio.CancelledError):
+        await run.task
+    assert engine.stats()["lost_leases"] == 1
+    assert "sim-1" not in engine._runs
+
+
+@pytest.mark.asyncio
+async def test_close_releases_the_leases(fake):
+    seed_simulation(fake, slots=[{"status": "queued"}])
+    calls = FakeCalls()
+    engine = make_engine(calls)
+    await engine.resume()
+    await wait_until(lambda: calls.dialed == [1])
+
+    await engine.close()
+    simulation = fake.tables["simulations"][0]
+    assert simulation["status"] == "running"
+    assert simulation["lease_expires_at"] <= timestamp(0)
+
+    # The next process resumes it and waits on the call already placed
+    successor_calls = FakeCalls()
+    successor = make_engine(successor_calls, owner="process-c")
+    assert await successor.resume() == 1
+    successor_calls.end("CA1")
+    await successor._runs["sim-1"].task
+    assert successor_calls.dialed == []
+    assert simulation["status"] == "completed"
@@ -0,0 +1,92 @@
+from app.services.transcript_compactor import (
+    TranscriptTurn,
+    chunk_transcript,
+    compact_transcript,
+    estimate_tokens,
+    merge_chunk_analyses,
+    render_transcript,
+    transcript_tokens
+)
+
+
+MESSAGES = [
+    {"message": "Assistant: Hi, what can I get you?", "timestamp": "2024-01-01T12:00:02", "type": "assistant", "duration_ms": 2000},
+    {"message": "User: A large pizza.", "timestamp": "2024-01-01T12:00:05", "type": "user", "duration_ms": 1500},
+    {"message": "User:   And  a soda.", "timestamp": "2024-01-01T12:00:08", "type": "user", "duration_ms": 1000},
+    {"message": "Assistant: ", "timestamp": "2024-01-01T12:00:09", "type": "assistant"},
+    {"message": "Assistant: Anything else?", "timestamp": "2024-01-01T12:01:17", "type": "assistant", "duration_ms": 1000}
+]
+
+
+def test_same_speaker_messages_merge_with_relative_timestamps():
+    turns = compact_transcript(MESSAGES)
+
+    assert render_transcript(turns) == (
+        "[0:00] Assistant: Hi, what can I get you?\n"
+        "[0:03] User: A large pizza. And a soda.\n"
+        "[1:16] Assistant: Anything else?"
+    )
+    assert render_transcript(turns, timestamps=False).startswith("Assistant: Hi")
+
+
+def test_stored_and_live_timestamps_compare_in_utc():
+    # Turns rebuilt from conversation_turns carry an offset; older stored messages don't
+    turns = compact_transcript([
+        {"message": "Assistant: Hi", "timestamp": "2024-01-01T12:00:02", "type": "assistant", "duration_ms": 2000},
+        {"message": "User: Hello", "timestamp": "2024-01-01T14:00:05+02:00", "type": "user", "duration_ms": 1000}
+    ])
+    assert [turn.offset_seconds for turn in turns] == [0.0, 4.0]
+
+
+def test_messages_without_timestamps_have_no_offset():
+    turns = compact_transcript([{"message": "User: hello"}, {"message": "Assistant: hi there"}])
+    assert render_transcript(turns) == "User: hello\nAssistant: hi there"
+
+
+def test_long_transcripts_are_split_into_even_chunks_under_budget():
+    turns = [TranscriptTurn("User" if index % 2 else "Assistant", "word " * 20, index * 5.0) for index in range(30)]
+    total = transcript_tokens(turns)
+
+    chunks = chunk_transcript(turns, max_tokens=total // 2 + 10)
+    assert len(chunks) == 2
+    assert [turn for chunk in chunks for turn in chunk] == turns
+    assert abs(transcript_tokens(chunks[0]) - transcript_tokens(chunks[1])) <= transcript_tokens(turns[:1])
+
+    assert chunk_transcript(turns, max_tokens=total) == [turns]
+
+
+def test_a_turn_longer_than_the_budget_is_split_at_words():
+    turn = TranscriptTurn("User", " ".join(["order"] * 200), 0.0)
+    chunks = chunk_transcript([turn], max_tokens=100)
+
+    assert len(chunks) > 1
+    assert all(estimate_tokens(render_transcript(chunk)) <= 100 for chunk in chunks)
+    assert " ".join(piece.text for chunk in chunks for piece in chunk) == turn.text
+
+
+def test_chunk_analyses_merge_into_one_analysis():
+    merged = merge_chunk_analyses([
+        {
+            "overall_quality_score": 0.9,
+            "required_clarifications": 1,
+            "conversation_type": "Restaurant Order",
+            "topic_classification": ["menu", "pricing"],
+            "intent_classification": {"order": 0.9, "question": 0.4},
+            "sentiment_score": None
+        },
+        {
+            "overall_quality_score": 0.6,
+            "required_clarifications": 2,
+            "conversation_type": "Complaint",
+            "topic_classification": ["pricing", "delivery"],
+            "intent_classification": {"question": 0.8},
+            "sentiment_score": 0.5
+        }
+    ], weights=[300, 100])
+
+    assert merged["overall_quality_score"] == 0.825
+    assert merged["required_clarifications"] == 3
+    assert merged["conversation_type"] == "Restaurant Order"
+    assert merged["topic_classification"] == ["menu", "pricing", "delivery"]
+    assert merged["intent_classification"] == {"order": 0.9, "question": 0.8}
+    assert merged["sentiment_score"] == 0.5
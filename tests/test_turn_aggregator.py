@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta
+
+from app.services.turn_aggregator import TurnAggregator
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_assistant_deltas_become_one_turn_on_response_done():
+    clock = FakeClock()
+    turns = TurnAggregator(clock=clock)
+
+    for delta in ["Hel", "lo ", "there"]:
+        assert turns.feed({"type": "response.audio_transcript.delta", "response_id": "resp_1", "item_id": "item_1", "delta": delta}) == []
+        clock.now += 0.5
+    assert turns.feed({"type": "response.audio_transcript.done", "response_id": "resp_1", "item_id": "item_1", "transcript": "Hello there"}) == []
+
+    [turn] = turns.feed({
+        "type": "response.done",
+        "response": {
+            "id": "resp_1",
+            "status": "completed",
+            "output": [{"id": "item_1", "role": "assistant", "content": [{"type": "audio", "transcript": "Hello there"}]}]
+        }
+    })
+    assert turn["role"] == "assistant"
+    assert turn["text"] == "Hello there"
+    assert turn["response_id"] == "resp_1"
+    assert turn["duration_ms"] == 1500.0
+    assert turns.turns == [turn]
+
+
+def test_text_deltas_without_done_events_are_joined():
+    turns = TurnAggregator()
+    for delta in ["Sure", ", one", " moment."]:
+        turns.feed({"type": "response.text.delta", "response_id": "resp_1", "item_id": "item_1", "delta": delta})
+
+    [turn] = turns.feed({"type": "response.done", "response": {"id": "resp_1", "status": "completed", "output": []}})
+    assert turn["text"] == "Sure, one moment."
+
+
+def test_user_turn_is_timed_from_speech_start():
+    clock = FakeClock()
+    turns = TurnAggregator(clock=clock)
+
+    turns.feed({"type": "input_audio_buffer.speech_started", "item_id": "item_2"})
+    clock.now = 2.0
+    turns.feed({"type": "conversation.item.input_audio_transcription.delta", "item_id": "item_2", "delta": "I need"})
+    clock.now = 2.5
+    [turn] = turns.feed({"type": "conversation.item.input_audio_transcription.completed", "item_id": "item_2", "transcript": "I need help."})
+
+    assert turn["role"] == "user"
+    assert turn["text"] == "I need help."
+    assert turn["duration_ms"] == 2500.0
+    # Stamped in UTC, like the turns read back from the database
+    assert datetime.fromisoformat(turn["ended_at"]).utcoffset() == timedelta(0)
+
+
+def test_empty_and_failed_utterances_produce_no_turns():
+    turns = TurnAggregator()
+    turns.feed({"type": "input_audio_buffer.speech_started", "item_id": "item_1"})
+    assert turns.feed({"type": "conversation.item.input_audio_transcription.completed", "item_id": "item_1", "transcript": "  "}) == []
+
+    turns.feed({"type": "input_audio_buffer.speech_started", "item_id": "item_2"})
+    turns.feed({"type": "conversation.item.input_audio_transcription.failed", "item_id": "item_2"})
+    assert turns.flush() == []
+    assert turns.turns == []
+
+
+def test_flush_keeps_a_response_cut_off_mid_stream():
+    turns = TurnAggregator()
+    turns.feed({"type": "response.audio_transcript.delta", "response_id": "resp_1", "item_id": "item_1", "delta": "Let me check"})
+
+    [turn] = turns.flush()
+    assert turn["text"] == "Let me check"
+    assert turn["status"] == "incomplete"
@@ -0,0 +1,60 @@
+from app.services.turn_metrics import TurnTimer
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_turn_timings_are_measured_from_speech_stopped():
+    clock = FakeClock()
+    timer = TurnTimer(clock=clock)
+
+    timer.on_speech_stopped()
+    clock.now = 0.2
+    timer.on_response_created()
+    clock.now = 0.5
+    timer.on_audio_delta()
+    clock.now = 0.6
+    timer.on_audio_delta()
+    clock.now = 1.5
+    turn = timer.on_response_done({
+        "id": "resp_1",
+        "status": "completed",
+        "usage": {
+            "total_tokens": 120,
+            "input_tokens": 100,
+            "output_tokens": 20,
+            "input_token_details": {"audio_tokens": 80, "text_tokens": 20},
+            "output_token_details": {"audio_tokens": 15, "text_tokens": 5}
+        }
+    })
+
+    assert turn["ttfa_ms"] == 500.0
+    assert turn["total_ms"] == 1500.0
+    assert turn["response_ttfa_ms"] == 300.0
+    assert turn["response_ms"] == 1300.0
+    assert timer.token_counts["total_tokens"] == 120
+    assert timer.token_counts["input_audio_tokens"] == 80
+    assert timer.token_counts["output_text_tokens"] == 5
+
+
+def test_response_without_caller_speech_has_no_ttfa():
+    clock = FakeClock()
+    timer = TurnTimer(clock=clock)
+
+    timer.on_response_created()
+    clock.now = 0.4
+    timer.on_audio_delta()
+    clock.now = 1.0
+    turn = timer.on_response_done({"id": "resp_greeting", "status": "completed"})
+
+    assert turn["ttfa_ms"] is None
+    assert turn["response_ttfa_ms"] == 400.0
+    stats = timer.stats()
+    assert stats["turns"] == 1
+    assert stats["measured_turns"] == 0
+    assert stats["avg_ttfa_ms"] is None
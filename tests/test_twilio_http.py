@@ -0,0 +1,51 @@
+import httpx
+import pytest
+from twilio.base.exceptions import TwilioRestException
+from twilio.rest import Client
+
+from app.twilio_http import PooledTwilioHttpClient, endpoint_name
+from benchmarks.fake_twilio_server import FakeTwilio
+
+ACCOUNT_SID = "AC" + "0" * 32
+
+
+def make_client(fake: FakeTwilio):
+    http_client = PooledTwilioHttpClient(transport=httpx.ASGITransport(app=fake.app))
+    return Client(ACCOUNT_SID, "token", http_client=http_client), http_client
+
+
+@pytest.mark.asyncio
+async def test_create_update_and_fetch_through_shared_client():
+    fake = FakeTwilio()
+    client, http_client = make_client(fake)
+
+    call = await client.calls.create_async(to="+15551230000", from_="+15550000000", url="https://example.com/incoming-call")
+    assert fake.calls[call.sid]["to"] == "+15551230000"
+    await client.calls(call.sid).update_async(status="completed")
+    assert (await client.calls(call.sid).fetch_async()).status == "completed"
+
+    endpoints = http_client.stats()["endpoints"]
+    assert endpoints["POST /2010-04-01/Accounts/{sid}/Calls.json"]["requests"] == 1
+    assert endpoints["POST /2010-04-01/Accounts/{sid}/Calls/{sid}.json"]["requests"] == 1
+    assert endpoints["GET /2010-04-01/Accounts/{sid}/Calls/{sid}.json"]["status_codes"] == {200: 1}
+    await http_client.close()
+
+
+@pytest.mark.asyncio
+async def test_error_responses_raise_and_are_counted():
+    fake = FakeTwilio(rate_limit_every=1)
+    client, http_client = make_client(fake)
+
+    with pytest.raises(TwilioRestException) as raised:
+        await client.calls.create_async(to="+15551230000", from_="+15550000000", url="https://example.com/incoming-call")
+    assert raised.value.status == 429
+
+    stats = http_client.stats()["endpoints"]["POST /2010-04-01/Accounts/{sid}/Calls.json"]
+    assert stats["errors"] == 1
+    assert stats["status_codes"] == {429: 1}
+    await http_client.close()
+
+
+def test_endpoint_name_folds_sids():
+    url = f"https://api.twilio.com/2010-04-01/Accounts/{ACCOUNT_SID}/Calls/CA{'a' * 32}.json"
+    assert endpoint_name("get", url) == "GET /2010-04-01/Accounts/{sid}/Calls/{sid}.json"
@@ -0,0 +1,50 @@
+import pytest
+
+from app.services.write_behind import CallPersister
+
+
+@pytest.mark.asyncio
+async def test_updates_and_turns_coalesce_into_one_flush():
+    updates, turn_batches = [], []
+
+    async def write_updates(fields):
+        updates.append(fields)
+        return True
+
+    async def write_turns(turns):
+        turn_batches.append(turns)
+        return True
+
+    persister = CallPersister("test", write_updates, write_turns, flush_interval=60)
+    persister.start()
+    persister.update({"status": "in-progress"})
+    persister.append_turn({"seq": 0, "content": "hi"})
+    persister.append_turn({"seq": 1, "content": "hello"})
+    persister.update({"status": "completed", "duration": 12})
+
+    assert await persister.close()
+    assert updates == [{"status": "completed", "duration": 12}]
+    assert turn_batches == [[{"seq": 0, "content": "hi"}, {"seq": 1, "content": "hello"}]]
+    stats = persister.stats()
+    assert stats["flushes"] == 1
+    assert stats["writes"] == 2
+    assert stats["coalescing_ratio"] == 4.0
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_is_retried_without_overwriting_newer_fields():
+    results = [False, True]
+    updates = []
+
+    async def write_updates(fields):
+        updates.append(fields)
+        return results.pop(0)
+
+    persister = CallPersister("test", write_updates, retry_delay=0)
+    persister.update({"status": "in-progress", "duration": 1})
+    assert not await persister.flush()
+    persister.update({"status": "completed"})
+
+    assert await persister.close()
+    assert updates[-1] == {"status": "completed", "duration": 1}
+    assert persister.stats()["failures"] == 1